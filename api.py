@@ -0,0 +1,318 @@
+"""
+Async HTTP API for resume parsing, alongside the Streamlit UI.
+
+    python api.py --port 8080 --workers 4
+
+Endpoints:
+    POST /parse      Raw PDF/DOCX body (set Content-Type or ?filename=), or a
+                     multipart/form-data upload with one or more files. One
+                     file returns a JSON object; several files stream back as
+                     NDJSON, one line per file as soon as it is parsed.
+                     Add ?user_id=N to also save results to parsed_data;
+                     near-duplicates of earlier uploads report duplicate_of.
+    GET  /history    ?user_id=N[&limit=20][&cursor=...] one page of a user's
+                     history plus the cursor for the next page.
+    POST /rank       JSON {"job_description": ..., "skills": [...], "user_id": N,
+                     "top_k": 20, "method": "cosine"|"overlap"}; stored resumes
+                     ranked by skill match against the job.
+    GET  /export     ?user_id=N&format=csv|jsonl|parquet|arrow[&since=...][&until=...]
+                     the user's parsed records, streamed in chunks (see export.py).
+
+Every request must send the key from RESUME_PARSER_API_KEY in X-API-Key;
+the server refuses to start without one. The API trusts the user_id it is
+given, so the key belongs only to back-end integrations, never to browsers.
+Extraction runs in a memory-capped process pool under GUARDED_LIMITS (a
+breach comes back as a 422 naming the limit); database calls run in
+threads, so the event loop only does I/O.
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import sys
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from aiohttp import web
+
+from cache import cached_parse
+from db import get_user_history_page, initialize_database
+from dedup import save_with_dedup
+from export import CONTENT_TYPES, FORMATS, iter_export
+from parser import GUARDED_LIMITS, ExtractionLimitError
+from ranking import DEFAULT_TOP_K, METHODS, rank_candidates
+from sandbox import sandboxed_pool
+
+MAX_REQUEST_BYTES = 50 * 1024 * 1024
+MAX_FILE_BYTES = 10 * 1024 * 1024
+MAX_FILES_PER_REQUEST = 50
+# Parses allowed in flight at once, and how many more may wait before we shed load
+MAX_INFLIGHT_PARSES = 32
+MAX_WAITING_PARSES = 256
+
+CONTENT_TYPE_EXTENSIONS = {
+    "application/pdf": ".pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ".docx",
+}
+
+# {"pool": ProcessPoolExecutor, "size": workers}; mutable so a broken pool can be replaced
+WORKERS = web.AppKey("workers", dict)
+LIMITER = web.AppKey("limiter", dict)
+API_KEY = web.AppKey("api_key", str)
+
+
+def _parse(data: bytes, filename: str):
+    # Runs in a sandboxed worker process
+    return cached_parse(data, filename, limits=GUARDED_LIMITS)
+
+
+class PayloadTooLarge(Exception):
+    pass
+
+
+async def _read_part(part, limit: int) -> bytes:
+    chunks, size = [], 0
+    while True:
+        chunk = await part.read_chunk()
+        if not chunk:
+            return b"".join(chunks)
+        size += len(chunk)
+        if size > limit:
+            raise PayloadTooLarge(f"{part.filename} is larger than {limit} bytes")
+        chunks.append(chunk)
+
+
+async def _parse_one(app, filename: str, data: bytes, user_id) -> dict:
+    limiter = app[LIMITER]
+    if limiter["waiting"] >= MAX_WAITING_PARSES:
+        raise web.HTTPServiceUnavailable(text="Parser is overloaded, retry later", headers={"Retry-After": "1"})
+    limiter["waiting"] += 1
+    try:
+        await limiter["semaphore"].acquire()
+    finally:
+        limiter["waiting"] -= 1
+    workers = app[WORKERS]
+    pool = workers["pool"]
+    try:
+        loop = asyncio.get_running_loop()
+        text, fields = await loop.run_in_executor(pool, _parse, data, filename)
+    except ExtractionLimitError as e:
+        return {"filename": filename, **e.to_dict()}
+    except BrokenProcessPool:
+        # A worker died mid-parse; swap in a fresh pool for everyone else
+        if workers["pool"] is pool:
+            workers["pool"] = sandboxed_pool(workers["size"])
+            pool.shutdown(wait=False)
+        return {"filename": filename, "error": "The parser crashed on this file"}
+    except Exception as e:
+        # Per-file failure; the rest of a batch carries on
+        return {"filename": filename, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        limiter["semaphore"].release()
+    result = {"filename": filename, "fields": fields}
+    if user_id is not None:
+        saved = await asyncio.to_thread(save_with_dedup, user_id, fields, text)
+        result["id"] = saved["id"]
+        result["duplicate_of"] = saved["duplicate_of"]
+    return result
+
+
+def _user_id(request, required: bool):
+    value = request.query.get("user_id")
+    if value is None:
+        if required:
+            raise web.HTTPBadRequest(text="user_id is required")
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise web.HTTPBadRequest(text="user_id must be an integer")
+
+
+# ------------ Handlers ------------
+
+async def handle_parse(request: web.Request) -> web.StreamResponse:
+    user_id = _user_id(request, required=False)
+
+    if request.content_type != "multipart/form-data":
+        filename = request.query.get("filename") or "upload" + CONTENT_TYPE_EXTENSIONS.get(request.content_type, "")
+        data = await request.read()
+        if len(data) > MAX_FILE_BYTES:
+            raise web.HTTPRequestEntityTooLarge(max_size=MAX_FILE_BYTES, actual_size=len(data))
+        result = await _parse_one(request.app, filename, data, user_id)
+        return web.json_response(result, status=422 if "error" in result else 200)
+
+    files = []
+    reader = await request.multipart()
+    async for part in reader:
+        if not part.filename:
+            continue
+        if len(files) == MAX_FILES_PER_REQUEST:
+            raise web.HTTPRequestEntityTooLarge(
+                max_size=MAX_FILES_PER_REQUEST, actual_size=len(files) + 1,
+                text=f"At most {MAX_FILES_PER_REQUEST} files per request",
+            )
+        try:
+            files.append((part.filename, await _read_part(part, MAX_FILE_BYTES)))
+        except PayloadTooLarge as e:
+            raise web.HTTPRequestEntityTooLarge(max_size=MAX_FILE_BYTES, actual_size=MAX_FILE_BYTES + 1, text=str(e))
+    if not files:
+        raise web.HTTPBadRequest(text="No files in upload")
+
+    if len(files) == 1:
+        result = await _parse_one(request.app, files[0][0], files[0][1], user_id)
+        return web.json_response(result, status=422 if "error" in result else 200)
+
+    # Batch: stream each result as soon as it is ready
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    tasks = [asyncio.ensure_future(_parse_one(request.app, name, data, user_id)) for name, data in files]
+    try:
+        for task in asyncio.as_completed(tasks):
+            try:
+                result = await task
+            except web.HTTPException as e:
+                result = {"error": e.text}
+            await response.write((json.dumps(result) + "\n").encode())
+    finally:
+        for task in tasks:
+            task.cancel()
+    await response.write_eof()
+    return response
+
+
+async def handle_history(request: web.Request) -> web.Response:
+    user_id = _user_id(request, required=True)
+    try:
+        limit = min(int(request.query.get("limit", 20)), 100)
+    except ValueError:
+        raise web.HTTPBadRequest(text="limit must be an integer")
+    if limit < 1:
+        raise web.HTTPBadRequest(text="limit must be at least 1")
+    cursor = None
+    if request.query.get("cursor"):
+        # Cursor format: "<parsed_on>|<id>", as returned in next_cursor
+        parsed_on, _, last_id = request.query["cursor"].rpartition("|")
+        if not parsed_on or not last_id.isdigit():
+            raise web.HTTPBadRequest(text="Malformed cursor")
+        cursor = (parsed_on, int(last_id))
+    page, next_cursor = await asyncio.to_thread(get_user_history_page, user_id, limit, cursor)
+    return web.json_response({
+        "items": page,
+        "next_cursor": f"{next_cursor[0]}|{next_cursor[1]}" if next_cursor else None,
+    })
+
+
+async def handle_rank(request: web.Request) -> web.Response:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="Body must be JSON")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="Body must be a JSON object")
+    skills = body.get("skills") or []
+    if not isinstance(skills, list) or not all(isinstance(skill, str) for skill in skills):
+        raise web.HTTPBadRequest(text="skills must be a list of strings")
+    if not body.get("job_description") and not skills:
+        raise web.HTTPBadRequest(text="Send a job_description and/or skills")
+    if body.get("method", "cosine") not in METHODS:
+        raise web.HTTPBadRequest(text=f"method must be one of {', '.join(METHODS)}")
+    try:
+        top_k = min(int(body.get("top_k", DEFAULT_TOP_K)), 500)
+        user_id = int(body["user_id"]) if body.get("user_id") is not None else None
+    except (TypeError, ValueError):
+        raise web.HTTPBadRequest(text="top_k and user_id must be integers")
+    report = await asyncio.to_thread(
+        rank_candidates, body.get("job_description"), skills, user_id, top_k, body.get("method", "cosine"),
+    )
+    return web.json_response(report)
+
+
+async def handle_export(request: web.Request) -> web.StreamResponse:
+    user_id = _user_id(request, required=True)
+    fmt = request.query.get("format", "csv")
+    if fmt not in FORMATS:
+        raise web.HTTPBadRequest(text=f"format must be one of {', '.join(FORMATS)}")
+    try:
+        since, until = (
+            datetime.fromisoformat(request.query[key]) if request.query.get(key) else None
+            for key in ("since", "until")
+        )
+    except ValueError:
+        raise web.HTTPBadRequest(text="since and until must be ISO dates")
+
+    blocks = iter_export(fmt, user_id, since, until)
+    response = web.StreamResponse(headers={
+        "Content-Type": CONTENT_TYPES[fmt],
+        "Content-Disposition": f'attachment; filename="resumes-{user_id}.{fmt}"',
+    })
+    await response.prepare(request)
+    step = None
+    try:
+        # Each block is read and encoded off the event loop; only one is held at a time
+        while True:
+            step = asyncio.ensure_future(asyncio.to_thread(next, blocks, None))
+            # Shielded: a client disconnect cancels this handler, not the thread running next()
+            block = await asyncio.shield(step)
+            if block is None:
+                break
+            await response.write(block)
+    finally:
+        if step is not None and not step.done():
+            # A generator can't be closed while another thread is inside it
+            await asyncio.wait([step])
+        blocks.close()
+    await response.write_eof()
+    return response
+
+
+@web.middleware
+async def api_key_middleware(request, handler):
+    if not hmac.compare_digest(request.headers.get("X-API-Key", ""), request.app[API_KEY]):
+        raise web.HTTPUnauthorized(text="Missing or invalid X-API-Key")
+    return await handler(request)
+
+
+# ------------ App ------------
+
+def create_app(workers: int = None, api_key: str = None) -> web.Application:
+    api_key = api_key or os.environ.get("RESUME_PARSER_API_KEY")
+    if not api_key:
+        raise ValueError("Set RESUME_PARSER_API_KEY: the API serves every user's records to whoever holds the key")
+    app = web.Application(client_max_size=MAX_REQUEST_BYTES, middlewares=[api_key_middleware])
+    app[API_KEY] = api_key
+    app.router.add_post("/parse", handle_parse)
+    app.router.add_get("/history", handle_history)
+    app.router.add_post("/rank", handle_rank)
+    app.router.add_get("/export", handle_export)
+
+    async def startup(app):
+        initialize_database()
+        app[WORKERS] = {"pool": sandboxed_pool(workers), "size": workers}
+        app[LIMITER] = {"semaphore": asyncio.Semaphore(MAX_INFLIGHT_PARSES), "waiting": 0}
+
+    async def cleanup(app):
+        app[WORKERS]["pool"].shutdown(wait=False, cancel_futures=True)
+
+    app.on_startup.append(startup)
+    app.on_cleanup.append(cleanup)
+    return app
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Serve the resume parser over HTTP.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8080)
+    arg_parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    args = arg_parser.parse_args(argv)
+    try:
+        app = create_app(args.workers)
+    except ValueError as e:
+        arg_parser.error(str(e))
+    web.run_app(app, host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,18 @@
 import streamlit as st
 import time
 import json
-from auth import handle_signup, handle_signin
-from parser import extract_text_from_pdf, extract_text_from_docx, extract_fields
-from db import save_parsed_data, initialize_database, get_user_history, clear_user_history
+from auth import handle_signup, handle_signin, is_admin, sessions
+from jobs import JobQueue, QueueFullError, QUEUED, RUNNING, DONE
+from db import initialize_database, get_user_history_page, count_user_history, clear_user_history, search_resumes, get_user_by_email
+from parser import get_skills
 import pandas as pd
+import os
+import metrics
+from cache import get_parse_cache
+from ranking import METHODS, rank_candidates
+from export import CONTENT_TYPES, FORMATS, export
+import tempfile
+from datetime import timedelta
 
 # ----------- Custom CSS -----------
 def local_css():
@@ -83,19 +91,40 @@ def local_css():
 
 # ----------- Setup -----------
 st.set_page_config(page_title="Resume Parser", layout="centered")
-initialize_database()
+
+@st.cache_resource
+def setup_database():
+    # Once per server process rather than on every rerun
+    initialize_database()
+
+setup_database()
 local_css()
+if metrics.ENABLED and os.environ.get("RESUME_PARSER_METRICS_PORT"):
+    metrics.serve_metrics(int(os.environ["RESUME_PARSER_METRICS_PORT"]))
 
 # ----------- Session State -----------
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
     st.session_state.user_info = None
+    st.session_state.session_token = None
 if "show_history" not in st.session_state:
     st.session_state.show_history = False
 if "current_page" not in st.session_state:
     st.session_state.current_page = "home"
 if "parse_result" not in st.session_state:
     st.session_state.parse_result = None
+if "history_cursors" not in st.session_state:
+    # Keyset cursors of the history pages visited so far; the last one is the current page
+    st.session_state.history_cursors = [None]
+if "parse_job" not in st.session_state:
+    st.session_state.parse_job = None
+if "show_admin" not in st.session_state:
+    st.session_state.show_admin = False
+
+HISTORY_PAGE_SIZE = 10
+PARSE_WORKERS = int(os.environ.get("RESUME_PARSER_WORKERS", "2"))
+PARSE_QUEUE_LIMIT = int(os.environ.get("RESUME_PARSER_QUEUE_LIMIT", "8"))
+PARSE_POLL_INTERVAL = 0.5
 
 # ----------- Navigation Helper -----------
 def navigate_to(page_name):
@@ -104,11 +133,30 @@ def navigate_to(page_name):
         st.session_state.show_history = False
         st.session_state.parse_result = None
 
+def start_session(user):
+    st.session_state.session_token = sessions.start(user)
+    st.session_state.logged_in = True
+    st.session_state.user_info = user
+
+def end_session():
+    sessions.end(st.session_state.session_token)
+    st.session_state.session_token = None
+    st.session_state.logged_in = False
+    st.session_state.user_info = None
+
 # ----------- Main -----------
 def main():
     st.title("📄 Resume Parser")
 
     if st.session_state.logged_in:
+        # Validated against the in-memory session cache, not the database, on every rerun
+        user = sessions.get(st.session_state.session_token)
+        if user is None:
+            end_session()
+            st.info("Your session has expired. Please sign in again.")
+            show_guest_home()
+            return
+        st.session_state.user_info = user
         show_logged_in_home()
     else:
         if st.session_state.current_page == "home":
@@ -143,12 +191,8 @@ def show_signup():
     if st.button("Sign Up"):
         success, message = handle_signup(name, email, password)
         if success:
-            st.success(message)
-            time.sleep(1.5)
-            st.success("Redirecting to Resume Parser...")
-            time.sleep(2)
-            st.session_state.logged_in = True
-            st.session_state.user_info = (None, name, email)
+            user_id, name, email, _ = get_user_by_email(email)
+            start_session((user_id, name, email))
             navigate_to("home")
             st.experimental_rerun()
         else:
@@ -165,10 +209,7 @@ def show_signin():
     if st.button("Sign In"):
         success, result = handle_signin(email, password)
         if success:
-            st.success("Login successful! Redirecting...")
-            time.sleep(3)
-            st.session_state.logged_in = True
-            st.session_state.user_info = result
+            start_session(result)
             navigate_to("home")
             st.experimental_rerun()
         else:
@@ -207,23 +248,43 @@ def show_logged_in_home():
     )
 
     if st.button("🚪 Log Out"):
-        st.session_state.logged_in = False
-        st.session_state.user_info = None
+        end_session()
         st.session_state.current_page = "home"
         st.session_state.show_history = False
         st.session_state.parse_result = None
+        st.session_state.parse_job = None
+        st.session_state.history_cursors = [None]
+        st.session_state.show_admin = False
         st.experimental_rerun()
 
     if st.button("📜 History"):
         st.session_state.show_history = not st.session_state.show_history
+        st.session_state.history_cursors = [None]
 
     if st.session_state.show_history:
         if st.button("🗑️ Clear History"):
             clear_user_history(st.session_state.user_info[0])
+            st.session_state.history_cursors = [None]
             st.success("Your history has been cleared.")
         show_history()
         st.markdown("<br>", unsafe_allow_html=True)
 
+    with st.expander("🔎 Search parsed resumes"):
+        show_search()
+
+    with st.expander("🎯 Rank resumes for a job"):
+        show_ranking()
+
+    with st.expander("📤 Export history"):
+        show_export()
+
+    # Metrics panel: only for signed-in users listed in RESUME_PARSER_ADMIN_EMAILS
+    if metrics.ENABLED and is_admin(st.session_state.user_info):
+        if st.button("🔧 Pipeline Metrics"):
+            st.session_state.show_admin = not st.session_state.show_admin
+        if st.session_state.show_admin:
+            show_admin_metrics()
+
     uploaded_file = st.file_uploader(
         "Drag and drop file here or click to upload (.pdf or .docx)",
         type=["pdf", "docx"],
@@ -237,27 +298,60 @@ def show_logged_in_home():
         st.success(f"File uploaded: {uploaded_file.name}")
 
         if st.button("Parse Resume"):
-            with st.spinner("Parsing your resume..."):
-                file_type = uploaded_file.type
-                if file_type == "application/pdf":
-                    text = extract_text_from_pdf(uploaded_file)
-                elif file_type in [
-                    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    "application/octet-stream",
-                ]:
-                    text = extract_text_from_docx(uploaded_file)
-                else:
-                    st.error("Unsupported file format.")
-                    return
-
-                data = extract_fields(text)
-                st.session_state.parse_result = (data, text)
-                user_id = st.session_state.user_info[0]
-                save_parsed_data(user_id, data)
+            file_type = uploaded_file.type
+            if file_type not in [
+                "application/pdf",
+                "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                "application/octet-stream",
+            ]:
+                st.error("Unsupported file format.")
+                return
+
+            # Parsing runs in the background job queue; this run only records the job id
+            user_id = st.session_state.user_info[0]
+            try:
+                st.session_state.parse_job = get_job_queue().submit(
+                    user_id, uploaded_file.getvalue(), uploaded_file.name
+                )
+                st.session_state.parse_result = None
+            except QueueFullError:
+                st.warning("The parser is busy right now. Please try again in a few seconds.")
+
+    if st.session_state.parse_job:
+        poll_parse_job()
 
     if st.session_state.parse_result:
         display_parsed_results(*st.session_state.parse_result)
 
+# ----------- Background Parsing -----------
+@st.cache_resource
+def get_job_queue():
+    # One queue per server process, shared by every session
+    return JobQueue(max_workers=PARSE_WORKERS, max_pending=PARSE_QUEUE_LIMIT)
+
+def poll_parse_job():
+    job_queue = get_job_queue()
+    job_id = st.session_state.parse_job
+    job = job_queue.status(job_id)
+    if job is None:
+        st.session_state.parse_job = None
+        st.error("The parse job was lost. Please try again.")
+    elif job["status"] in (QUEUED, RUNNING):
+        st.info("⏳ Parsing your resume..." if job["status"] == RUNNING else "⏳ Waiting for a free parser...")
+        time.sleep(PARSE_POLL_INTERVAL)
+        st.experimental_rerun()
+    else:
+        st.session_state.parse_job = None
+        job_queue.forget(job_id)
+        if job["status"] == DONE:
+            st.session_state.parse_result = job["result"]
+            if job["duplicate_of"]:
+                st.warning(f"This looks like a near-duplicate of record #{job['duplicate_of']} in your history.")
+        elif job["error_detail"] and job["error_detail"]["limit"]:
+            st.error(f"This file is too large or complex to parse safely: {job['error']}")
+        else:
+            st.error(f"Could not parse this file: {job['error']}")
+
 # ----------- Resume Parser Area -----------
 def display_parsed_results(data, full_text):
     st.markdown("---")
@@ -306,14 +400,22 @@ def show_history():
     st.markdown("---")
     st.subheader("🕘 Your Past Parsed Resumes")
     user_id = st.session_state.user_info[0]
-    history = get_user_history(user_id)
+    cursors = st.session_state.history_cursors
+    history, next_cursor = get_user_history_page(user_id, HISTORY_PAGE_SIZE, cursors[-1])
 
     if not history:
         st.info("No past parsed resumes found.")
         return
 
-    for i, record in enumerate(history, 1):
+    total = count_user_history(user_id)
+    first = (len(cursors) - 1) * HISTORY_PAGE_SIZE
+    st.caption(f"Showing {first + 1}–{first + len(history)} of {total}")
+
+    for i, record in enumerate(history, first + 1):
         st.markdown(f"### Resume #{i}")
+        st.caption(f"Record #{record['id']}")
+        if record["duplicate_of"]:
+            st.markdown(f"⚠️ Near-duplicate of record #{record['duplicate_of']}")
         st.markdown(f"**Parsed On:** {record['parsed_on']}")
         st.markdown("**Details:**")
         for key in [
@@ -329,5 +431,129 @@ def show_history():
             st.markdown(f"- **{key.capitalize()}**: {record[key]}")
         st.markdown("---")
 
+    col1, col2 = st.columns(2)
+    with col1:
+        if len(cursors) > 1 and st.button("⬅️ Newer"):
+            cursors.pop()
+            st.experimental_rerun()
+    with col2:
+        if next_cursor is not None and st.button("Older ➡️"):
+            cursors.append(next_cursor)
+            st.experimental_rerun()
+
+# ----------- Search -----------
+def show_search():
+    skills = st.multiselect("Skills", sorted(get_skills()))
+    match_all = st.radio("Match", ["All selected skills", "Any selected skill"], horizontal=True) == "All selected skills"
+    text = st.text_input("Keywords (name, education, experience)")
+    days = st.number_input("Parsed in the last N days (0 = any time)", min_value=0, value=0, step=1)
+
+    if not st.button("Search"):
+        return
+    if not skills and not text.strip():
+        st.info("Pick at least one skill or enter a keyword.")
+        return
+
+    results = search_resumes(
+        user_id=st.session_state.user_info[0],
+        skills=skills,
+        match_all=match_all,
+        text=text,
+        since_days=days or None,
+    )
+    if not results:
+        st.info("No matching resumes.")
+        return
+    st.caption(f"{len(results)} match(es)")
+    for record in results:
+        st.markdown(f"**{record['name']}** · {record['email']} · parsed {record['parsed_on']}")
+        st.markdown(f"- **Skills**: {record['skills']}")
+
+# ----------- Job Matching -----------
+def show_ranking():
+    job_description = st.text_area("Job description")
+    skills = st.multiselect("Additional required skills", sorted(get_skills()), key="rank_skills")
+    col1, col2 = st.columns(2)
+    top_k = col1.number_input("Show top", min_value=1, max_value=100, value=10, step=1)
+    method = col2.selectbox("Score", METHODS)
+
+    if not st.button("Rank"):
+        return
+    if not job_description.strip() and not skills:
+        st.info("Paste a job description or pick some skills.")
+        return
+
+    report = rank_candidates(
+        job_description, skills, user_id=st.session_state.user_info[0], top_k=int(top_k), method=method,
+    )
+    if not report["job_skills"]:
+        st.info("No known skills found in the job description.")
+        return
+    st.caption("Matching on: " + ", ".join(report["job_skills"]))
+    if not report["results"]:
+        st.info("None of your parsed resumes match these skills.")
+        return
+    for record in report["results"]:
+        st.markdown(f"**{record['name']}** · score {record['score']:.2f} · parsed {record['parsed_on']}")
+        st.markdown(f"- **Has**: {', '.join(record['matched_skills'])}")
+        if record["missing_skills"]:
+            st.markdown(f"- **Missing**: {', '.join(record['missing_skills'])}")
+
+# ----------- Export -----------
+def show_export():
+    fmt = st.selectbox("Format", FORMATS, key="export_format")
+    since = until = None
+    if st.checkbox("Only resumes parsed between", key="export_range"):
+        col1, col2 = st.columns(2)
+        since = col1.date_input("From", key="export_since")
+        # Inclusive in the UI; export() takes an exclusive upper bound
+        until = col2.date_input("To", key="export_until") + timedelta(days=1)
+
+    if not st.button("Prepare export"):
+        return
+    # Rows are encoded to disk chunk by chunk, but st.download_button then holds the whole
+    # file in memory; exports too large for that belong to export.py or the API's GET /export
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            try:
+                rows = export(out, fmt, st.session_state.user_info[0], since, until)
+            except ImportError:
+                st.error("Parquet and Arrow exports need pyarrow (pip install pyarrow).")
+                return
+        st.caption(f"{rows} record(s)")
+        with open(path, "rb") as f:
+            st.download_button(
+                label=f"📥 Download {fmt.upper()}",
+                data=f,
+                file_name=f"parsed_resumes.{fmt}",
+                mime=CONTENT_TYPES[fmt],
+            )
+    finally:
+        os.unlink(path)
+
+# ----------- Admin Metrics -----------
+def show_admin_metrics():
+    st.subheader("🔧 Pipeline Metrics")
+
+    stats = get_parse_cache().stats()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Cache hits", stats["hits"])
+    col2.metric("Cache misses", stats["misses"])
+    col3.metric("Hit rate", f"{stats['hit_rate']:.0%}")
+
+    summary = metrics.snapshot()
+    if summary:
+        st.dataframe(pd.DataFrame.from_dict(summary, orient="index"))
+    else:
+        st.info("No instrumented calls recorded yet.")
+
+    with st.expander("Prometheus text format"):
+        st.code(metrics.render_prometheus(), language="text")
+
+    if st.button("Reset metrics"):
+        metrics.reset()
+        st.experimental_rerun()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,16 +1,77 @@
-import re
+import base64
 import hashlib
-from db import add_user, get_user_by_email
+import hmac
+import os
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from db import add_user, get_user_by_email, update_user_password
+
+# --------- Password Hashing ---------
+
+# Stored as "pbkdf2_sha256$<iterations>$<salt>$<hash>" (salt and hash base64).
+# Raising the iteration count upgrades each account's hash at its next sign-in.
+PBKDF2_ITERATIONS = int(os.environ.get("RESUME_PARSER_PBKDF2_ITERATIONS", "600000"))
+SALT_BYTES = 16
+HASH_SCHEME = "pbkdf2_sha256"
+
+# Key derivation is deliberately slow; at most this many run at once, so a burst of
+# sign-ins queues here instead of taking every core from the other sessions
+KDF_WORKERS = int(os.environ.get("RESUME_PARSER_KDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+_kdf_pool = ThreadPoolExecutor(max_workers=KDF_WORKERS, thread_name_prefix="kdf")
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
 
-# --------- Utility Functions ---------
+def _derive(password: str, salt: bytes, iterations: int) -> bytes:
+    # The caller still waits for its own hash; the pool only bounds how many run at once.
+    # pbkdf2_hmac releases the GIL, so other sessions' threads keep running meanwhile.
+    return _kdf_pool.submit(_pbkdf2, password, salt, iterations).result()
 
-# Hash the password using SHA256
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
 
-# Verify input password with stored hashed password
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+def _encode_hash(password: str, iterations: int, derive) -> str:
+    salt = secrets.token_bytes(SALT_BYTES)
+    return f"{HASH_SCHEME}${iterations}${_b64(salt)}${_b64(derive(password, salt, iterations))}"
+
+# Hash the password with a fresh random salt
+def hash_password(password: str, iterations: int = None) -> str:
+    return _encode_hash(password, iterations or PBKDF2_ITERATIONS, _derive)
+
+# Verify input password with stored hashed password; also accepts the old unsalted SHA-256 hex digests
 def verify_password(input_password: str, stored_hash: str) -> bool:
-    return hash_password(input_password) == stored_hash
+    if stored_hash.startswith(HASH_SCHEME + "$"):
+        try:
+            _, iterations, salt, expected = stored_hash.split("$")
+            derived = _derive(input_password, _unb64(salt), int(iterations))
+        except ValueError:
+            return False
+        return hmac.compare_digest(derived, _unb64(expected))
+    legacy = hashlib.sha256(input_password.encode()).hexdigest()
+    return hmac.compare_digest(legacy, stored_hash)
+
+# True for hashes that are legacy SHA-256 or weaker than the current iteration count
+def needs_rehash(stored_hash: str) -> bool:
+    parts = stored_hash.split("$")
+    return len(parts) != 4 or parts[0] != HASH_SCHEME or not parts[1].isdigit() or int(parts[1]) < PBKDF2_ITERATIONS
+
+def _rehash(user_id: int, password: str) -> None:
+    # Already on a pool thread, so derive directly rather than queueing behind ourselves
+    update_user_password(user_id, _encode_hash(password, PBKDF2_ITERATIONS, _pbkdf2))
+
+# Upgrade a stored hash on the KDF pool without making the sign-in wait for it;
+# if it fails, the next sign-in tries again
+def schedule_rehash(user_id: int, password: str) -> Future:
+    return _kdf_pool.submit(_rehash, user_id, password)
 
 # Validate email format
 def is_valid_email(email: str) -> bool:
@@ -26,6 +87,61 @@ def is_strong_password(password: str) -> bool:
         any(char.isdigit() for char in password)
     )
 
+# --------- Sessions ---------
+
+SESSION_TTL = int(os.environ.get("RESUME_PARSER_SESSION_TTL", str(12 * 3600)))
+MAX_SESSIONS = 10000
+
+class SessionCache:
+    """
+    Signed-in users by random token, so a rerun checks a dict instead of the
+    database. Tokens expire SESSION_TTL seconds after sign-in; past
+    max_sessions the oldest are dropped.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+
+    def start(self, user: tuple) -> str:
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._sessions[token] = (user, time.monotonic() + self.ttl)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return token
+
+    def get(self, token: Optional[str]) -> Optional[tuple]:
+        if not token:
+            return None
+        with self._lock:
+            entry = self._sessions.get(token)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._sessions[token]
+                return None
+            return entry[0]
+
+    def end(self, token: Optional[str]) -> None:
+        with self._lock:
+            self._sessions.pop(token, None)
+
+sessions = SessionCache()
+
+# --------- Admins ---------
+
+# Comma-separated emails of the users who may open the metrics panel
+ADMIN_EMAILS = {
+    email.strip().lower() for email in os.environ.get("RESUME_PARSER_ADMIN_EMAILS", "").split(",") if email.strip()
+}
+
+# True for a signed-in (user_id, name, email) listed in ADMIN_EMAILS
+def is_admin(user: Optional[tuple]) -> bool:
+    return bool(user) and user[2].lower() in ADMIN_EMAILS
+
 # --------- Sign-up & Sign-in Handlers ---------
 
 # Sign-up handler: returns (success, message)
@@ -40,7 +156,7 @@ def handle_signup(name: str, email: str, password: str) -> tuple[bool, str]:
         return False, "Password must be at least 6 characters, and contain uppercase, lowercase, and a number."
 
     hashed_pw = hash_password(password)
-    success = add_user(name, email, hashed_pw)
+    success, _ = add_user(name, email, hashed_pw)
 
     if success:
         return True, "User registered successfully!"
@@ -60,4 +176,8 @@ def handle_signin(email: str, password: str) -> tuple[bool, str | tuple]:
     if not verify_password(password, password_hash):
         return False, "Incorrect password."
 
-    return True, user  # successful login returns full user tuple
\ No newline at end of file
+    if needs_rehash(password_hash):
+        schedule_rehash(user_id, password)
+
+    # The password hash stays out of the session
+    return True, (user_id, name, email_stored)
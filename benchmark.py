@@ -0,0 +1,276 @@
+"""
+Reproducible benchmark for the parsing pipeline and the database layer.
+
+Generates a seeded synthetic corpus of PDF and DOCX resumes of varying length
+and section layout, times every stage separately and writes the results as
+JSON so runs can be compared across commits:
+
+    python benchmark.py --docs 200 --output bench-$(git rev-parse --short HEAD).json
+    python benchmark.py --db-sizes 1000,100000 --skip-extraction
+    python benchmark.py --write-corpus corpus/   # keep the generated files
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import db
+import metrics
+import parser
+
+# ------------ Synthetic Corpus ------------
+
+FIRST_NAMES = ["Asha", "Ben", "Chen", "Divya", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jamal"]
+LAST_NAMES = ["Kumar", "Lopez", "Müller", "Nakamura", "Okafor", "Patel", "Quinn", "Rossi", "Singh", "Tanaka"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Analytics"]
+DEGREES = ["B.Tech Computer Science", "MSc Data Science", "BA Economics", "MBA", "BSc Mathematics"]
+FILLER = ("designed built shipped maintained improved reduced latency by migrating services "
+          "led a team of engineers owned the roadmap for reporting pipelines").split()
+SECTIONS = ["education", "experience", "skills", "projects", "certifications"]
+
+
+def synthetic_resume(rng: random.Random, paragraphs: int) -> List[str]:
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    handle = name.lower().replace(" ", ".").encode("ascii", "ignore").decode()
+    lines = [
+        name,
+        f"{handle}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        f"https://www.linkedin.com/in/{handle.replace('.', '-')}",
+        f"https://github.com/{handle.replace('.', '')}",
+        "",
+    ]
+    sections = SECTIONS[:]
+    rng.shuffle(sections)
+    skills = rng.sample(parser.SKILLS_DB, rng.randint(3, 15))
+    for section in sections:
+        lines.append(section.upper() if rng.random() < 0.5 else section.title())
+        if section == "skills":
+            lines.append(", ".join(skills))
+        elif section == "education":
+            lines.extend(f"{rng.choice(DEGREES)}, {rng.randint(2005, 2023)}" for _ in range(rng.randint(1, 3)))
+        else:
+            for _ in range(rng.randint(1, paragraphs)):
+                lines.append(f"{rng.choice(COMPANIES)} ({rng.randint(2010, 2024)})")
+                lines.append(" ".join(rng.choice(FILLER) for _ in range(rng.randint(8, 30))))
+        lines.append("")
+    return lines
+
+
+def _pdf_escape(line: str) -> str:
+    line = line.encode("latin-1", "replace").decode("latin-1")
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(lines: List[str], lines_per_page: int = 50) -> bytes:
+    # Minimal single-font PDF writer; enough for pdfplumber to recover the lines
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_lines in pages:
+        body = "BT /F1 10 Tf 14 TL 50 780 Td " + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in page_lines) + " ET"
+        objects.append(f"<< /Length {len(body.encode('latin-1'))} >>\nstream\n{body}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def _zip_entry(name: str) -> zipfile.ZipInfo:
+    # A fixed timestamp, so the same seed always produces the same bytes
+    info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def write_docx(lines: List[str]) -> bytes:
+    from xml.sax.saxutils import escape
+    namespace = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    body = "".join(f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>' for line in lines)
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr(_zip_entry("[Content_Types].xml"), (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>'
+        ))
+        docx.writestr(_zip_entry("word/document.xml"), (
+            f'<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="{namespace}">'
+            f"<w:body>{body}</w:body></w:document>"
+        ))
+    return out.getvalue()
+
+
+def generate_corpus(count: int, seed: int) -> List[Tuple[str, bytes]]:
+    # Alternates formats; lengths range from one-page CVs to multi-page ones
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        lines = synthetic_resume(rng, paragraphs=rng.choice([1, 2, 4, 8, 16]))
+        if i % 2 == 0:
+            corpus.append((f"resume_{i:05d}.pdf", write_pdf(lines)))
+        else:
+            corpus.append((f"resume_{i:05d}.docx", write_docx(lines)))
+    return corpus
+
+
+# ------------ Timing ------------
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "total_s": sum(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": metrics.percentile(ordered, 50) * 1000,
+        "p95_ms": metrics.percentile(ordered, 95) * 1000,
+        "min_ms": ordered[0] * 1000,
+    }
+
+
+def time_calls(fn: Callable, args_list, repeat: int = 1) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        for args in args_list:
+            started = time.perf_counter()
+            fn(*args)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_extraction(corpus: List[Tuple[str, bytes]], repeat: int) -> Dict[str, Dict]:
+    pdfs = [(io.BytesIO(data),) for name, data in corpus if name.endswith(".pdf")]
+    docxs = [(io.BytesIO(data),) for name, data in corpus if name.endswith(".docx")]
+    texts = [parser.extract_text(io.BytesIO(data), name) for name, data in corpus]
+
+    def rewound(fn):
+        def call(file):
+            file.seek(0)
+            return fn(file)
+        return call
+
+    stages = {
+        "extract_text_from_pdf": (rewound(parser.extract_text_from_pdf), pdfs),
+        "extract_text_from_docx": (rewound(parser.extract_text_from_docx), docxs),
+        "segment": (parser.ResumeDocument, [(text,) for text in texts]),
+        "extract_name": (parser.extract_name, [(text,) for text in texts]),
+        "extract_email": (parser.extract_email, [(text,) for text in texts]),
+        "extract_phone": (parser.extract_phone, [(text,) for text in texts]),
+        "extract_skills": (parser.extract_skills, [(text,) for text in texts]),
+        "extract_section[education]": (parser.extract_section, [(text, "education") for text in texts]),
+        "extract_section[experience]": (parser.extract_section, [(text, "experience") for text in texts]),
+        "extract_links": (parser.extract_links, [(text,) for text in texts]),
+        "extract_fields": (parser.extract_fields, [(text,) for text in texts]),
+    }
+    results = {}
+    for stage, (fn, args_list) in stages.items():
+        if args_list:
+            results[stage] = summarize(time_calls(fn, args_list, repeat))
+    results["corpus"] = {
+        "documents": len(corpus),
+        "bytes": sum(len(data) for _, data in corpus),
+        "text_chars": sum(len(text) for text in texts),
+    }
+    return results
+
+
+def bench_db(sizes: List[int], seed: int) -> Dict[str, Dict]:
+    rng = random.Random(seed)
+    sample = parser.extract_fields("\n".join(synthetic_resume(rng, paragraphs=4)))
+    results = {}
+    original_db = db.DB_NAME
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_NAME = os.path.join(tmp, "bench.db")
+            try:
+                db.initialize_database()
+                started = time.perf_counter()
+                db.save_parsed_batch((1, sample) for _ in range(size))
+                seeded = time.perf_counter() - started
+                results[f"{size}_rows"] = {
+                    "save_parsed_batch": {"rows": size, "total_s": seeded, "rows_per_s": size / seeded},
+                    "save_parsed_data": summarize(time_calls(db.save_parsed_data, [(1, sample)] * 50)),
+                    "get_user_history": summarize(time_calls(db.get_user_history, [(1,)], repeat=3)),
+                    "get_user_history_page": summarize(time_calls(db.get_user_history_page, [(1, 20)], repeat=50)),
+                }
+            finally:
+                db.close_connections()
+                db.DB_NAME = original_db
+    return results
+
+
+def environment() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Benchmark the resume parsing pipeline.")
+    arg_parser.add_argument("--docs", type=int, default=100, help="synthetic documents to generate")
+    arg_parser.add_argument("--seed", type=int, default=42)
+    arg_parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus per stage")
+    arg_parser.add_argument("--db-sizes", default="1000,100000", help="comma-separated parsed_data row counts")
+    arg_parser.add_argument("--skip-extraction", action="store_true")
+    arg_parser.add_argument("--skip-db", action="store_true")
+    arg_parser.add_argument("--write-corpus", metavar="DIR", help="also save the generated files here")
+    arg_parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = arg_parser.parse_args(argv)
+
+    report = {"environment": environment(), "config": vars(args)}
+    if not args.skip_extraction:
+        corpus = generate_corpus(args.docs, args.seed)
+        if args.write_corpus:
+            os.makedirs(args.write_corpus, exist_ok=True)
+            for name, data in corpus:
+                with open(os.path.join(args.write_corpus, name), "wb") as f:
+                    f.write(data)
+        report["extraction"] = bench_extraction(corpus, args.repeat)
+    if not args.skip_db:
+        sizes = [int(size) for size in args.db_sizes.split(",") if size.strip()]
+        report["db"] = bench_db(sizes, args.seed)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
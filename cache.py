@@ -0,0 +1,216 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import metrics
+from parser import PARSER_VERSION, ExtractionLimits, extract_fields, extract_text, extraction_version
+
+CACHE_DB_NAME = 'parse_cache.db'
+
+# Defaults keep the cache well under typical disk quotas; tune per deployment
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# How long a write waits for another process's lock on the cache file
+BUSY_TIMEOUT_MS = 5000
+
+
+def cache_key(data: bytes, version: str = PARSER_VERSION) -> str:
+    """SHA-256 of the uploaded bytes, salted with the parser version."""
+    digest = hashlib.sha256(data)
+    digest.update(b"\0" + version.encode())
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    Persistent content-addressed cache of (extracted text, fields) results.
+    Entries are evicted least-recently-used first once either the entry or
+    the byte budget is exceeded. A failed write only costs the cache entry,
+    never the parse.
+    """
+
+    def __init__(self, path=CACHE_DB_NAME, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(parse_cache)")]
+            if columns and columns[:3] != ["key", "size", "last_used"]:
+                # Older layout with size stored after the text; it is only a cache, so start over
+                conn.execute("DROP TABLE parse_cache")
+            # size and last_used come before the text, so eviction never reads the text's pages
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                key TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                text TEXT NOT NULL,
+                fields TEXT NOT NULL
+            )
+            ''')
+            conn.execute("DROP INDEX IF EXISTS idx_parse_cache_last_used")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_parse_cache_lru ON parse_cache(last_used, size)")
+            # Running entry and byte totals, kept in step by put() and _evict()
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS parse_cache_totals (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                entries INTEGER NOT NULL,
+                bytes INTEGER NOT NULL
+            )
+            ''')
+            conn.execute(
+                "INSERT OR IGNORE INTO parse_cache_totals (id, entries, bytes) "
+                "SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM parse_cache"
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, reopened in a forked child
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        conn = self._connection()
+        row = conn.execute("SELECT text, fields FROM parse_cache WHERE key=?", (key,)).fetchone()
+        if row:
+            try:
+                conn.execute("UPDATE parse_cache SET last_used=? WHERE key=?", (time.time(), key))
+            except sqlite3.Error:
+                # Only the entry's place in the eviction order is lost
+                metrics.inc("parse_cache_errors_total", help="Parse cache writes that failed.", op="touch")
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.inc("parse_cache_lookups_total", help="Parse cache lookups by result.", result="hit" if row else "miss")
+        return (row[0], json.loads(row[1])) if row else None
+
+    def put(self, key: str, text: str, fields: Dict[str, str]) -> bool:
+        """Store a result; returns False, leaving the cache as it was, if the write failed."""
+        fields_json = json.dumps(fields)
+        size = len(text.encode()) + len(fields_json.encode())
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = conn.execute("SELECT size FROM parse_cache WHERE key=?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO parse_cache (key, size, last_used, text, fields) VALUES (?, ?, ?, ?, ?)",
+                    (key, size, time.time(), text, fields_json),
+                )
+                conn.execute(
+                    "UPDATE parse_cache_totals SET entries = entries + ?, bytes = bytes + ? WHERE id = 0",
+                    (0 if old else 1, size - (old[0] if old else 0)),
+                )
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.rollback()
+                raise
+        except sqlite3.Error:
+            metrics.inc("parse_cache_errors_total", help="Parse cache writes that failed.", op="put")
+            return False
+        return True
+
+    def _evict(self, conn) -> None:
+        count, total = conn.execute("SELECT entries, bytes FROM parse_cache_totals WHERE id = 0").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk from the oldest entry, dropping rows until both budgets fit
+        doomed, freed = [], 0
+        for rowid, size in conn.execute("SELECT rowid, size FROM parse_cache ORDER BY last_used"):
+            if count - len(doomed) <= self.max_entries and total - freed <= self.max_bytes:
+                break
+            doomed.append((rowid,))
+            freed += size
+        conn.executemany("DELETE FROM parse_cache WHERE rowid=?", doomed)
+        conn.execute(
+            "UPDATE parse_cache_totals SET entries = entries - ?, bytes = bytes - ? WHERE id = 0",
+            (len(doomed), freed),
+        )
+
+    def clear(self) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM parse_cache")
+            conn.execute("UPDATE parse_cache_totals SET entries = 0, bytes = 0 WHERE id = 0")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def add_stats(self, hits: int, misses: int) -> None:
+        """Count lookups made by another process's cache on the same file (see jobs.py)."""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+_parse_cache = None
+_parse_cache_lock = threading.Lock()
+
+def get_parse_cache() -> ParseCache:
+    # Shared instance, so hit/miss counters cover every caller in the process
+    global _parse_cache
+    with _parse_cache_lock:
+        if _parse_cache is None:
+            _parse_cache = ParseCache()
+    return _parse_cache
+
+
+def cached_parse(data: bytes, filename: str, cache: ParseCache = None,
+                 limits: ExtractionLimits = None) -> Tuple[str, Dict[str, str]]:
+    """
+    Return (text, fields) for an uploaded file. On a cache hit neither the
+    PDF/DOCX decoding nor the field extraction runs. `limits` is passed on to
+    extract_text; failures are not cached.
+    """
+    cache = cache or get_parse_cache()
+    key = cache_key(data, extraction_version())
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    text = extract_text(io.BytesIO(data), filename, limits)
+    fields = extract_fields(text)
+    cache.put(key, text, fields)
+    return text, fields
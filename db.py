@@ -1,121 +1,847 @@
+import json
+import os
+import queue
 import sqlite3
-from datetime import datetime
+import sys
+import threading
+import time
+import zlib
+from array import array
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import islice
+
+import metrics
 
 DB_NAME = 'resume_parser.db'
 
-def initialize_database():
-    """Create tables if they don't exist."""
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
+# How long a writer waits for a competing write lock before "database is locked"
+BUSY_TIMEOUT_MS = 5000
+# Prepared statements kept per connection by the sqlite3 module
+STATEMENT_CACHE_SIZE = 256
 
-    # Users table
-    c.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        email TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL
-    )
-    ''')
+# ------------ Connection Management ------------
+
+_local = threading.local()
+
+def get_connection():
+    """
+    Return this thread's connection to DB_NAME, opening it on first use.
+    Connections are reused across calls, run in WAL mode and stay in
+    autocommit; use transaction() for writes.
+    """
+    connections = getattr(_local, "connections", None)
+    # A forked child must not reuse its parent's connections
+    if connections is None or _local.pid != os.getpid():
+        connections = _local.connections = {}
+        _local.skill_maps = {}
+        _local.pid = os.getpid()
+    conn = connections.get(DB_NAME)
+    if conn is None:
+        _local.skill_maps.pop(DB_NAME, None)
+        conn = sqlite3.connect(
+            DB_NAME,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        connections[DB_NAME] = conn
+    return conn
+
+def close_connections():
+    """Close the calling thread's cached connections."""
+    connections = getattr(_local, "connections", {})
+    while connections:
+        connections.popitem()[1].close()
+
+@contextmanager
+def transaction():
+    """
+    Run the block in a write transaction on this thread's connection,
+    committing on success and rolling back on error. The write lock is taken
+    up front so concurrent writers queue on the busy timeout instead of
+    failing mid-transaction. Nested use joins the outer transaction. With
+    metrics on, the time spent waiting for the lock is recorded as db.lock_wait.
+    """
+    conn = get_connection()
+    if conn.in_transaction:
+        yield conn
+        return
+    if metrics.ENABLED:
+        started = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            metrics.inc("db_lock_timeouts_total", help="Write transactions that gave up waiting for the lock.")
+            raise
+        finally:
+            metrics.observe("db.lock_wait", time.perf_counter() - started)
+    else:
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        # Skill ids assigned in this transaction are gone again
+        _local.skill_maps.pop(DB_NAME, None)
+        raise
+    conn.commit()
+
+# ------------ Schema ------------
+
+# Stored in PRAGMA user_version:
+#   1  the search tables are populated
+#   2  compact rows (see "Storage format" below)
+SEARCH_INDEX_VERSION = 1
+STORAGE_VERSION = 2
 
-    # Parsed resume data table with timestamp
+def _create_resume_skills(c):
+    # One row per (skill, resume), for boolean skill queries
     c.execute('''
-    CREATE TABLE IF NOT EXISTS parsed_data (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        name TEXT,
-        email TEXT,
-        phone TEXT,
-        skills TEXT,
-        education TEXT,
-        experience TEXT,
-        linkedin_url TEXT,
-        github_url TEXT,
-        parsed_on TEXT NOT NULL,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
+    CREATE TABLE IF NOT EXISTS resume_skills (
+        skill_id INTEGER NOT NULL,
+        resume_id INTEGER NOT NULL,
+        PRIMARY KEY (skill_id, resume_id)
+    ) WITHOUT ROWID
     ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_resume_skills_resume ON resume_skills (resume_id)")
 
-    conn.commit()
-    conn.close()
+def initialize_database(convert=True):
+    """
+    Create tables if they don't exist and bring an older database up to date.
+    With convert=False, only missing tables and columns are added; rows keep
+    their old format and user_version is left as it was (migrate.py times
+    reads before converting).
+    """
+    if get_connection().execute("PRAGMA user_version").fetchone()[0] >= STORAGE_VERSION:
+        # Already current: skip the write lock
+        return
+    with transaction() as conn:
+        c = conn.cursor()
+        fresh = c.execute("SELECT 1 FROM sqlite_master WHERE name='parsed_data'").fetchone() is None
+
+        # Users table
+        c.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+        ''')
+
+        # Parsed resume data table with timestamp
+        c.execute('''
+        CREATE TABLE IF NOT EXISTS parsed_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT,
+            email TEXT,
+            phone TEXT,
+            skills TEXT,
+            education TEXT,
+            experience TEXT,
+            linkedin_url TEXT,
+            github_url TEXT,
+            parsed_on TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        ''')
+
+        # Serves per-user history in newest-first order without a sort or table scan
+        c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_parsed_data_user_time
+        ON parsed_data (user_id, parsed_on DESC, id DESC)
+        ''')
+
+        # Full-text index over the searchable fields; rowid = parsed_data.id
+        c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS parsed_data_fts USING fts5 (
+            name, skills, education, experience
+        )
+        ''')
+
+        # Skill names, referenced by id from parsed_data.skills and resume_skills
+        c.execute('''
+        CREATE TABLE IF NOT EXISTS skills (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL
+        )
+        ''')
+        _create_resume_skills(c)
+
+        # Columns added after parsed_data was first released:
+        #   duplicate_of        near-duplicate link (see dedup.py)
+        #   raw_text            extracted text, so fields can be re-derived (see reprocess.py)
+        #   extractor_versions  JSON {extractor: version} the fields were produced with
+        existing = [row[1] for row in c.execute("PRAGMA table_info(parsed_data)")]
+        for column, column_type in (("duplicate_of", "INTEGER"), ("raw_text", "TEXT"), ("extractor_versions", "TEXT")):
+            if column not in existing:
+                c.execute(f"ALTER TABLE parsed_data ADD COLUMN {column} {column_type}")
+
+        # Revision counters for derived data cached outside the database (see ranking.py)
+        c.execute('''
+        CREATE TABLE IF NOT EXISTS index_revisions (
+            name TEXT PRIMARY KEY,
+            revision INTEGER NOT NULL
+        )
+        ''')
+
+        # Near-duplicate detection (see dedup.py): MinHash signatures and their LSH band buckets
+        c.execute('''
+        CREATE TABLE IF NOT EXISTS resume_minhash (
+            resume_id INTEGER PRIMARY KEY,
+            signature BLOB NOT NULL
+        )
+        ''')
+        c.execute('''
+        CREATE TABLE IF NOT EXISTS lsh_buckets (
+            user_id INTEGER NOT NULL,
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            resume_id INTEGER NOT NULL,
+            PRIMARY KEY (user_id, band, bucket, resume_id)
+        ) WITHOUT ROWID
+        ''')
+
+        # Older databases are converted once: rows to the compact format (migrate.py
+        # does the same with a size report), then a search index backfill if they predate it
+        version = c.execute("PRAGMA user_version").fetchone()[0]
+        if not fresh and version < STORAGE_VERSION:
+            if not convert:
+                return
+            _migrate_to_compact(conn)
+            if version < SEARCH_INDEX_VERSION:
+                rebuild_search_index()
+        if version < STORAGE_VERSION:
+            c.execute(f"PRAGMA user_version = {STORAGE_VERSION}")
+
+# ------------ Storage format ------------
+#
+# Since STORAGE_VERSION 2, parsed_data rows are stored compactly:
+#   - a missing field ("N/A" from the extractors) is NULL; reads turn it back into "N/A"
+#   - skills is a BLOB of ids into the skills table, in the resume's order: one byte
+#     giving the id width (1, 2 or 4), then the ids as little-endian integers
+#   - education, experience and raw_text of COMPRESS_MIN_BYTES or more are zlib-compressed BLOBs
+# The full-text index is still fed the plain text.
+
+MISSING = "N/A"
+COMPRESSED_FIELDS = ("education", "experience", "raw_text")
+# Shorter text is stored as is: it saves little and every history read would pay to inflate it
+COMPRESS_MIN_BYTES = 512
 
+def _pack_text(value):
+    data = value.encode("utf-8")
+    if len(data) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(data, 6)
+        if len(packed) < len(data):
+            return packed
+    return value
+
+def _unpack_text(value):
+    return zlib.decompress(value).decode("utf-8") if isinstance(value, bytes) else value
+
+_ID_TYPECODES = {1: "B", 2: "H", 4: "I"}
+
+def _pack_ids(ids):
+    largest = max(ids)
+    width = 1 if largest < 1 << 8 else 2 if largest < 1 << 16 else 4
+    packed = array(_ID_TYPECODES[width], ids)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return bytes([width]) + packed.tobytes()
+
+def _unpack_ids(data):
+    ids = array(_ID_TYPECODES[data[0]], data[1:])
+    if sys.byteorder == "big":
+        ids.byteswap()
+    return ids
+
+def _skill_list(skills):
+    # Names in the order given, lowercased and without repeats
+    return list(dict.fromkeys(skill.strip().lower() for skill in skills.split(",") if skill.strip()))
+
+def _skill_maps(conn, reload=False):
+    # (name -> id, id -> name) for DB_NAME, cached per thread; ids never change once committed
+    maps = _local.skill_maps.get(DB_NAME)
+    if maps is None or reload:
+        ids = dict(conn.execute("SELECT name, id FROM skills"))
+        maps = _local.skill_maps[DB_NAME] = (ids, {skill_id: name for name, skill_id in ids.items()})
+    return maps
+
+def _skill_ids(conn, names):
+    """Ids of the given skill names, adding names not seen before."""
+    ids, by_id = _skill_maps(conn)
+    new = [name for name in dict.fromkeys(names) if name not in ids]
+    if new:
+        conn.executemany("INSERT OR IGNORE INTO skills (name) VALUES (?)", [(name,) for name in new])
+        placeholders = ", ".join("?" for _ in new)
+        for name, skill_id in conn.execute(f"SELECT name, id FROM skills WHERE name IN ({placeholders})", new):
+            ids[name] = skill_id
+            by_id[skill_id] = name
+    return [ids[name] for name in names]
+
+def _skill_names(data):
+    if isinstance(data, str):
+        # Text in rows not converted yet (migrate.py times queries before converting)
+        return data
+    by_id = _skill_maps(get_connection())[1]
+    try:
+        return ", ".join([by_id[skill_id] for skill_id in _unpack_ids(data)])
+    except KeyError:
+        # Added through another connection since the map was loaded
+        by_id = _skill_maps(get_connection(), reload=True)[1]
+        return ", ".join([by_id[skill_id] for skill_id in _unpack_ids(data)])
+
+def _pack_field(conn, column, value):
+    """The stored form of a parsed field."""
+    if value is None or value == MISSING:
+        return None
+    if column == "skills":
+        names = _skill_list(value)
+        return _pack_ids(_skill_ids(conn, names)) if names else None
+    if column in COMPRESSED_FIELDS:
+        return _pack_text(value)
+    return value
+
+def _unpack_field(column, value, missing=MISSING):
+    """A parsed field as the extractors produced it; NULL comes back as `missing`."""
+    if value is None:
+        return missing
+    if column == "skills":
+        return _skill_names(value)
+    return _unpack_text(value)
+
+def _migrate_to_compact(conn):
+    """Rewrite every parsed_data row in the compact format and re-key resume_skills by skill id."""
+    conn.execute("DROP TABLE IF EXISTS resume_skills")
+    _create_resume_skills(conn)
+    columns = PARSED_FIELDS + ("raw_text",)
+    after_id = 0
+    while True:
+        rows = conn.execute(
+            f"SELECT id, {', '.join(columns)} FROM parsed_data WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, DEFAULT_BATCH_SIZE),
+        ).fetchall()
+        if not rows:
+            break
+        after_id = rows[-1][0]
+        updates, links = [], []
+        for row in rows:
+            fields = dict(zip(columns, row[1:]))
+            updates.append(tuple(_pack_field(conn, column, fields[column]) for column in columns) + (row[0],))
+            if fields["skills"] and fields["skills"] != MISSING:
+                links.extend(
+                    (skill_id, row[0]) for skill_id in _skill_ids(conn, _skill_list(fields["skills"]))
+                )
+        assignments = ", ".join(f"{column}=?" for column in columns)
+        conn.executemany(f"UPDATE parsed_data SET {assignments} WHERE id=?", updates)
+        conn.executemany("INSERT OR IGNORE INTO resume_skills (skill_id, resume_id) VALUES (?, ?)", links)
+    _bump_index_revision(conn, "skills")
+
+# ------------ Users ------------
+
+@metrics.instrument("db.add_user")
 def add_user(name, email, password):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
     try:
-        c.execute("INSERT INTO users (name, email, password) VALUES (?, ?, ?)", (name, email, password))
-        conn.commit()
+        with transaction() as conn:
+            conn.execute("INSERT INTO users (name, email, password) VALUES (?, ?, ?)", (name, email, password))
         return True, "User added successfully"
     except sqlite3.IntegrityError:
         return False, "User with this email already exists"
-    finally:
-        conn.close()
 
+@metrics.instrument("db.update_user_password")
+def update_user_password(user_id, password):
+    with transaction() as conn:
+        conn.execute("UPDATE users SET password=? WHERE id=?", (password, user_id))
+
+@metrics.instrument("db.get_user_by_email")
 def get_user_by_email(email):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT * FROM users WHERE email=?", (email,))
-    user = c.fetchone()
-    conn.close()
-    return user
-
-def save_parsed_data(user_id, data):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
+    return get_connection().execute("SELECT * FROM users WHERE email=?", (email,)).fetchone()
+
+# ------------ Parsed Resumes ------------
+
+def _parsed_row(conn, user_id, data, parsed_on, duplicate_of=None, raw_text=None, versions=None):
+    return (
+        (user_id,)
+        + tuple(_pack_field(conn, column, data.get(column)) for column in PARSED_FIELDS)
+        + (
+            parsed_on,
+            duplicate_of,
+            _pack_text(raw_text) if raw_text else None,
+            json.dumps(versions, sort_keys=True) if versions else None,
+        )
+    )
+
+INSERT_PARSED_SQL = '''
+    INSERT INTO parsed_data (
+        user_id, name, email, phone, skills, education, experience, linkedin_url, github_url, parsed_on,
+        duplicate_of, raw_text, extractor_versions
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+@metrics.instrument("db.save_parsed_data")
+def save_parsed_data(user_id, data, duplicate_of=None, raw_text=None, versions=None):
+    """
+    Insert one parsed resume and return its row id. `duplicate_of` links it
+    to an earlier near-identical record (see dedup.save_with_dedup).
+    `raw_text` and `versions` (parser.extractor_versions() at extraction
+    time) let reprocess.py refresh the fields later without the file.
+    """
     parsed_on = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    c.execute('''
-        INSERT INTO parsed_data (
-            user_id, name, email, phone, skills, education, experience, linkedin_url, github_url, parsed_on
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        user_id,
-        data.get('name', 'N/A'),
-        data.get('email', 'N/A'),
-        data.get('phone', 'N/A'),
-        data.get('skills', 'N/A'),
-        data.get('education', 'N/A'),
-        data.get('experience', 'N/A'),
-        data.get('linkedin_url', 'N/A'),
-        data.get('github_url', 'N/A'),
-        parsed_on
-    ))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        resume_id = conn.execute(
+            INSERT_PARSED_SQL, _parsed_row(conn, user_id, data, parsed_on, duplicate_of, raw_text, versions)
+        ).lastrowid
+        _index_resumes(conn, [(resume_id, data)])
+        return resume_id
+
+# Rows per transaction for bulk writes
+DEFAULT_BATCH_SIZE = 500
+
+@metrics.instrument("db.save_parsed_batch")
+def save_parsed_batch(records, chunk_size=DEFAULT_BATCH_SIZE):
+    """
+    Insert many (user_id, data[, raw_text[, versions]]) records with
+    executemany, one transaction per chunk of `chunk_size` rows. `records`
+    may be any iterable, including a generator; it is consumed one chunk at
+    a time. Returns the number of rows written.
+    """
+    parsed_on = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    records = iter(records)
+    written = 0
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return written
+        with transaction() as conn:
+            conn.executemany(INSERT_PARSED_SQL, [
+                _parsed_row(conn, record[0], record[1], parsed_on, None, *record[2:]) for record in chunk
+            ])
+            # The write lock is held and ids are AUTOINCREMENT, so the chunk got consecutive ids
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            first_id = last_id - len(chunk) + 1
+            _index_resumes(conn, [(first_id + i, record[1]) for i, record in enumerate(chunk)])
+        written += len(chunk)
 
+class BatchWriter:
+    """
+    Write-behind buffer for parsed results. add() queues a row and returns
+    at once; a background thread drains the queue and writes it through
+    save_parsed_batch, committing whenever `chunk_size` rows are waiting or
+    the oldest of them has waited `flush_interval` seconds. add() blocks once
+    `max_pending` rows are queued, so a fast producer can't outrun the disk
+    unboundedly.
+
+    Each add() returns a Future that completes when the row is committed, or
+    carries the error if its batch failed. flush() and close() re-raise the
+    first error of any batch that failed since the last time they did.
+
+        with BatchWriter() as writer:
+            for fields in results:
+                writer.add(user_id, fields)
+    """
+
+    def __init__(self, chunk_size=DEFAULT_BATCH_SIZE, flush_interval=1.0, max_pending=10000):
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.errors = []
+        self._reported = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="parsed-data-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, user_id, data, raw_text=None, versions=None):
+        if self._closed:
+            raise RuntimeError("BatchWriter is closed")
+        future = Future()
+        self._queue.put((future, (user_id, data, raw_text, versions)))
+        return future
+
+    def flush(self):
+        """Block until every row added so far has been committed or failed."""
+        self._queue.join()
+        self._raise_errors()
+
+    def close(self):
+        self._stop()
+        self._raise_errors()
+
+    def _stop(self):
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def _raise_errors(self):
+        if len(self.errors) > self._reported:
+            error = self.errors[self._reported]
+            self._reported = len(self.errors)
+            raise error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        # Don't mask an exception already on its way out of the block
+        if exc_type is None:
+            self.close()
+        else:
+            self._stop()
+
+    def _run(self):
+        pending = []
+        deadline = None
+        stop = False
+        while not stop:
+            try:
+                # The timer starts with the oldest pending row, not the latest
+                timeout = max(0.0, deadline - time.monotonic()) if pending else None
+                item = self._queue.get(timeout=timeout)
+                if item is None:
+                    stop = True
+                else:
+                    if not pending:
+                        deadline = time.monotonic() + self.flush_interval
+                    pending.append(item)
+                    if len(pending) < self.chunk_size and time.monotonic() < deadline:
+                        continue
+            except queue.Empty:
+                pass
+            if pending:
+                self._write(pending)
+                pending = []
+            if stop:
+                self._queue.task_done()
+                close_connections()
+
+    def _write(self, pending):
+        try:
+            self.written += save_parsed_batch([record for _, record in pending], self.chunk_size)
+        except Exception as e:
+            self.errors.append(e)
+            for future, _ in pending:
+                future.set_exception(e)
+        else:
+            for future, _ in pending:
+                future.set_result(None)
+        for _ in pending:
+            self._queue.task_done()
+
+HISTORY_COLUMNS = "id, name, email, phone, skills, education, experience, linkedin_url, github_url, parsed_on, duplicate_of"
+
+def _history_record(row):
+    # _unpack_field, unrolled: this runs for every row of every history read
+    return {
+        "id": row[0],
+        "name": MISSING if row[1] is None else row[1],
+        "email": MISSING if row[2] is None else row[2],
+        "phone": MISSING if row[3] is None else row[3],
+        "skills": MISSING if row[4] is None else _skill_names(row[4]),
+        "education": MISSING if row[5] is None else _unpack_text(row[5]),
+        "experience": MISSING if row[6] is None else _unpack_text(row[6]),
+        "linkedin_url": MISSING if row[7] is None else row[7],
+        "github_url": MISSING if row[8] is None else row[8],
+        "parsed_on": row[9],
+        "duplicate_of": row[10]
+    }
+
+@metrics.instrument("db.get_user_history")
 def get_user_history(user_id):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute('''
-        SELECT name, email, phone, skills, education, experience, linkedin_url, github_url, parsed_on
+    rows = get_connection().execute(f'''
+        SELECT {HISTORY_COLUMNS}
         FROM parsed_data
         WHERE user_id=?
-        ORDER BY parsed_on DESC
-    ''', (user_id,))
-    rows = c.fetchall()
-    conn.close()
-
-    history = []
-    for row in rows:
-        history.append({
-            "name": row[0],
-            "email": row[1],
-            "phone": row[2],
-            "skills": row[3],
-            "education": row[4],
-            "experience": row[5],
-            "linkedin_url": row[6],
-            "github_url": row[7],
-            "parsed_on": row[8]
-        })
-
-    return history
+        ORDER BY parsed_on DESC, id DESC
+    ''', (user_id,)).fetchall()
+    return [_history_record(row) for row in rows]
+
+@metrics.instrument("db.get_user_history_page")
+def get_user_history_page(user_id, limit=20, cursor=None):
+    """
+    One page of a user's history, newest first, using keyset pagination.
+    Pass the returned cursor back in to get the next page; it is None once
+    there are no more rows. Each page is a bounded index range scan, however
+    deep into the history it is.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    if cursor is None:
+        rows = get_connection().execute(f'''
+            SELECT {HISTORY_COLUMNS}
+            FROM parsed_data
+            WHERE user_id=?
+            ORDER BY parsed_on DESC, id DESC
+            LIMIT ?
+        ''', (user_id, limit + 1)).fetchall()
+    else:
+        parsed_on, last_id = cursor
+        rows = get_connection().execute(f'''
+            SELECT {HISTORY_COLUMNS}
+            FROM parsed_data
+            WHERE user_id=? AND (parsed_on, id) < (?, ?)
+            ORDER BY parsed_on DESC, id DESC
+            LIMIT ?
+        ''', (user_id, parsed_on, last_id, limit + 1)).fetchall()
+
+    page = [_history_record(row) for row in rows[:limit]]
+    next_cursor = (page[-1]["parsed_on"], page[-1]["id"]) if len(rows) > limit else None
+    return page, next_cursor
 
+@metrics.instrument("db.count_user_history")
+def count_user_history(user_id):
+    return get_connection().execute(
+        "SELECT COUNT(*) FROM parsed_data WHERE user_id=?", (user_id,)
+    ).fetchone()[0]
+
+@metrics.instrument("db.clear_user_history")
 def clear_user_history(user_id):
     """
     Delete all parsed resume records for a user.
     """
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("DELETE FROM parsed_data WHERE user_id=?", (user_id,))
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    with transaction() as conn:
+        conn.execute("DELETE FROM parsed_data_fts WHERE rowid IN (SELECT id FROM parsed_data WHERE user_id=?)", (user_id,))
+        conn.execute("DELETE FROM resume_skills WHERE resume_id IN (SELECT id FROM parsed_data WHERE user_id=?)", (user_id,))
+        conn.execute("DELETE FROM resume_minhash WHERE resume_id IN (SELECT id FROM parsed_data WHERE user_id=?)", (user_id,))
+        conn.execute("DELETE FROM lsh_buckets WHERE user_id=?", (user_id,))
+        conn.execute("DELETE FROM parsed_data WHERE user_id=?", (user_id,))
+
+# ------------ Search ------------
+
+def _index_resumes(conn, resumes):
+    """Add (resume_id, data) pairs to the full-text and skill indexes."""
+    conn.executemany(
+        "INSERT INTO parsed_data_fts (rowid, name, skills, education, experience) VALUES (?, ?, ?, ?, ?)",
+        [
+            (resume_id, data.get('name', 'N/A'), data.get('skills', 'N/A'),
+             data.get('education', 'N/A'), data.get('experience', 'N/A'))
+            for resume_id, data in resumes
+        ],
+    )
+    links = []
+    for resume_id, data in resumes:
+        skills = data.get('skills')
+        if skills and skills != MISSING:
+            links.extend((skill_id, resume_id) for skill_id in _skill_ids(conn, _skill_list(skills)))
+    conn.executemany("INSERT OR IGNORE INTO resume_skills (skill_id, resume_id) VALUES (?, ?)", links)
+
+def rebuild_search_index():
+    """Repopulate the full-text and skill indexes from parsed_data."""
+    with transaction() as conn:
+        conn.execute("DELETE FROM parsed_data_fts")
+        conn.execute("DELETE FROM resume_skills")
+        cursor = conn.execute("SELECT id, name, skills, education, experience FROM parsed_data")
+        while True:
+            rows = cursor.fetchmany(DEFAULT_BATCH_SIZE)
+            if not rows:
+                break
+            _index_resumes(conn, [(row[0], _search_fields(row[1:])) for row in rows])
+
+def _search_fields(row):
+    # Stored (name, skills, education, experience) -> the plain fields the search index takes
+    return {
+        column: _unpack_field(column, value) for column, value in zip(("name", "skills", "education", "experience"), row)
+    }
+
+def _fts_query(text):
+    # Quote every term so user input can't trip FTS5 query syntax; terms are ANDed
+    return " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
+
+@metrics.instrument("db.search_resumes")
+def search_resumes(user_id=None, skills=(), match_all=True, text=None, since_days=None, limit=50):
+    """
+    Find parsed resumes by skills and/or free text.
+
+    skills      skill names; a resume must have all of them (match_all) or any
+    text        words to look for in name, skills, education and experience;
+                results are then ranked by relevance (bm25)
+    since_days  only resumes parsed in the last N days
+    user_id     restrict to one user's uploads (None searches everything)
+
+    Returns history records, best match (or newest) first.
+    """
+    skills = sorted({skill.strip().lower() for skill in skills if skill.strip()})
+    columns = ", ".join(f"p.{column.strip()}" for column in HISTORY_COLUMNS.split(","))
+    joins, where, params = [], [], []
+
+    if text and text.strip():
+        joins.append("JOIN parsed_data_fts f ON f.rowid = p.id")
+        where.append("parsed_data_fts MATCH ?")
+        params.append(_fts_query(text))
+        order = "bm25(parsed_data_fts), p.id DESC"
+    else:
+        order = "p.parsed_on DESC, p.id DESC"
+
+    if skills:
+        placeholders = ", ".join("?" for _ in skills)
+        having = f"HAVING COUNT(*) = {len(skills)}" if match_all else ""
+        where.append(
+            f"p.id IN (SELECT resume_id FROM resume_skills WHERE skill_id IN "
+            f"(SELECT id FROM skills WHERE name IN ({placeholders})) GROUP BY resume_id {having})"
+        )
+        params.extend(skills)
+    if user_id is not None:
+        where.append("p.user_id = ?")
+        params.append(user_id)
+    if since_days is not None:
+        where.append("p.parsed_on >= ?")
+        params.append((datetime.now() - timedelta(days=since_days)).strftime("%Y-%m-%d %H:%M:%S"))
+
+    sql = f"SELECT {columns} FROM parsed_data p {' '.join(joins)}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order} LIMIT ?"
+    params.append(limit)
+    return [_history_record(row) for row in get_connection().execute(sql, params)]
+
+@metrics.instrument("db.get_parsed_records")
+def get_parsed_records(ids):
+    """History records for the given parsed_data ids, in the order given; unknown ids are skipped."""
+    ids = list(ids)
+    if not ids:
+        return []
+    placeholders = ", ".join("?" for _ in ids)
+    rows = get_connection().execute(
+        f"SELECT {HISTORY_COLUMNS} FROM parsed_data WHERE id IN ({placeholders})", ids
+    ).fetchall()
+    by_id = {row[0]: _history_record(row) for row in rows}
+    return [by_id[resume_id] for resume_id in ids if resume_id in by_id]
+
+# ------------ Export ------------
+
+EXPORT_COLUMNS = ("id", "user_id", "name", "email", "phone", "skills", "education", "experience",
+                  "linkedin_url", "github_url", "parsed_on", "duplicate_of")
+
+def _parsed_on_bound(value):
+    # parsed_on is "%Y-%m-%d %H:%M:%S" text; a date compares as that day's midnight
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+def iter_parsed_data(user_id=None, since=None, until=None, chunk_size=DEFAULT_BATCH_SIZE):
+    """
+    Stream parsed_data as lists of up to chunk_size row tuples (EXPORT_COLUMNS
+    order), optionally for one user and a parsed_on range [since, until).
+    Rows are read from one cursor with fetchmany, so memory stays flat however
+    large the table is. The cursor runs on its own connection: a long export
+    sees a single snapshot and doesn't hold up this thread's writes.
+    """
+    where, params = [], []
+    if user_id is not None:
+        where.append("user_id = ?")
+        params.append(user_id)
+    if since is not None:
+        where.append("parsed_on >= ?")
+        params.append(_parsed_on_bound(since))
+    if until is not None:
+        where.append("parsed_on < ?")
+        params.append(_parsed_on_bound(until))
+    sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM parsed_data"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    # A user's rows come off idx_parsed_data_user_time; a full export walks the table in id order
+    sql += " ORDER BY parsed_on, id" if user_id is not None else " ORDER BY id"
+
+    # check_same_thread=False: callers such as the HTTP API resume the generator on any worker thread
+    conn = sqlite3.connect(DB_NAME, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    try:
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            # Missing fields are exported as NULL rather than "N/A"
+            yield [
+                tuple(
+                    _unpack_field(column, value, None) if column in PARSED_FIELDS else value
+                    for column, value in zip(EXPORT_COLUMNS, row)
+                )
+                for row in rows
+            ]
+    finally:
+        conn.close()
+
+# ------------ Reprocessing ------------
+
+# Columns an extractor may rewrite
+PARSED_FIELDS = ("name", "email", "phone", "skills", "education", "experience", "linkedin_url", "github_url")
+
+@metrics.instrument("db.get_stored_text_page")
+def get_stored_text_page(after_id=0, limit=DEFAULT_BATCH_SIZE, user_id=None):
+    """
+    Up to `limit` records with stored text and id > after_id, in id order, as
+    (id, raw_text, versions) with versions decoded ({} when unknown).
+    """
+    sql = "SELECT id, raw_text, extractor_versions FROM parsed_data WHERE id > ? AND raw_text IS NOT NULL"
+    params = [after_id]
+    if user_id is not None:
+        sql += " AND user_id = ?"
+        params.append(user_id)
+    sql += " ORDER BY id LIMIT ?"
+    params.append(limit)
+    return [
+        (row[0], _unpack_text(row[1]), json.loads(row[2]) if row[2] else {})
+        for row in get_connection().execute(sql, params)
+    ]
+
+@metrics.instrument("db.count_stored_text")
+def count_stored_text(user_id=None):
+    """(records with stored text, records without) — the latter can't be reprocessed."""
+    sql = "SELECT COUNT(raw_text), COUNT(*) - COUNT(raw_text) FROM parsed_data"
+    if user_id is not None:
+        return get_connection().execute(sql + " WHERE user_id=?", (user_id,)).fetchone()
+    return get_connection().execute(sql).fetchone()
+
+@metrics.instrument("db.update_parsed_fields")
+def update_parsed_fields(updates):
+    """
+    Overwrite re-extracted fields of existing records in one transaction.
+    `updates` holds (resume_id, fields, versions) with `fields` a subset of
+    PARSED_FIELDS. The search index is refreshed for the touched rows.
+    """
+    if not updates:
+        return
+    by_columns = {}
+    for resume_id, fields, versions in updates:
+        unknown = set(fields) - set(PARSED_FIELDS)
+        if unknown:
+            raise ValueError(f"Not a parsed_data field: {', '.join(sorted(unknown))}")
+        by_columns.setdefault(tuple(sorted(fields)), []).append((resume_id, fields, versions))
+
+    ids = [resume_id for resume_id, _, _ in updates]
+    placeholders = ", ".join("?" for _ in ids)
+    with transaction() as conn:
+        for columns, group in by_columns.items():
+            rows = [
+                tuple(_pack_field(conn, column, fields[column]) for column in columns)
+                + (json.dumps(versions, sort_keys=True), resume_id)
+                for resume_id, fields, versions in group
+            ]
+            assignments = ", ".join(f"{column}=?" for column in columns + ("extractor_versions",))
+            conn.executemany(f"UPDATE parsed_data SET {assignments} WHERE id=?", rows)
+        conn.execute(f"DELETE FROM parsed_data_fts WHERE rowid IN ({placeholders})", ids)
+        conn.execute(f"DELETE FROM resume_skills WHERE resume_id IN ({placeholders})", ids)
+        rows = conn.execute(
+            f"SELECT id, name, skills, education, experience FROM parsed_data WHERE id IN ({placeholders})", ids
+        ).fetchall()
+        _index_resumes(conn, [(row[0], _search_fields(row[1:])) for row in rows])
+        if any("skills" in columns for columns in by_columns):
+            _bump_index_revision(conn, "skills")
+
+def _bump_index_revision(conn, name):
+    conn.execute(
+        "INSERT INTO index_revisions (name, revision) VALUES (?, 1) "
+        "ON CONFLICT (name) DO UPDATE SET revision = revision + 1",
+        (name,),
+    )
+
+def get_index_revision(name):
+    """Counter bumped whenever rows indexed under `name` change in place."""
+    row = get_connection().execute("SELECT revision FROM index_revisions WHERE name=?", (name,)).fetchone()
+    return row[0] if row else 0
@@ -0,0 +1,123 @@
+"""
+Near-duplicate resume detection with MinHash signatures and an LSH index.
+
+Each resume's extracted text is reduced to a MinHash signature over word
+3-shingles. Signatures are split into bands and every band is hashed into a
+bucket stored in resume_parser.db, so finding candidates is a handful of
+indexed lookups no matter how many resumes are stored. Candidates are then
+confirmed by estimated Jaccard similarity against DEFAULT_THRESHOLD.
+
+Duplicates are only looked for among the same user's uploads.
+"""
+import hashlib
+import re
+import zlib
+from typing import Optional, Tuple
+
+import numpy as np
+
+import metrics
+from db import get_connection, save_parsed_data, transaction
+from parser import extractor_versions
+
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs above ~0.7 similarity almost always share a bucket
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.85
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: signatures are persisted, so the permutations must never change
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def minhash_signature(text: str) -> Optional[np.ndarray]:
+    """NUM_PERM-long uint32 MinHash of the text's word shingles, or None for empty text."""
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return None
+    if len(words) < SHINGLE_SIZE:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter((zlib.crc32(shingle.encode()) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+    # Universal hashing (a*x + b) mod p per permutation; uint64 wraparound is part of the hash family
+    with np.errstate(over="ignore"):
+        permuted = (np.outer(_A, hashes) + _B[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def _band_buckets(signature: np.ndarray):
+    data = signature.astype("<u4").tobytes()
+    width = ROWS * 4
+    for band in range(BANDS):
+        digest = hashlib.blake2b(data[band * width:(band + 1) * width], digest_size=8).digest()
+        yield band, int.from_bytes(digest, "little", signed=True)
+
+
+@metrics.instrument("dedup.find_duplicate")
+def find_duplicate(user_id: int, signature: np.ndarray,
+                   threshold: float = DEFAULT_THRESHOLD) -> Optional[Tuple[int, float]]:
+    """Most similar earlier resume of this user as (resume_id, similarity), if above threshold."""
+    conn = get_connection()
+    candidates = set()
+    for band, bucket in _band_buckets(signature):
+        candidates.update(row[0] for row in conn.execute(
+            "SELECT resume_id FROM lsh_buckets WHERE user_id=? AND band=? AND bucket=?", (user_id, band, bucket)
+        ))
+    best = None
+    for resume_id in candidates:
+        row = conn.execute("SELECT signature FROM resume_minhash WHERE resume_id=?", (resume_id,)).fetchone()
+        if row is None:
+            continue
+        score = similarity(signature, np.frombuffer(row[0], dtype="<u4"))
+        if score >= threshold and (best is None or score > best[1] or (score == best[1] and resume_id < best[0])):
+            best = (resume_id, score)
+    return best
+
+
+def index_resume(conn, resume_id: int, user_id: int, signature: np.ndarray) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO resume_minhash (resume_id, signature) VALUES (?, ?)",
+        (resume_id, signature.astype("<u4").tobytes()),
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO lsh_buckets (user_id, band, bucket, resume_id) VALUES (?, ?, ?, ?)",
+        [(user_id, band, bucket, resume_id) for band, bucket in _band_buckets(signature)],
+    )
+
+
+def save_with_dedup(user_id: int, fields, text: str, threshold: float = DEFAULT_THRESHOLD,
+                    skip_duplicates: bool = False, signature: np.ndarray = None, versions=None) -> dict:
+    """
+    Save a parsed resume, flagging it as a near-duplicate of an earlier one
+    when their texts are at least `threshold` similar. With skip_duplicates
+    the duplicate is not stored at all. The text is stored with the record,
+    stamped with `versions` (default: the current extractor versions).
+
+    Returns {"id", "duplicate_of", "similarity", "skipped"}.
+    """
+    if signature is None and text:
+        signature = minhash_signature(text)
+    # One transaction, so two near-identical uploads can't both miss each other
+    with transaction() as conn:
+        match = find_duplicate(user_id, signature, threshold) if signature is not None else None
+        duplicate_of, score = match if match else (None, None)
+        if match and skip_duplicates:
+            return {"id": None, "duplicate_of": duplicate_of, "similarity": score, "skipped": True}
+        resume_id = save_parsed_data(user_id, fields, duplicate_of=duplicate_of, raw_text=text,
+                                     versions=versions or extractor_versions())
+        if signature is not None:
+            index_resume(conn, resume_id, user_id, signature)
+    return {"id": resume_id, "duplicate_of": duplicate_of, "similarity": score, "skipped": False}
@@ -0,0 +1,215 @@
+"""
+Streaming export of parsed resumes to CSV, JSONL, Parquet or Arrow.
+
+    python export.py history.csv --user-id 1
+    python export.py all.parquet --since 2024-01-01 --until 2024-07-01
+    python export.py - --format jsonl --user-id 1 | gzip > history.jsonl.gz
+
+Rows are read from parsed_data in chunks (db.iter_parsed_data) and each
+chunk is encoded and written before the next is fetched, so memory use is
+bounded by --chunk-size whatever the size of the table. Parquet files get
+one row group per chunk; Arrow output is the IPC stream format. Both need
+pyarrow, which is imported only when one of them is requested.
+
+The same writers back the UI's export action and the API's GET /export.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from datetime import datetime
+from typing import IO, Iterable, Iterator, List
+
+from db import EXPORT_COLUMNS, initialize_database, iter_parsed_data
+
+FORMATS = ("csv", "jsonl", "parquet", "arrow")
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+# Rows fetched, encoded and written per step (and per Parquet row group)
+EXPORT_CHUNK_SIZE = 10000
+
+
+def format_for(path: str) -> str:
+    """Export format implied by a file name's extension (".ndjson" counts as jsonl, ".arrows" as arrow)."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    extension = {"ndjson": "jsonl", "arrows": "arrow", "pq": "parquet"}.get(extension, extension)
+    if extension not in FORMATS:
+        raise ValueError(f"Can't tell the export format from {path!r}; use one of {', '.join(FORMATS)}")
+    return extension
+
+
+# ------------ Writers ------------
+# Each writer encodes chunks of row tuples to the binary stream `out`,
+# yielding the running row count after every chunk it has written.
+
+def _write_csv(chunks: Iterable[List[tuple]], out: IO[bytes]) -> Iterator[int]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    rows = 0
+    for chunk in chunks:
+        writer.writerows(chunk)
+        out.write(buffer.getvalue().encode("utf-8"))
+        buffer.seek(0)
+        buffer.truncate()
+        rows += len(chunk)
+        yield rows
+    if not rows:
+        out.write(buffer.getvalue().encode("utf-8"))
+
+
+def _write_jsonl(chunks: Iterable[List[tuple]], out: IO[bytes]) -> Iterator[int]:
+    rows = 0
+    for chunk in chunks:
+        out.write("".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n" for row in chunk
+        ).encode("utf-8"))
+        rows += len(chunk)
+        yield rows
+
+
+def _arrow_schema():
+    import pyarrow as pa
+    types = {"id": pa.int64(), "user_id": pa.int64(), "duplicate_of": pa.int64(), "parsed_on": pa.timestamp("s")}
+    return pa.schema([(column, types.get(column, pa.string())) for column in EXPORT_COLUMNS])
+
+
+def _arrow_batch(schema, chunk: List[tuple]):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    columns = list(zip(*chunk))
+    arrays = []
+    for field, values in zip(schema, columns):
+        if field.name == "parsed_on":
+            arrays.append(pc.strptime(pa.array(values, pa.string()), format="%Y-%m-%d %H:%M:%S", unit="s"))
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _write_parquet(chunks: Iterable[List[tuple]], out: IO[bytes]) -> Iterator[int]:
+    import pyarrow.parquet as pq
+    schema = _arrow_schema()
+    rows = 0
+    with pq.ParquetWriter(out, schema, compression="zstd") as writer:
+        for chunk in chunks:
+            writer.write_batch(_arrow_batch(schema, chunk))
+            rows += len(chunk)
+            yield rows
+
+
+def _write_arrow(chunks: Iterable[List[tuple]], out: IO[bytes]) -> Iterator[int]:
+    import pyarrow as pa
+    schema = _arrow_schema()
+    rows = 0
+    with pa.ipc.new_stream(out, schema) as writer:
+        for chunk in chunks:
+            writer.write_batch(_arrow_batch(schema, chunk))
+            rows += len(chunk)
+            yield rows
+
+
+WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet, "arrow": _write_arrow}
+
+
+class _Spool:
+    """Write-only binary sink whose contents are handed out and cleared by drain()."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+# ------------ Entry points ------------
+
+def export(out: IO[bytes], fmt: str, user_id: int = None, since=None, until=None,
+           chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+    """Write the selected parsed_data rows to the binary stream `out` and return how many there were."""
+    if fmt not in WRITERS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    rows = 0
+    for rows in WRITERS[fmt](iter_parsed_data(user_id, since, until, chunk_size), out):
+        pass
+    return rows
+
+
+def iter_export(fmt: str, user_id: int = None, since=None, until=None,
+                chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """The export as a stream of byte blocks, one per chunk of rows, for streaming HTTP responses."""
+    if fmt not in WRITERS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    sink = _Spool()
+    for _ in WRITERS[fmt](iter_parsed_data(user_id, since, until, chunk_size), sink):
+        data = sink.drain()
+        if data:
+            yield data
+    # Headers or footers written when the writer finished
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def parse_bound(value: str):
+    """--since/--until value: an ISO date or datetime."""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO date: {value!r}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Export parsed resumes to CSV, JSONL, Parquet or Arrow.")
+    arg_parser.add_argument("output", help="output file, or - for stdout")
+    arg_parser.add_argument("--format", choices=FORMATS, help="default: from the output file's extension")
+    arg_parser.add_argument("--user-id", type=int, default=None, help="only this user's records")
+    arg_parser.add_argument("--since", type=parse_bound, help="parsed on or after this date/time")
+    arg_parser.add_argument("--until", type=parse_bound, help="parsed before this date/time")
+    arg_parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="rows per fetch and row group")
+    args = arg_parser.parse_args(argv)
+
+    try:
+        fmt = args.format or format_for(args.output)
+    except ValueError as e:
+        arg_parser.error(str(e))
+    initialize_database()
+    if args.output == "-":
+        rows = export(sys.stdout.buffer, fmt, args.user_id, args.since, args.until, args.chunk_size)
+    else:
+        with open(args.output, "wb") as out:
+            rows = export(out, fmt, args.user_id, args.since, args.until, args.chunk_size)
+    print(f"Exported {rows} records as {fmt}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""
+Headless bulk ingestion: parse a directory, zip archive or manifest of resumes
+across a process pool and store the results in parsed_data.
+
+    python ingest.py resumes/ --user-id 1 --workers 8
+    python ingest.py batch.zip --user-id 1 --checkpoint batch.ckpt
+    python ingest.py manifest.txt --user-id 1
+    python ingest.py resumes/ --user-id 1 --ner      # names from spaCy NER (see ner.py)
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import Dict, Iterable, List, Set
+
+import metrics
+from cache import cached_parse, get_parse_cache
+from db import initialize_database, save_parsed_batch, transaction
+from parser import GUARDED_LIMITS, extract_fields, extract_text, extractor_versions
+from sandbox import sandboxed_pool
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+
+# Parse jobs queued per worker; caps how many results (with their text) are held at once
+IN_FLIGHT_PER_WORKER = 4
+
+# Zip members are addressed as "<archive>::<member>"
+ZIP_SEPARATOR = "::"
+
+
+# ------------ Source Discovery ------------
+
+def collect_sources(target: str) -> List[str]:
+    if os.path.isdir(target):
+        sources = []
+        for root, _, files in os.walk(target):
+            for filename in files:
+                if filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                    sources.append(os.path.join(root, filename))
+        return sorted(sources)
+
+    if zipfile.is_zipfile(target):
+        with zipfile.ZipFile(target) as archive:
+            return [
+                f"{target}{ZIP_SEPARATOR}{info.filename}"
+                for info in archive.infolist()
+                if not info.is_dir() and info.filename.lower().endswith(SUPPORTED_EXTENSIONS)
+            ]
+
+    # Anything else is a manifest: one path per line, relative to the manifest
+    base_dir = os.path.dirname(os.path.abspath(target))
+    sources = []
+    with open(target, encoding="utf-8") as manifest:
+        for line in manifest:
+            path = line.strip()
+            if path and not path.startswith("#"):
+                sources.append(path if os.path.isabs(path) else os.path.join(base_dir, path))
+    return sources
+
+
+def open_source(source: str):
+    if ZIP_SEPARATOR in source:
+        archive_path, member = source.split(ZIP_SEPARATOR, 1)
+        with zipfile.ZipFile(archive_path) as archive:
+            return io.BytesIO(archive.read(member))
+    return open(source, "rb")
+
+
+# ------------ Worker ------------
+
+def parse_source(source: str, use_cache: bool = False, dedup: bool = False) -> Dict:
+    # Runs in a sandboxed worker process, under GUARDED_LIMITS like uploads through the app.
+    # Never raises, so one bad file can't take the batch down.
+    result = {"source": source, "fields": None, "text": None, "versions": extractor_versions(), "error": None,
+              "timings": {}, "cache_hit": False, "signature": None}
+    try:
+        started = time.perf_counter()
+        if use_cache:
+            cache = get_parse_cache()
+            hits = cache.hits
+            with open_source(source) as file:
+                data = file.read()
+            text, result["fields"] = cached_parse(data, source, cache, GUARDED_LIMITS)
+            result["cache_hit"] = cache.hits > hits
+            result["timings"] = {"cached_parse": time.perf_counter() - started}
+        else:
+            with open_source(source) as file:
+                text = extract_text(file, source, GUARDED_LIMITS)
+            extracted = time.perf_counter()
+            result["fields"] = extract_fields(text)
+            finished = time.perf_counter()
+            result["timings"] = {"extract_text": extracted - started, "extract_fields": finished - extracted}
+        result["text"] = text
+        if dedup:
+            # Signatures are CPU-bound, so they are computed here rather than in the writer
+            from dedup import minhash_signature
+            result["signature"] = minhash_signature(text)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def recognize_names(texts: List[str]) -> List[str]:
+    # Runs in the NER worker process, which keeps the model loaded between batches
+    from ner import extract_names
+    return extract_names(texts)
+
+
+# ------------ Checkpoints ------------
+
+def load_checkpoint(path: str, retry_errors: bool) -> Set[str]:
+    done = set()
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as checkpoint:
+        for line in checkpoint:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn write from an interrupted run
+            if entry.get("status") == "ok" or not retry_errors:
+                done.add(entry["source"])
+    return done
+
+
+def append_checkpoint(checkpoint, entries: Iterable[Dict]) -> None:
+    if checkpoint is None:
+        return
+    for entry in entries:
+        checkpoint.write(json.dumps(entry) + "\n")
+    checkpoint.flush()
+    os.fsync(checkpoint.fileno())
+
+
+# ------------ Reporting ------------
+
+def print_summary(stats: Dict, elapsed: float, out=sys.stdout) -> None:
+    processed = stats["ok"] + stats["failed"]
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"Processed {processed} files in {elapsed:.2f}s ({rate:.1f} files/sec)", file=out)
+    print(f"  ok: {stats['ok']}  failed: {stats['failed']}  skipped (checkpoint): {stats['skipped']}", file=out)
+    if stats["cache_hits"]:
+        print(f"  cache hits: {stats['cache_hits']}", file=out)
+    if stats["duplicates"]:
+        print(f"  near-duplicates: {stats['duplicates']}", file=out)
+    for stage, samples in stats["timings"].items():
+        if samples:
+            print(
+                f"  {stage:<15} p50={metrics.percentile(samples, 50) * 1000:.1f}ms"
+                f"  p95={metrics.percentile(samples, 95) * 1000:.1f}ms  n={len(samples)}",
+                file=out,
+            )
+
+
+# ------------ Driver ------------
+
+def ingest(sources: List[str], user_id: int, workers: int = None, batch_size: int = 100,
+           checkpoint_path: str = None, retry_errors: bool = False, use_cache: bool = False,
+           dedup: bool = False, skip_duplicates: bool = False, dedup_threshold: float = None,
+           ner: bool = False) -> Dict:
+    done = load_checkpoint(checkpoint_path, retry_errors)
+    pending = [source for source in sources if source not in done]
+    stats = {
+        "ok": 0,
+        "failed": 0,
+        "skipped": len(sources) - len(pending),
+        "cache_hits": 0,
+        "duplicates": 0,
+        "timings": {"extract_text": [], "extract_fields": [], "cached_parse": [], "ner": [], "db_insert": []},
+    }
+    checkpoint = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+    batch = []
+    workers = workers or os.cpu_count() or 1
+    # Its own process: NER waits neither behind queued parse jobs nor they behind it
+    ner_pool = ProcessPoolExecutor(max_workers=1) if ner else None
+
+    def record_failure(source, error):
+        stats["failed"] += 1
+        print(f"[error] {source}: {error}", file=sys.stderr)
+        append_checkpoint(checkpoint, [{"source": source, "status": "error", "error": error}])
+
+    def flush():
+        # Checkpoint only after the rows are committed, so a crash re-parses rather than loses them
+        if not batch:
+            return
+        if ner:
+            # One batched nlp.pipe run per flush; the parse jobs already queued keep running meanwhile
+            from ner import ner_versions
+            started = time.perf_counter()
+            names = ner_pool.submit(recognize_names, [result["text"] for result in batch]).result()
+            versions = ner_versions()
+            for result, name in zip(batch, names):
+                result["fields"]["name"] = name
+                result["versions"] = versions
+            stats["timings"]["ner"].extend([(time.perf_counter() - started) / len(batch)] * len(batch))
+        started = time.perf_counter()
+        if dedup:
+            from dedup import DEFAULT_THRESHOLD, save_with_dedup
+            with transaction():
+                for result in batch:
+                    saved = save_with_dedup(
+                        user_id, result["fields"], result["text"], dedup_threshold or DEFAULT_THRESHOLD,
+                        skip_duplicates, signature=result["signature"], versions=result["versions"],
+                    )
+                    stats["duplicates"] += saved["duplicate_of"] is not None
+        else:
+            save_parsed_batch(
+                ((user_id, result["fields"], result["text"], result["versions"]) for result in batch), batch_size
+            )
+        per_file = (time.perf_counter() - started) / len(batch)
+        stats["timings"]["db_insert"].extend([per_file] * len(batch))
+        append_checkpoint(checkpoint, ({"source": r["source"], "status": "ok"} for r in batch))
+        stats["ok"] += len(batch)
+        batch.clear()
+
+    remaining = iter(pending)
+    in_flight = {}
+    pool = sandboxed_pool(workers)
+    broken = False
+    try:
+        while True:
+            if broken and not in_flight:
+                pool.shutdown(wait=False)
+                pool = sandboxed_pool(workers)
+                broken = False
+            if not broken:
+                # Keep the workers busy without submitting (and holding results for) the whole corpus
+                for source in islice(remaining, workers * IN_FLIGHT_PER_WORKER - len(in_flight)):
+                    in_flight[pool.submit(parse_source, source, use_cache, dedup)] = source
+            if not in_flight:
+                break
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                source = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    # A worker died outright (e.g. over the memory cap), failing every job in the pool;
+                    # the rest of the run gets a fresh one
+                    broken = True
+                    record_failure(source, "worker process crashed")
+                    continue
+                if result["error"]:
+                    record_failure(source, result["error"])
+                    continue
+                stats["cache_hits"] += result["cache_hit"]
+                for stage, seconds in result["timings"].items():
+                    stats["timings"][stage].append(seconds)
+                batch.append(result)
+                if len(batch) >= batch_size:
+                    flush()
+        flush()
+    finally:
+        pool.shutdown(wait=True)
+        if ner_pool is not None:
+            ner_pool.shutdown(wait=True)
+        if checkpoint is not None:
+            checkpoint.close()
+    return stats
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Bulk-parse resumes into parsed_data.")
+    arg_parser.add_argument("target", help="directory, .zip archive or manifest file (one path per line)")
+    arg_parser.add_argument("--user-id", type=int, required=True, help="owner of the parsed records")
+    arg_parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    arg_parser.add_argument("--batch-size", type=int, default=100, help="rows per insert transaction")
+    arg_parser.add_argument("--checkpoint", help="checkpoint file used to resume an interrupted run")
+    arg_parser.add_argument("--retry-errors", action="store_true", help="re-attempt files that failed previously")
+    arg_parser.add_argument("--cache", action="store_true", help="reuse results for byte-identical files via the parse cache")
+    arg_parser.add_argument("--dedup", action="store_true", help="flag near-duplicates of already stored resumes")
+    arg_parser.add_argument("--skip-duplicates", action="store_true", help="with --dedup, don't store near-duplicates")
+    arg_parser.add_argument("--dedup-threshold", type=float, default=None, help="similarity needed to count as duplicate")
+    arg_parser.add_argument("--ner", action="store_true", help="extract names with spaCy NER instead of the regex heuristic")
+    args = arg_parser.parse_args(argv)
+
+    initialize_database()
+    sources = collect_sources(args.target)
+    started = time.perf_counter()
+    stats = ingest(sources, args.user_id, args.workers, args.batch_size, args.checkpoint, args.retry_errors,
+                   args.cache, args.dedup, args.skip_duplicates, args.dedup_threshold, args.ner)
+    print_summary(stats, time.perf_counter() - started)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Local background job queue for resume parsing.
+
+The UI submits a parse job and gets a job id back immediately; extraction runs
+in a small process pool and the result is stored when it finishes, flagged if
+it nearly duplicates an earlier upload. The number of queued plus running jobs
+is capped, and submit() raises QueueFullError beyond that so callers can apply
+backpressure.
+
+Uploads are untrusted: workers are memory-capped (see sandbox.py) and
+extraction runs under GUARDED_LIMITS. A file that breaches a limit, or kills
+its worker outright, fails only its own job, with the details in
+`error_detail`.
+
+Each job also returns what it recorded in its worker's metrics and parse
+cache counters, which are merged into this process's, so the metrics
+endpoint and admin panel cover parsing done in the workers.
+"""
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+import metrics
+from cache import cached_parse, get_parse_cache
+from dedup import save_with_dedup
+from parser import GUARDED_LIMITS, ExtractionLimitError
+from sandbox import sandboxed_pool
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the queue already holds max_pending unfinished jobs."""
+
+
+def _job_stats(cache, before) -> dict:
+    # What this job added to the worker's metrics and cache counters
+    after = cache.stats()
+    return {"metrics": metrics.drain(), "cache_hits": after["hits"] - before["hits"],
+            "cache_misses": after["misses"] - before["misses"]}
+
+
+def _parse_job(data: bytes, filename: str):
+    # Runs in a worker process, one job at a time, so the stats it returns are this job's alone
+    cache = get_parse_cache()
+    before = cache.stats()
+    try:
+        text, fields = cached_parse(data, filename, cache, limits=GUARDED_LIMITS)
+    except Exception as e:
+        # Exception attributes survive pickling back to the parent
+        e.job_stats = _job_stats(cache, before)
+        raise
+    return text, fields, _job_stats(cache, before)
+
+
+def _merge_job_stats(stats: Optional[dict]) -> None:
+    if stats:
+        metrics.merge(stats["metrics"])
+        get_parse_cache().add_stats(stats["cache_hits"], stats["cache_misses"])
+
+
+class JobQueue:
+    def __init__(self, max_workers: int = 2, max_pending: int = 8, max_finished: int = 256):
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.max_workers = max_workers
+        self._pool = sandboxed_pool(max_workers)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, dict] = {}
+        self._finished = OrderedDict()
+
+    def submit(self, user_id: int, data: bytes, filename: str) -> str:
+        with self._lock:
+            unfinished = sum(1 for job in self._jobs.values() if job["status"] in (QUEUED, RUNNING))
+            if unfinished >= self.max_pending:
+                raise QueueFullError(f"{unfinished} parse jobs are already waiting")
+            job_id = uuid.uuid4().hex
+            job = {"id": job_id, "status": QUEUED, "result": None, "error": None, "error_detail": None,
+                   "record_id": None, "duplicate_of": None}
+            self._jobs[job_id] = job
+            pool = self._pool
+            try:
+                job["future"] = pool.submit(_parse_job, data, filename)
+            except BrokenProcessPool:
+                pool = self._pool = sandboxed_pool(self.max_workers)
+                job["future"] = pool.submit(_parse_job, data, filename)
+        job["future"].add_done_callback(lambda future: self._finish(job_id, user_id, future, pool))
+        return job_id
+
+    def _finish(self, job_id: str, user_id: int, future, pool) -> None:
+        # Runs on the pool's result thread; the database write happens here, not in the UI
+        try:
+            try:
+                text, fields, stats = future.result()
+            except Exception as e:
+                _merge_job_stats(getattr(e, "job_stats", None))
+                raise
+            _merge_job_stats(stats)
+            saved = save_with_dedup(user_id, fields, text)
+            update = {"status": DONE, "result": (fields, text), "record_id": saved["id"],
+                      "duplicate_of": saved["duplicate_of"]}
+        except ExtractionLimitError as e:
+            update = {"status": FAILED, "error": str(e), "error_detail": e.to_dict()}
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory), failing every job still in its pool;
+            # later jobs get a fresh one
+            self._replace_pool(pool)
+            message = "The parser crashed on this file"
+            update = {"status": FAILED, "error": message, "error_detail": {"error": message, "limit": None, "maximum": None}}
+        except Exception as e:
+            update = {"status": FAILED, "error": f"{type(e).__name__}: {e}"}
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(update)
+            job.pop("future", None)
+            self._finished[job_id] = True
+            while len(self._finished) > self.max_finished:
+                self._jobs.pop(self._finished.popitem(last=False)[0], None)
+
+    def _replace_pool(self, broken) -> None:
+        with self._lock:
+            if self._pool is broken:
+                self._pool = sandboxed_pool(self.max_workers)
+        broken.shutdown(wait=False)
+
+    def status(self, job_id: str) -> Optional[dict]:
+        """Snapshot of a job: id, status, result (fields, text), error, error_detail, record_id and duplicate_of."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = {key: value for key, value in job.items() if key != "future"}
+            future = job.get("future")
+        if snapshot["status"] == QUEUED and future is not None and future.running():
+            snapshot["status"] = RUNNING
+        return snapshot
+
+    def forget(self, job_id: str) -> None:
+        """Drop a finished job once its result has been picked up."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job["status"] in (DONE, FAILED):
+                del self._jobs[job_id]
+                self._finished.pop(job_id, None)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
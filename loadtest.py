@@ -0,0 +1,309 @@
+"""
+Concurrent load test of the sign-up, sign-in, parse and history paths.
+
+    python loadtest.py --users 1,4,16,64 --duration 15
+    python loadtest.py --users 8,32 --duration 60 --parse-workers 4 --output capacity.json
+
+Each simulated user is a thread, as a Streamlit session is, calling the
+same functions app.py does: handle_signup and handle_signin, an upload
+through a shared JobQueue (polled until the result is saved) and a page of
+history plus its count. After signing up and in, a user loops over those
+actions in the --mix proportions, pausing --think-ms between them.
+
+Every concurrency level starts from an empty database in a scratch
+directory, and every upload is a freshly generated resume, so neither
+earlier levels nor the parse cache flatter the numbers. For each level the
+report shows throughput, p50/p95/p99 latency and errors per action, the
+time write transactions spent waiting for SQLite's lock (db.lock_wait) and
+how busy this process's CPU was. The capacity line is the highest level
+that kept errors under --max-error-rate and every non-parse action's p95
+under --slo-ms.
+
+The app's UI delays (its sleeps and reruns) are not part of the measurement.
+"""
+import os
+
+# Lock waits are recorded through metrics, which reads this at import
+os.environ.setdefault("RESUME_PARSER_METRICS", "1")
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import db
+import metrics
+from auth import handle_signin, handle_signup
+from benchmark import synthetic_resume, write_docx, write_pdf
+from jobs import DONE, FAILED, JobQueue, QueueFullError
+
+ACTIONS = ("parse", "history", "signin")
+DEFAULT_MIX = "parse=1,history=4,signin=1"
+PASSWORD = "Loadtest1"
+HISTORY_PAGE_SIZE = 10
+POLL_INTERVAL = 0.05
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """"parse=1,history=4,signin=1" -> {action: weight}."""
+    mix = {}
+    for part in value.split(","):
+        action, _, weight = part.partition("=")
+        action = action.strip()
+        if action not in ACTIONS:
+            raise argparse.ArgumentTypeError(f"unknown action {action!r}; use {', '.join(ACTIONS)}")
+        try:
+            mix[action] = float(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"bad weight for {action}: {weight!r}")
+    return mix
+
+
+class Recorder:
+    """Latencies and errors per action, shared by every user thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+
+    def record(self, action: str, seconds: float, error: str = None) -> None:
+        with self._lock:
+            self.latencies.setdefault(action, []).append(seconds)
+            if error:
+                kinds = self.errors.setdefault(action, {})
+                kinds[error] = kinds.get(error, 0) + 1
+
+    def timed(self, action: str, fn, *args):
+        """Run fn, recording its latency; returns its result, or None if it raised."""
+        started = time.perf_counter()
+        try:
+            result = fn(*args)
+        except Exception as e:
+            self.record(action, time.perf_counter() - started, type(e).__name__)
+            return None
+        self.record(action, time.perf_counter() - started, getattr(result, "error", None))
+        return result
+
+
+class _Outcome:
+    # What timed() needs from an action that failed without raising
+    def __init__(self, value=None, error: str = None):
+        self.value = value
+        self.error = error
+
+
+# ------------ Actions ------------
+
+def _signup(name: str, email: str) -> _Outcome:
+    ok, message = handle_signup(name, email, PASSWORD)
+    return _Outcome(message, None if ok else "rejected")
+
+
+def _signin(email: str) -> _Outcome:
+    ok, user = handle_signin(email, PASSWORD)
+    return _Outcome(user, None if ok else "rejected")
+
+
+def _parse(queue: JobQueue, user_id: int, filename: str, data: bytes, deadline: float) -> _Outcome:
+    try:
+        job_id = queue.submit(user_id, data, filename)
+    except QueueFullError:
+        return _Outcome(error="queue_full")
+    while True:
+        job = queue.status(job_id)
+        if job["status"] in (DONE, FAILED):
+            queue.forget(job_id)
+            return _Outcome(job, None if job["status"] == DONE else "parse_failed")
+        if time.monotonic() > deadline:
+            return _Outcome(error="timeout")
+        time.sleep(POLL_INTERVAL)
+
+
+def _history(user_id: int) -> _Outcome:
+    page, _ = db.get_user_history_page(user_id, HISTORY_PAGE_SIZE)
+    db.count_user_history(user_id)
+    return _Outcome(page)
+
+
+def _upload(rng: random.Random):
+    lines = synthetic_resume(rng, paragraphs=rng.choice([1, 2, 4]))
+    if rng.random() < 0.5:
+        return "resume.pdf", write_pdf(lines)
+    return "resume.docx", write_docx(lines)
+
+
+def simulate_user(number: int, level: int, queue: JobQueue, recorder: Recorder, mix: Dict[str, float],
+                  stop_at: float, think: float, seed: int) -> None:
+    rng = random.Random(seed * 100003 + level * 1009 + number)
+    email = f"user{level}-{number}@loadtest.example"
+    outcome = recorder.timed("signup", _signup, f"Load Test {number}", email)
+    if outcome is None or outcome.error:
+        return
+    outcome = recorder.timed("signin", _signin, email)
+    if outcome is None or outcome.error:
+        return
+    user_id = outcome.value[0]
+    actions, weights = list(mix), list(mix.values())
+    try:
+        while time.monotonic() < stop_at:
+            action = rng.choices(actions, weights)[0]
+            if action == "parse":
+                filename, data = _upload(rng)
+                # A parse that is still running when the level ends is given a little longer, then abandoned
+                recorder.timed("parse", _parse, queue, user_id, filename, data, stop_at + 30)
+            elif action == "history":
+                recorder.timed("history", _history, user_id)
+            else:
+                recorder.timed("signin", _signin, email)
+            if think:
+                time.sleep(rng.uniform(0.5, 1.5) * think)
+    finally:
+        db.close_connections()
+
+
+# ------------ Driver ------------
+
+def run_level(users: int, duration: float, queue: JobQueue, mix: Dict[str, float], think: float,
+              workdir: str, seed: int) -> Dict:
+    db.DB_NAME = os.path.join(workdir, f"load-{users}.db")
+    db.initialize_database()
+    metrics.reset()
+    recorder = Recorder()
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    stop_at = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=simulate_user, name=f"user-{i}",
+                         args=(i, users, queue, recorder, mix, stop_at, think, seed), daemon=True)
+        for i in range(users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    cpu = (time.process_time() - cpu_started) / elapsed / (os.cpu_count() or 1)
+
+    actions = {}
+    total = failed = 0
+    for action, samples in sorted(recorder.latencies.items()):
+        errors = recorder.errors.get(action, {})
+        total += len(samples)
+        failed += sum(errors.values())
+        actions[action] = {
+            "calls": len(samples),
+            "per_s": len(samples) / elapsed,
+            "p50_ms": metrics.percentile(samples, 50) * 1000,
+            "p95_ms": metrics.percentile(samples, 95) * 1000,
+            "p99_ms": metrics.percentile(samples, 99) * 1000,
+            "errors": errors,
+        }
+    lock = metrics.snapshot().get("db.lock_wait", {"calls": 0, "mean_ms": 0.0, "p95_ms": 0.0})
+    db.close_connections()
+    return {
+        "users": users,
+        "elapsed_s": elapsed,
+        "ops": total,
+        "ops_per_s": total / elapsed,
+        "error_rate": failed / total if total else 0.0,
+        "cpu": cpu,
+        "lock_wait": {
+            "transactions": lock["calls"],
+            "total_s": lock["calls"] * lock["mean_ms"] / 1000,
+            "p95_ms": lock["p95_ms"],
+            "timeouts": metrics.counter_total("db_lock_timeouts_total"),
+        },
+        "actions": actions,
+    }
+
+
+def capacity(levels: List[Dict], slo_ms: float, max_error_rate: float):
+    """Highest user count whose errors and non-parse p95 latencies stayed within bounds."""
+    best = None
+    for level in levels:
+        interactive = [stats["p95_ms"] for action, stats in level["actions"].items() if action != "parse"]
+        if level["error_rate"] <= max_error_rate and all(p95 <= slo_ms for p95 in interactive):
+            best = level["users"]
+    return best
+
+
+def print_level(level: Dict, out=sys.stdout) -> None:
+    lock = level["lock_wait"]
+    print(
+        f"{level['users']:>4} users  {level['ops_per_s']:8.1f} ops/s  errors {level['error_rate']:6.2%}  "
+        f"cpu {level['cpu']:5.1%}  lock waits {lock['total_s']:.2f}s over {lock['transactions']} writes "
+        f"(p95 <= {lock['p95_ms']:g}ms, {lock['timeouts']:g} timeouts)",
+        file=out,
+    )
+    for action, stats in level["actions"].items():
+        errors = ", ".join(f"{kind}={count}" for kind, count in stats["errors"].items()) or "-"
+        print(
+            f"       {action:<8} {stats['per_s']:8.1f}/s  p50={stats['p50_ms']:.1f}ms  "
+            f"p95={stats['p95_ms']:.1f}ms  p99={stats['p99_ms']:.1f}ms  errors: {errors}",
+            file=out,
+        )
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Load-test the auth, parse and history paths.")
+    arg_parser.add_argument("--users", default="1,4,16", help="comma-separated concurrency levels")
+    arg_parser.add_argument("--duration", type=float, default=15.0, help="seconds per level")
+    arg_parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                            help=f"action weights (default: {DEFAULT_MIX})")
+    arg_parser.add_argument("--think-ms", type=float, default=100.0, help="mean pause between a user's actions")
+    arg_parser.add_argument("--parse-workers", type=int, default=2, help="JobQueue worker processes, as in the app")
+    arg_parser.add_argument("--queue-limit", type=int, default=8, help="JobQueue max_pending, as in the app")
+    arg_parser.add_argument("--slo-ms", type=float, default=500.0, help="p95 bound for non-parse actions")
+    arg_parser.add_argument("--max-error-rate", type=float, default=0.01)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--workdir", help="keep the per-level databases here (default: a temp dir)")
+    arg_parser.add_argument("--output", help="also write the results as JSON here")
+    args = arg_parser.parse_args(argv)
+    try:
+        levels = [int(value) for value in args.users.split(",")]
+    except ValueError:
+        arg_parser.error("--users must be comma-separated integers")
+
+    output = os.path.abspath(args.output) if args.output else None
+    scratch = None
+    if args.workdir:
+        workdir = os.path.abspath(args.workdir)
+        os.makedirs(workdir, exist_ok=True)
+    else:
+        scratch = tempfile.TemporaryDirectory(prefix="loadtest-")
+        workdir = scratch.name
+    # The parse cache lives in the working directory; keep its entries out of the real one
+    os.chdir(workdir)
+
+    queue = JobQueue(max_workers=args.parse_workers, max_pending=args.queue_limit)
+    results = []
+    try:
+        for users in levels:
+            level = run_level(users, args.duration, queue, args.mix, args.think_ms / 1000, workdir, args.seed)
+            print_level(level)
+            results.append(level)
+    finally:
+        queue.shutdown(wait=True)
+        if scratch is not None:
+            scratch.cleanup()
+
+    best = capacity(results, args.slo_ms, args.max_error_rate)
+    print(f"Capacity: {best if best is not None else 'below ' + str(levels[0])} concurrent users "
+          f"(p95 <= {args.slo_ms:g}ms, errors <= {args.max_error_rate:.0%})")
+    if output:
+        report = {"levels": results, "capacity": best, "settings": {
+            key: value for key, value in vars(args).items() if key not in ("output", "workdir")
+        }}
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
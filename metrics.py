@@ -0,0 +1,219 @@
+"""
+Optional per-stage instrumentation for the parser and database layers.
+
+Set RESUME_PARSER_METRICS=1 before the app (or any CLI) starts to turn it
+on. When it is off, `instrument` hands back the undecorated function and the
+counter helpers return immediately, so the cost is one attribute check.
+
+Metrics are exposed in the Prometheus text format via render_prometheus(),
+or over HTTP with serve_metrics(port) (also started by the app when
+RESUME_PARSER_METRICS_PORT is set).
+"""
+import functools
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Tuple
+
+ENABLED = os.environ.get("RESUME_PARSER_METRICS", "").lower() not in ("", "0", "false", "no")
+
+PREFIX = "resume_parser"
+
+# Upper bounds in seconds; wide enough to cover a regex pass and a 40-page PDF
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+# stage -> [bucket counts..., +Inf count], sum, count
+_histograms: Dict[str, Tuple[list, list]] = {}
+# (name, sorted label items) -> value
+_counters: Dict[Tuple[str, tuple], float] = {}
+_counter_help: Dict[str, str] = {}
+
+
+def observe(stage: str, seconds: float) -> None:
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = ([0] * (len(LATENCY_BUCKETS) + 1), [0.0, 0])
+        histogram[0][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        histogram[1][0] += seconds
+        histogram[1][1] += 1
+
+
+def inc(name: str, value: float = 1, help: str = "", **labels) -> None:
+    if not ENABLED:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+        if help:
+            _counter_help.setdefault(name, help)
+
+
+def counter_total(name: str) -> float:
+    """Sum of a counter over all its label sets."""
+    with _lock:
+        return sum(value for (counter, _), value in _counters.items() if counter == name)
+
+
+def instrument(stage: str) -> Callable:
+    """Record the latency of every call to the decorated function under `stage`."""
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(stage, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def reset() -> None:
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def drain() -> dict:
+    """
+    Everything recorded since the last drain (or reset), clearing it. Worker
+    processes send this back with their results so the parent can merge() it
+    into the registry it exposes.
+    """
+    with _lock:
+        delta = {"histograms": dict(_histograms), "counters": dict(_counters), "help": dict(_counter_help)}
+        _histograms.clear()
+        _counters.clear()
+    return delta
+
+
+def merge(delta: dict) -> None:
+    """Add a drain() from another process to this one's metrics."""
+    if not ENABLED or not delta:
+        return
+    with _lock:
+        for stage, (buckets, (total, count)) in delta["histograms"].items():
+            histogram = _histograms.get(stage)
+            if histogram is None:
+                histogram = _histograms[stage] = ([0] * (len(LATENCY_BUCKETS) + 1), [0.0, 0])
+            for i, bucket_count in enumerate(buckets):
+                histogram[0][i] += bucket_count
+            histogram[1][0] += total
+            histogram[1][1] += count
+        for key, value in delta["counters"].items():
+            _counters[key] = _counters.get(key, 0) + value
+        for name, help in delta["help"].items():
+            _counter_help.setdefault(name, help)
+
+
+# ------------ Exposition ------------
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+def render_prometheus() -> str:
+    with _lock:
+        histograms = {stage: (list(buckets), list(totals)) for stage, (buckets, totals) in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = []
+    if histograms:
+        name = f"{PREFIX}_stage_seconds"
+        lines.append(f"# HELP {name} Latency of instrumented parser and database calls.")
+        lines.append(f"# TYPE {name} histogram")
+        for stage in sorted(histograms):
+            buckets, (total, count) = histograms[stage]
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+    seen = set()
+    for (counter, labels), value in sorted(counters.items()):
+        name = f"{PREFIX}_{counter}"
+        if counter not in seen:
+            seen.add(counter)
+            if counter in _counter_help:
+                lines.append(f"# HELP {name} {_counter_help[counter]}")
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """Nearest-rank percentile of raw samples (in any order); 0.0 when there are none.
+
+    The one definition shared by benchmark.py, ingest.py and loadtest.py, so
+    their p50/p95 figures are comparable.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered), max(1, math.ceil(pct / 100 * len(ordered)))) - 1]
+
+
+def snapshot() -> Dict[str, Dict[str, float]]:
+    """Per-stage call count, mean, and p50/p95 as histogram bucket upper bounds, in milliseconds."""
+    with _lock:
+        histograms = {stage: (list(buckets), list(totals)) for stage, (buckets, totals) in _histograms.items()}
+
+    def estimate(buckets, count, pct):
+        target = pct / 100 * count
+        cumulative = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS + (float("inf"),), buckets):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return bound * 1000
+        return float("inf")
+
+    summary = {}
+    for stage, (buckets, (total, count)) in sorted(histograms.items()):
+        summary[stage] = {
+            "calls": count,
+            "mean_ms": total / count * 1000 if count else 0.0,
+            "p50_ms": estimate(buckets, count, 50),
+            "p95_ms": estimate(buckets, count, 95),
+        }
+    return summary
+
+
+_server = None
+_server_lock = threading.Lock()
+
+def serve_metrics(port: int, host: str = "127.0.0.1"):
+    """Serve GET /metrics from a daemon thread. Safe to call repeatedly."""
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
@@ -0,0 +1,113 @@
+"""
+Convert a resume_parser.db to the compact storage format in place and
+report the size and read speed before and after.
+
+    python migrate.py                          # ./resume_parser.db
+    python migrate.py path/to/app.db --backup app-before.db
+
+db.initialize_database() performs the same conversion the first time it
+opens an older file (see "Storage format" in db.py). This tool runs it
+explicitly, then VACUUMs the file so the freed pages go back to the
+filesystem, which the automatic conversion leaves for later. Timings are
+medians over a few warm-cache runs of reads the app and API make.
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+import db
+
+# Runs per timed query
+REPEAT = 5
+
+
+def file_size(path: str) -> int:
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def table_sizes(conn) -> dict:
+    """Bytes used per table and index, when SQLite was built with the dbstat table."""
+    try:
+        return dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+    except sqlite3.OperationalError:
+        return {}
+
+
+def _median_ms(call) -> float:
+    samples = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def measure(path: str) -> dict:
+    conn = db.get_connection()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    busiest = conn.execute(
+        "SELECT user_id, COUNT(*) FROM parsed_data GROUP BY user_id ORDER BY 2 DESC LIMIT 1"
+    ).fetchone()
+    queries = {}
+    if busiest:
+        user_id, rows = busiest
+        queries[f"history page (user {user_id})"] = _median_ms(lambda: db.get_user_history_page(user_id, 20))
+        queries[f"full history (user {user_id}, {rows} rows)"] = _median_ms(lambda: db.get_user_history(user_id))
+        queries["scan all rows"] = _median_ms(lambda: sum(len(chunk) for chunk in db.iter_parsed_data()))
+    return {"size": file_size(path), "tables": table_sizes(conn), "queries": queries}
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1e6:.1f} MB"
+
+
+def print_report(before: dict, after: dict, seconds: float, out=sys.stdout) -> None:
+    saved = 1 - after["size"] / before["size"] if before["size"] else 0.0
+    print(f"Converted in {seconds:.2f}s", file=out)
+    print(f"  {'file size':<40} {_mb(before['size']):>12} {_mb(after['size']):>12}  ({saved:.0%} smaller)", file=out)
+    for name in sorted(set(before["tables"]) | set(after["tables"])):
+        if name.startswith(("parsed_data", "resume_skills", "skills")):
+            print(f"  {name:<40} {_mb(before['tables'].get(name, 0)):>12} {_mb(after['tables'].get(name, 0)):>12}",
+                  file=out)
+    for name, ms in before["queries"].items():
+        print(f"  {name:<40} {ms:>10.1f}ms {after['queries'].get(name, 0.0):>10.1f}ms", file=out)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Convert a database to the compact storage format.")
+    arg_parser.add_argument("database", nargs="?", default=db.DB_NAME, help=f"default: {db.DB_NAME}")
+    arg_parser.add_argument("--backup", help="copy the database here before converting it")
+    arg_parser.add_argument("--no-vacuum", action="store_true", help="skip the VACUUM that shrinks the file")
+    args = arg_parser.parse_args(argv)
+
+    if not os.path.exists(args.database):
+        arg_parser.error(f"{args.database} does not exist")
+    db.DB_NAME = args.database
+    conn = db.get_connection()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= db.STORAGE_VERSION:
+        print(f"{args.database} already uses the compact format (version {version})")
+        return 0
+    if args.backup:
+        with sqlite3.connect(args.backup) as target:
+            conn.backup(target)
+        print(f"Backed up to {args.backup}")
+
+    # Columns added since the file was created are needed by the timed reads; the rows stay as they are
+    db.initialize_database(convert=False)
+    before = measure(args.database)
+    started = time.perf_counter()
+    db.initialize_database()
+    if not args.no_vacuum:
+        conn.execute("VACUUM")
+    seconds = time.perf_counter() - started
+    after = measure(args.database)
+    print_report(before, after, seconds)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
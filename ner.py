@@ -0,0 +1,89 @@
+"""
+spaCy named-entity extraction of candidate names, batched over many resumes.
+
+The regex extractors in parser.py stay the default. This is the slower,
+more accurate mode for batch jobs (ingest.py --ner, reprocess.py --ner), and
+it is kept close to regex speed by:
+
+- loading the model with only the "ner" component (and the tok2vec it
+  listens to, if any) enabled; the tagger, parser and lemmatizer never run
+- running NER only over the header block above the first section, where
+  the name is, capped in length
+- streaming a whole batch of headers through one nlp.pipe call; ingest.py
+  and reprocess.py run those batches in their own worker processes
+"""
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from parser import EXTRACTOR_VERSIONS, NOT_A_NAME_RE, SPACY_MODEL, ResumeDocument, extract_name, extractor_versions
+
+# Bump when the spans or entity rules below change, so reprocess.py --ner re-runs
+NER_VERSION = "1"
+# The header block: at most this many non-empty lines / characters above the first section
+HEADER_LINES = 10
+HEADER_CHARS = 300
+DEFAULT_BATCH_SIZE = 64
+# Separates the regex name version from the NER one in stored versions
+_NER_TAG = "+ner"
+
+_ner = None
+_ner_lock = threading.Lock()
+
+
+def get_ner():
+    """The spaCy pipeline with everything but NER disabled, loaded once per process."""
+    global _ner
+    if _ner is None:
+        with _ner_lock:
+            if _ner is None:
+                import spacy
+                nlp = spacy.load(SPACY_MODEL)
+                keep = {"ner"}
+                # A shared tok2vec feeds NER in some models; it has to stay enabled for them
+                for name, component in nlp.pipeline:
+                    if "ner" in getattr(component, "listening_components", ()):
+                        keep.add(name)
+                nlp.select_pipes(enable=[name for name in nlp.pipe_names if name in keep])
+                _ner = nlp
+    return _ner
+
+
+def header_span(doc: ResumeDocument) -> Optional[str]:
+    """The text NER is run on: the non-empty lines above the first section header, capped."""
+    first_section = min(doc.headers.values(), default=len(doc.lines))
+    header = [line.strip() for line in doc.lines[:first_section] if line.strip()][:HEADER_LINES]
+    return "\n".join(header)[:HEADER_CHARS] if header else None
+
+
+def extract_names(texts: Iterable, batch_size: int = DEFAULT_BATCH_SIZE) -> List[str]:
+    """
+    The candidate's name for each text (or ResumeDocument), in order: the
+    first PERSON entity in the header, falling back to parser.extract_name
+    when there is none.
+    """
+    docs = [text if isinstance(text, ResumeDocument) else ResumeDocument(text) for text in texts]
+    names: List[Optional[str]] = [None] * len(docs)
+    spans = [(span, index) for index, span in enumerate(header_span(doc) for doc in docs) if span]
+    if spans:
+        for parsed, index in get_ner().pipe(spans, as_tuples=True, batch_size=batch_size):
+            for ent in parsed.ents:
+                value = " ".join(ent.text.split())
+                if ent.label_ == "PERSON" and not NOT_A_NAME_RE.match(value):
+                    names[index] = value
+                    break
+    return [name if name is not None else extract_name(doc) for name, doc in zip(names, docs)]
+
+
+def ner_versions() -> Dict[str, str]:
+    """parser.extractor_versions() for fields whose name came from extract_names."""
+    return {**extractor_versions(), "name": f"{EXTRACTOR_VERSIONS['name']}{_NER_TAG}{NER_VERSION}"}
+
+
+def is_ner_version(stored: str, current: str) -> bool:
+    """
+    Whether the name version `stored` marks an NER name ("2+ner1") stamped
+    over the regex extractor version `current`. A plain reprocess keeps such
+    names rather than overwriting them with the heuristic.
+    """
+    base, tag, _ = (stored or "").partition(_NER_TAG)
+    return bool(tag) and base == current
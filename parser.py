@@ -1,130 +1,464 @@
+import io
+import os
 import re
-from typing import Dict
-import pdfplumber
-import docx2txt
-import spacy
-import tempfile
-
-# Load Spacy model once
-nlp = spacy.load("en_core_web_sm")
-
-# Skills database for improved skill detection
-SKILLS_DB = [
-    'python', 'java', 'sql', 'pandas', 'numpy', 'machine learning', 'data analysis','tensorflow', 'keras', 'power bi', 'communication', 'excel',  
-    'tableau', 'html', 'css','c++', 'javascript', 'flask', 'django', 'data structures', 'algorithms', 'artificial intelligence','deep learning', 
-    'computer vision', 'natural language processing', 'big data', 'cloud computing', 'cybersecurity', 'blockchain', 'software engineering', 
-    'web development', 'mobile app development', 'database management', 'version control (git, github)', 'operating systems', 'networking',
-    'api development', 'devops', 'agile methodologies', 'system design', 'embedded systems', 'iot', 'quantum computing', 'bioinformatics', 
-    'cryptography', 'parallel computing', 'distributed systems', 'virtual reality', 'augmented reality', 'game development', 'computer graphics',
-    'computational mathematics', 'digital signal processing', 'edge computing', 'cloud security', 'penetration testing', 'ethical hacking', 
-    'data mining', 'predictive analytics', 'software testing', 'unit testing', 'debugging', 'technical documentation', 'ui/ux design', 
-    'human-computer interaction', 'computer architecture', 'compiler design', 'operating system security', 'wireless networks', 'network security', 
-    'data governance', 'data warehousing', 'data visualization', 'statistical analysis', 'reinforcement learning', 'explainable ai', 'generative ai',
-    'software development life cycle (sdlc)', 'microservices architecture', 'containerization (docker, kubernetes)','cloud platforms (aws, azure, gcp)',
-    'edge ai', 'quantum cryptography', 'high-performance computing', 'automated testing', 'software quality assurance', 'concurrency', 
-    'multithreading', 'functional programming', 'object-oriented programming', 'event-driven programming', 'graph theory', 'computational biology', 
-    'computational chemistry', 'computational physics', 'mathematical modeling', 'simulation', 'robotics', 'speech recognition',
-    'computer-aided design (cad)', 'digital forensics', 'cyber law', 'data ethics', 'ai ethics', 'algorithmic bias', 'digital twins', 
-    'cloud native development', 'serverless computing', 'edge networking', '5g technology', 'smart contracts', 'nft development', 
-    'metaverse development', 'virtual economy', 'digital transformation', 'business intelligence', 'data lakes', 'data pipelines', 'data engineering', 
-    'data science', 'knowledge graphs', 'semantic web', 'ontology engineering', 'computational linguistics', 'cognitive computing', 
-    'ai-driven automation', 'explainable machine learning', 'ai model optimization', 'federated learning', 'privacy-preserving ai', 
-    'zero trust security', 'secure software development', 'threat intelligence', 'incident response', 'cyber risk management', 'cloud-native security',
-    'ai-powered cybersecurity', 'digital identity management', 'biometric security', 'quantum machine learning', 'ai for healthcare', 
-    'ai for finance', 'ai for education', 'ai for manufacturing', 'ai for retail', 'ai for smart cities', 'ai for autonomous vehicles',
-    'ai for space exploration', 'ai for climate science', 'ai for drug discovery', 'ai for personalized medicine', 'ai for agriculture', 
-    'ai for supply chain optimization', 'ai for logistics', 'ai for energy management', 'ai for sustainability', 'ai for environmental science', 
-    'ai for wildlife conservation', 'ai for oceanography', 'ai for astronomy', 'ai for astrobiology', 'ai for exoplanet research', 'ai for cosmology',
-    'ai for theoretical physics', 'ai for particle physics', 'ai for nuclear engineering', 'ai for fusion energy', 'ai for renewable energy', 
-    'ai for carbon capture', 'ai for green building', 'ai for circular economy', 'ai for waste management', 'ai for environmental policy', 
-    'ai for climate advocacy', 'ai for eco-tourism', 'ai for nature conservation', 'ai for marine conservation', 'ai for hydrology', 'ai for geology', 
-    'ai for paleontology', 'ai for archaeological excavation', 'ai for cultural heritage preservation', 'business analysis', 'project management',
-    'strategic planning', 'leadership', 'digital marketing', 'seo', 'content marketing', 'social media marketing', 'public speaking', 'editing', 
-    'persuasion', 'copywriting', 'critical thinking', 'decision-making', 'research', 'graphic design', 'web design', 'storytelling', 'typography', 
-    'photography', 'sales strategy', 'negotiation', 'customer relationship management', 'financial analysis', 'human resources', 'talent acquisition',
-    'employee training', 'supply chain management', 'risk management', 'accounting', 'legal research', 'public relations', 'event planning', 
-    'market research', 'brand management', 'advertising', 'e-commerce', 'product management', 'networking', 'technical support', 'creative writing', 
-    'journalism', 'translation', 'video production', 'audio editing', 'motion graphics', 'illustration', 'animation', 'customer service', 
-    'conflict resolution', 'teamwork', 'time management', 'adaptability', 'emotional intelligence', 'problem-solving', 
-    'entrepreneurship', 'business development', 'competitive analysis', 'investor relations', 'corporate communications', 'legal compliance', 
-    'regulatory affairs', 'healthcare management', 'medical research', 'pharmaceutical sales', 'biotechnology', 'environmental science', 
-    'sustainability','renewable energy', 'mechanical engineering', 'electrical engineering', 'civil engineering','construction management', 
-    'real estate', 'hospitality management', 'tourism', 'retail management', 'fashion design', 'interior design', 'architecture', 
-    'teaching', 'curriculum development', 'instructional design', 'e-learning', 'corporate training', 'coaching', 'mentoring', 'career counseling', 
-    'psychology', 'counseling', 'therapy', 'mental health', 'business management',
-]
-
-# Extract text from PDF using pdfplumber
-def extract_text_from_pdf(file) -> str:
-    text = ""
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import metrics
+from skill_matcher import SkillMatch
+from taxonomy import get_taxonomy
+
+# Bump whenever extraction output changes, so cached results are not reused
+PARSER_VERSION = "1"
+
+# spaCy and the format-specific libraries are imported on first use, so importing
+# this module stays cheap for workers and CLIs that never touch them
+SPACY_MODEL = "en_core_web_sm"
+_nlp = None
+
+# Load Spacy model once, on first real use
+def get_nlp():
+    global _nlp
+    if _nlp is None:
+        import spacy
+        _nlp = spacy.load(SPACY_MODEL)
+    return _nlp
+
+# Keeps `parser.nlp` and `parser.SKILLS_DB` working for existing callers without an import-time load
+def __getattr__(name):
+    if name == "nlp":
+        return get_nlp()
+    if name == "SKILLS_DB":
+        return get_skills()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# The skill taxonomy lives in skills.txt (see taxonomy.py) and is reloaded when
+# that file changes, so always go through these rather than caching the result
+def get_skill_matcher():
+    return get_taxonomy().matcher
+
+def get_skills() -> List[str]:
+    """Canonical skill names of the current taxonomy."""
+    return get_taxonomy().skills
+
+def extraction_version() -> str:
+    """PARSER_VERSION plus every extractor's version; changes whenever extracted fields could."""
+    versions = extractor_versions()
+    return PARSER_VERSION + "+" + ",".join(f"{name}={versions[name]}" for name in sorted(versions))
+
+# ------------ Text Extraction ------------
+
+# Guards so one pathological upload can't stall a worker. Pages past the
+# limit are ignored; files over the byte limit are rejected outright.
+PDF_MAX_PAGES = 200
+PDF_MAX_BYTES = 50 * 1024 * 1024
+
+class ExtractionLimitError(ValueError):
+    """
+    Raised when an upload exceeds a configured extraction limit. `limit` names
+    the limit (bytes, decompressed_bytes, pages, chars, timeout or memory) and
+    `maximum` is its configured value.
+    """
+
+    def __init__(self, message: str, limit: Optional[str] = None, maximum=None):
+        super().__init__(message)
+        self.limit = limit
+        self.maximum = maximum
+
+    # Keep limit/maximum when the error crosses a process boundary
+    def __reduce__(self):
+        return type(self), (str(self), self.limit, self.maximum)
+
+    def to_dict(self) -> Dict:
+        return {"error": str(self), "limit": self.limit, "maximum": self.maximum}
+
+# Hard limits for extracting untrusted uploads; see extract_text(limits=...)
+class ExtractionLimits(NamedTuple):
+    max_bytes: Optional[int] = 25 * 1024 * 1024
+    # Uncompressed size of the DOCX parts that are read
+    max_decompressed_bytes: Optional[int] = 100 * 1024 * 1024
+    max_pages: Optional[int] = PDF_MAX_PAGES
+    max_chars: Optional[int] = 1_000_000
+    # Wall-clock seconds per file
+    timeout: Optional[float] = 30.0
+    # Address-space cap for sandboxed worker processes (see sandbox.py)
+    max_memory_bytes: Optional[int] = 1024 * 1024 * 1024
+
+GUARDED_LIMITS = ExtractionLimits()
+
+class _Budget:
+    """What is left of one file's limits while it is being extracted."""
+
+    def __init__(self, limits: ExtractionLimits):
+        self.limits = limits
+        self.deadline = time.monotonic() + limits.timeout if limits.timeout else None
+        self.chars = 0
+        self.decompressed = 0
+
+    def check_time(self) -> None:
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ExtractionLimitError(f"Extraction took longer than {self.limits.timeout}s",
+                                       "timeout", self.limits.timeout)
+
+    def add_chars(self, count: int) -> None:
+        self.chars += count
+        if self.limits.max_chars is not None and self.chars > self.limits.max_chars:
+            raise ExtractionLimitError(f"File contains more than {self.limits.max_chars} characters of text",
+                                       "chars", self.limits.max_chars)
+
+    def add_decompressed(self, count: int) -> None:
+        self.decompressed += count
+        self.check_decompressed(self.decompressed)
+
+    def check_decompressed(self, total: int) -> None:
+        if self.limits.max_decompressed_bytes is not None and total > self.limits.max_decompressed_bytes:
+            raise ExtractionLimitError(f"File expands to more than {self.limits.max_decompressed_bytes} bytes",
+                                       "decompressed_bytes", self.limits.max_decompressed_bytes)
+
+class _BudgetedReader(io.RawIOBase):
+    # Counts bytes coming out of a decompressing stream, so a zip bomb is stopped
+    # after max_decompressed_bytes rather than after it has been inflated
+    def __init__(self, stream, budget: _Budget):
+        self._stream = stream
+        self._budget = budget
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._stream.read(len(buffer))
+        self._budget.add_decompressed(len(data))
+        self._budget.check_time()
+        buffer[:len(data)] = data
+        return len(data)
+
+@contextmanager
+def _alarm(seconds: Optional[float]):
+    # Interrupts extraction stuck inside a single page or XML part. Signals only
+    # work on the main thread, so elsewhere the per-page deadline checks apply alone.
+    if not seconds or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expired(signum, frame):
+        raise ExtractionLimitError(f"Extraction took longer than {seconds}s", "timeout", seconds)
+
+    previous = signal.signal(signal.SIGALRM, expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def _file_size(file) -> int:
+    if isinstance(file, (str, os.PathLike)):
+        return os.path.getsize(file)
+    position = file.tell()
+    size = file.seek(0, os.SEEK_END)
+    file.seek(position)
+    return size
+
+def _check_size(file, max_bytes: Optional[int]) -> None:
+    if max_bytes is not None and _file_size(file) > max_bytes:
+        raise ExtractionLimitError(f"File is larger than {max_bytes} bytes", "bytes", max_bytes)
+
+# Yield the text of each PDF page in order, releasing each page's layout cache as it goes
+# With a budget, documents over its page limit are rejected instead of truncated
+def iter_pdf_pages(file, max_pages: Optional[int] = PDF_MAX_PAGES, max_bytes: Optional[int] = PDF_MAX_BYTES,
+                   budget: Optional[_Budget] = None) -> Iterator[str]:
+    import pdfplumber
+    _check_size(file, max_bytes)
     with pdfplumber.open(file) as pdf:
-        for page in pdf.pages:
+        if budget is not None and budget.limits.max_pages is not None and len(pdf.pages) > budget.limits.max_pages:
+            raise ExtractionLimitError(f"PDF has more than {budget.limits.max_pages} pages",
+                                       "pages", budget.limits.max_pages)
+        for page in pdf.pages[:max_pages]:
+            if budget is not None:
+                budget.check_time()
             page_text = page.extract_text()
+            page.flush_cache()
+            metrics.inc("pdf_pages_total", help="PDF pages extracted.")
             if page_text:
-                text += page_text + "\n"
-    return text
-
-# Extract text from DOCX using docx2txt
-def extract_text_from_docx(file) -> str:
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-        tmp.write(file.read())
-        tmp_path = tmp.name
-    return docx2txt.process(tmp_path)
-
-# Master extractor: calls individual field extractors
-def extract_fields(text: str) -> Dict[str, str]:
-    fields = {
-        "name": extract_name(text),
-        "email": extract_email(text),
-        "phone": extract_phone(text),
-        "skills": extract_skills(text),
-        "education": extract_section(text, "education"),
-        "experience": extract_section(text, "experience"),
-        "linkedin_url": extract_links(text)["LinkedIn"],
-        "github_url": extract_links(text)["GitHub"],
-    }
+                if budget is not None:
+                    budget.add_chars(len(page_text))
+                yield page_text
+
+# Extract text from PDF using pdfplumber; pages are joined once at the end
+@metrics.instrument("parser.extract_text_from_pdf")
+def extract_text_from_pdf(file, max_pages: Optional[int] = PDF_MAX_PAGES, max_bytes: Optional[int] = PDF_MAX_BYTES,
+                          budget: Optional[_Budget] = None) -> str:
+    return "".join(page + "\n" for page in iter_pdf_pages(file, max_pages, max_bytes, budget=budget))
+
+# WordprocessingML namespace and the parts read for text, in output order
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_HEADER_RE = re.compile(r"word/header[0-9]*\.xml")
+_DOCX_FOOTER_RE = re.compile(r"word/footer[0-9]*\.xml")
+
+def _iter_docx_xml_text(stream) -> Iterator[str]:
+    # Streams one WordprocessingML part, discarding elements once they are read.
+    # Output matches docx2txt: paragraphs open with a blank line, tabs and breaks are kept.
+    from xml.etree.ElementTree import iterparse
+    for event, elem in iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == _W + "p":
+                yield "\n\n"
+            elif tag == _W + "tab":
+                yield "\t"
+            elif tag in (_W + "br", _W + "cr"):
+                yield "\n"
+        else:
+            if tag == _W + "t" and elem.text:
+                yield elem.text
+            elem.clear()
+
+# Extract text from DOCX straight from the in-memory zip, without temp files
+@metrics.instrument("parser.extract_text_from_docx")
+def extract_text_from_docx(file, budget: Optional[_Budget] = None) -> str:
+    import zipfile
+    with zipfile.ZipFile(file) as docx:
+        names = docx.namelist()
+        parts = [name for name in names if _DOCX_HEADER_RE.match(name)]
+        parts.append("word/document.xml")
+        parts += [name for name in names if _DOCX_FOOTER_RE.match(name)]
+        if budget is not None:
+            # Cheap early reject on the declared sizes; the reader enforces the real ones
+            budget.check_decompressed(sum(docx.getinfo(part).file_size for part in parts))
+        chunks = []
+        for part in parts:
+            with docx.open(part) as stream:
+                if budget is None:
+                    chunks.extend(_iter_docx_xml_text(stream))
+                    continue
+                for chunk in _iter_docx_xml_text(io.BufferedReader(_BudgetedReader(stream, budget))):
+                    budget.add_chars(len(chunk))
+                    chunks.append(chunk)
+    return "".join(chunks).strip()
+
+# Extract text from a PDF or DOCX, picking the extractor from the file name.
+# Untrusted uploads should pass `limits`: every limit is then enforced and a
+# breach raises ExtractionLimitError instead of exhausting the worker.
+def extract_text(file, filename: str, limits: Optional[ExtractionLimits] = None) -> str:
+    extension = os.path.splitext(filename)[1].lower()
+    if metrics.ENABLED:
+        metrics.inc("bytes_processed_total", _file_size(file), help="Raw upload bytes handed to text extraction.",
+                    format=extension.lstrip(".") or "unknown")
+    if extension not in (".pdf", ".docx"):
+        raise ValueError(f"Unsupported file format: {extension or filename}")
+    if limits is None:
+        return extract_text_from_pdf(file) if extension == ".pdf" else extract_text_from_docx(file)
+
+    _check_size(file, limits.max_bytes)
+    budget = _Budget(limits)
+    try:
+        with _alarm(limits.timeout):
+            if extension == ".pdf":
+                return extract_text_from_pdf(file, max_pages=None, max_bytes=None, budget=budget)
+            return extract_text_from_docx(file, budget=budget)
+    except Exception as e:
+        error = _limit_error(e, limits)
+        if error is None:
+            raise
+        metrics.inc("extraction_limit_errors_total", help="Uploads rejected for exceeding an extraction limit.",
+                    limit=error.limit or "unknown")
+        raise error from None
+
+def _limit_error(error: BaseException, limits: ExtractionLimits) -> Optional[ExtractionLimitError]:
+    # pdfminer wraps whatever interrupts it, so look through the exception chain
+    while error is not None:
+        if isinstance(error, ExtractionLimitError):
+            return error
+        if isinstance(error, MemoryError):
+            return ExtractionLimitError("Ran out of memory extracting this file", "memory", limits.max_memory_bytes)
+        error = error.__cause__ or error.__context__
+    return None
+
+# Master extractor: segments the text once and runs every field extractor on it.
+# With `extractors`, only those run and only their fields are returned.
+@metrics.instrument("parser.extract_fields")
+def extract_fields(text: str, extractors: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    doc = ResumeDocument(text)
+    fields = {}
+    for extractor in (EXTRACTORS if extractors is None else extractors):
+        fields.update(EXTRACTORS[extractor](doc))
     return fields
 
+# ------------ Document Segmentation ------------
+
+# Any line containing one of these words is treated as a section header
+SECTION_KEYWORDS = ["skills", "projects", "certifications", "languages", "hobbies", "experience", "education"]
+
+class ResumeDocument:
+    """
+    Resume text split into lines once, with a lowercase view and the section
+    headers found on each line. Field extractors share one instance instead
+    of re-splitting and re-lowercasing the full text.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lines = text.split('\n')
+        self.lower_lines = [line.lower() for line in self.lines]
+        self.non_empty_lines = [line.strip() for line in self.lines if line.strip()]
+        # Section keywords mentioned on each line, and keyword -> first line mentioning it
+        self.line_keywords = [
+            frozenset(keyword for keyword in SECTION_KEYWORDS if keyword in lower) for lower in self.lower_lines
+        ]
+        self.headers: Dict[str, int] = {}
+        for index, keywords in enumerate(self.line_keywords):
+            for keyword in keywords:
+                self.headers.setdefault(keyword, index)
+        self._sections: Dict[str, str] = {}
+
+    def _mentions(self, index: int, name: str) -> bool:
+        if name in SECTION_KEYWORDS:
+            return name in self.line_keywords[index]
+        return name in self.lower_lines[index]
+
+    def section_span(self, name: str) -> Optional[Tuple[int, int]]:
+        """
+        Line span (start, end) of the body of section `name`: the lines after
+        its first header up to the next blank line or other header. Lines that
+        repeat the section's own name are skipped rather than ending it.
+        """
+        name = name.lower()
+        if name in self.headers:
+            start = self.headers[name]
+        elif name in SECTION_KEYWORDS:
+            return None
+        else:
+            start = next((i for i, lower in enumerate(self.lower_lines) if name in lower), None)
+            if start is None:
+                return None
+        end = start + 1
+        while end < len(self.lines):
+            if not self._mentions(end, name) and (not self.lines[end].strip() or self.line_keywords[end]):
+                break
+            end += 1
+        return start, end
+
+    def section_spans(self) -> Dict[str, Tuple[int, int]]:
+        # Spans of every section header detected in the document
+        return {keyword: self.section_span(keyword) for keyword in self.headers}
+
+    def section(self, name: str) -> str:
+        name = name.lower()
+        if name not in self._sections:
+            span = self.section_span(name)
+            content = ""
+            if span:
+                content = "\n".join(
+                    self.lines[i] for i in range(span[0] + 1, span[1]) if not self._mentions(i, name)
+                ).strip()
+            self._sections[name] = content or "N/A"
+        return self._sections[name]
+
+def _as_document(text) -> ResumeDocument:
+    return text if isinstance(text, ResumeDocument) else ResumeDocument(text)
+
 # ------------ Field Extractor Functions ------------
+# Each extractor accepts raw text or an already segmented ResumeDocument
 
-def extract_name(text: str) -> str:
-    # Returns first non-empty line — simple heuristic
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-    return lines[0] if lines else "N/A"
+EMAIL_RE = re.compile(r'\b[\w\.-]+@[\w\.-]+\.\w{2,4}\b')
+PHONE_RE = re.compile(r'\+?\d[\d\s\-]{8,}')
+LINKEDIN_RE = re.compile(r'(https?://[^\s]+linkedin[^\s]+)', re.IGNORECASE)
+GITHUB_RE = re.compile(r'(https?://[^\s]+github[^\s]+)', re.IGNORECASE)
 
-def extract_email(text: str) -> str:
-    match = re.findall(r'\b[\w\.-]+@[\w\.-]+\.\w{2,4}\b', text)
-    return match[0] if match else "N/A"
-
-def extract_phone(text: str) -> str:
-    match = re.findall(r'\+?\d[\d\s\-]{8,}', text)
-    return match[0] if match else "N/A"
-
-def extract_skills(text: str) -> str:
-    text = text.lower()
-    found_skills = list(set([skill for skill in SKILLS_DB if skill in text]))
-    return ", ".join(sorted(found_skills)) if found_skills else "N/A"
-
-def extract_section(text: str, section_name: str) -> str:
-    lines = text.split('\n')
-    content = ""
-    capture = False
-    for line in lines:
-        if section_name.lower() in line.lower():
-            capture = True
+# Title lines that open many resumes but are never the candidate's name
+NOT_A_NAME_RE = re.compile(
+    r"^(curriculum\s+vitae|r[eé]sum[eé]|cv|bio[\s-]?data|personal\s+(details|information)|contact(\s+information)?)\b",
+    re.IGNORECASE,
+)
+NAME_LABEL_RE = re.compile(r"^name\s*[:\-]\s*", re.IGNORECASE)
+# How far down the page the name is looked for
+NAME_SEARCH_LINES = 8
+
+@metrics.instrument("parser.extract_name")
+def extract_name(text) -> str:
+    # First line near the top that looks like a name: skips document titles
+    # ("CURRICULUM VITAE"), contact lines and section headers; falls back to
+    # the first non-empty line
+    doc = _as_document(text)
+    lines = doc.non_empty_lines
+    for line in lines[:NAME_SEARCH_LINES]:
+        line = NAME_LABEL_RE.sub("", line)
+        if not line or NOT_A_NAME_RE.match(line) or EMAIL_RE.search(line) or PHONE_RE.search(line):
+            continue
+        lower = line.lower()
+        if "http" in lower or "www." in lower or any(keyword in lower for keyword in SECTION_KEYWORDS):
             continue
-        elif capture and (line.strip() == "" or any(x in line.lower() for x in [
-            "skills", "projects", "certifications", "languages", "hobbies", "experience", "education"
-        ])):
-            break
-        elif capture:
-            content += line + "\n"
-    return content.strip() if content else "N/A"
-
-def extract_links(text: str) -> Dict[str, str]:
-    linkedin = re.findall(r'(https?://[^\s]+linkedin[^\s]+)', text, re.IGNORECASE)
-    github = re.findall(r'(https?://[^\s]+github[^\s]+)', text, re.IGNORECASE)
+        if len(line.split()) > 5 or any(char.isdigit() for char in line):
+            continue
+        return line
+    return lines[0] if lines else "N/A"
+
+@metrics.instrument("parser.extract_email")
+def extract_email(text) -> str:
+    match = EMAIL_RE.search(_as_document(text).text)
+    return match.group() if match else "N/A"
+
+@metrics.instrument("parser.extract_phone")
+def extract_phone(text) -> str:
+    match = PHONE_RE.search(_as_document(text).text)
+    return match.group() if match else "N/A"
+
+@metrics.instrument("parser.extract_skills")
+def extract_skills(text) -> str:
+    found_skills = get_skill_matcher().find_skills(_as_document(text).text)
+    return ", ".join(found_skills) if found_skills else "N/A"
+
+# Every skill occurrence with its character offsets, e.g. for highlighting
+def find_skill_spans(text) -> List[SkillMatch]:
+    return get_skill_matcher().find_all(_as_document(text).text)
+
+@metrics.instrument("parser.extract_section")
+def extract_section(text, section_name: str) -> str:
+    return _as_document(text).section(section_name)
+
+@metrics.instrument("parser.extract_links")
+def extract_links(text) -> Dict[str, str]:
+    text = _as_document(text).text
+    linkedin = LINKEDIN_RE.search(text)
+    github = GITHUB_RE.search(text)
     return {
-        "LinkedIn": linkedin[0] if linkedin else "N/A",
-        "GitHub": github[0] if github else "N/A"
-    }
\ No newline at end of file
+        "LinkedIn": linkedin.group(1) if linkedin else "N/A",
+        "GitHub": github.group(1) if github else "N/A"
+    }
+
+# ------------ Extractor Registry ------------
+
+def _link_fields(links: Dict[str, str]) -> Dict[str, str]:
+    return {"linkedin_url": links["LinkedIn"], "github_url": links["GitHub"]}
+
+# Extractor name -> function from a ResumeDocument to the fields it fills, in output order
+EXTRACTORS = {
+    "name": lambda doc: {"name": extract_name(doc)},
+    "email": lambda doc: {"email": extract_email(doc)},
+    "phone": lambda doc: {"phone": extract_phone(doc)},
+    "skills": lambda doc: {"skills": extract_skills(doc)},
+    "education": lambda doc: {"education": extract_section(doc, "education")},
+    "experience": lambda doc: {"experience": extract_section(doc, "experience")},
+    "links": lambda doc: _link_fields(extract_links(doc)),
+}
+
+# Bump an extractor's version whenever its output for the same text changes;
+# stored records remember the versions they were extracted with, and
+# reprocess.py re-runs just the extractors whose version moved
+EXTRACTOR_VERSIONS = {
+    "name": "2",
+    "email": "1",
+    "phone": "1",
+    "skills": "1",
+    "education": "1",
+    "experience": "1",
+    "links": "1",
+}
+
+def extractor_versions() -> Dict[str, str]:
+    """Current version of every extractor; the skills one also names the taxonomy in use."""
+    versions = dict(EXTRACTOR_VERSIONS)
+    versions["skills"] += "+" + get_taxonomy().version
+    return versions
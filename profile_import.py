@@ -0,0 +1,74 @@
+"""
+Import-cost report for the parser module.
+
+Imports `parser` in a fresh interpreter, reports wall time, Python heap
+allocated during the import and RSS growth, and checks that none of the
+heavy optional libraries were pulled in. Exits non-zero when a budget is
+exceeded, so it can be used as a CI gate:
+
+    python profile_import.py
+    python profile_import.py --module parser --max-ms 150 --max-mb 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Libraries that must only load when a feature actually needs them
+LAZY_MODULES = ("spacy", "pdfplumber")
+
+_PROBE = r"""
+import json, resource, sys, time, tracemalloc
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+tracemalloc.start()
+started = time.perf_counter()
+__import__(sys.argv[1])
+elapsed = time.perf_counter() - started
+_, peak = tracemalloc.get_traced_memory()
+rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "import_ms": elapsed * 1000,
+    "heap_peak_mb": peak / 2**20,
+    "rss_growth_mb": (rss_after - rss_before) / 1024,
+    "loaded": sorted(m for m in json.loads(sys.argv[2]) if m in sys.modules),
+}))
+"""
+
+
+def profile_import(module: str = "parser") -> dict:
+    here = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE, module, json.dumps(LAZY_MODULES)],
+        cwd=here, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Report import time and memory for a module.")
+    arg_parser.add_argument("--module", default="parser")
+    arg_parser.add_argument("--max-ms", type=float, default=150.0, help="import time budget")
+    arg_parser.add_argument("--max-mb", type=float, default=20.0, help="heap/RSS growth budget")
+    arg_parser.add_argument("--runs", type=int, default=5, help="report the best of N cold imports")
+    args = arg_parser.parse_args(argv)
+
+    reports = [profile_import(args.module) for _ in range(args.runs)]
+    best = min(reports, key=lambda report: report["import_ms"])
+    print(f"import {args.module}: {best['import_ms']:.1f}ms "
+          f"(heap peak {best['heap_peak_mb']:.2f}MB, rss +{best['rss_growth_mb']:.2f}MB)")
+
+    failures = []
+    if best["import_ms"] > args.max_ms:
+        failures.append(f"import time {best['import_ms']:.1f}ms exceeds {args.max_ms}ms")
+    if max(best["heap_peak_mb"], best["rss_growth_mb"]) > args.max_mb:
+        failures.append(f"memory growth exceeds {args.max_mb}MB")
+    if best["loaded"]:
+        failures.append(f"eagerly imported: {', '.join(best['loaded'])}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
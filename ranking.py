@@ -0,0 +1,234 @@
+"""
+Rank parsed resumes against a job description by skill overlap.
+
+Every stored resume's skills are encoded as one bit-packed row of a
+(resumes x taxonomy skills) matrix, built from the resume_skills table and
+kept in memory. The matrix is refreshed incrementally as new resumes are
+saved and rebuilt when rows are deleted or the taxonomy changes. Scoring a
+job against the whole pool is a column gather plus one matrix-vector
+product, followed by a partial sort for the top k, so it stays fast with
+hundreds of thousands of candidates.
+
+Skills are weighted by inverse document frequency, so rare skills count for
+more than ones nearly every resume lists. Two scores are available:
+
+    cosine   cosine similarity between the job and candidate skill vectors;
+             favours candidates whose profile is focused on the job
+    overlap  share of the job's (weighted) skills the candidate has
+"""
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+import db
+import metrics
+from db import get_connection, get_index_revision, get_parsed_records
+from parser import get_skill_matcher, get_skills
+
+METHODS = ("cosine", "overlap")
+DEFAULT_TOP_K = 20
+# Rows packed per step while building, bounds the temporary dense block
+_PACK_ROWS = 8192
+
+
+class SkillMatrix:
+    """Bit-packed resume x skill matrix plus the per-row metadata needed to score it."""
+
+    def __init__(self, vocabulary):
+        self.vocabulary = tuple(vocabulary)
+        self.index = {skill: column for column, skill in enumerate(self.vocabulary)}
+        self.ids = np.empty(0, dtype=np.int64)
+        self.user_ids = np.empty(0, dtype=np.int64)
+        self.bits = np.empty((0, (len(self.vocabulary) + 7) // 8), dtype=np.uint8)
+        self.doc_freq = np.zeros(len(self.vocabulary), dtype=np.int64)
+        self.idf = np.ones(len(self.vocabulary), dtype=np.float32)
+        self.norms = np.empty(0, dtype=np.float32)
+        # Rows in parsed_data covered so far (including resumes without skills) and the last id seen
+        self.count = 0
+        self.max_id = 0
+        # db.get_index_revision("skills") when built; it moves when stored skills are rewritten
+        self.revision = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, resumes: List[tuple]) -> None:
+        """Add (resume_id, user_id, [skills]) rows; resumes with no known skills are counted but not stored."""
+        ids, user_ids, rows, cols = [], [], [], []
+        for resume_id, user_id, skills in resumes:
+            columns = {self.index[skill] for skill in skills if skill in self.index}
+            self.count += 1
+            self.max_id = max(self.max_id, resume_id)
+            if not columns:
+                continue
+            for column in columns:
+                rows.append(len(ids))
+                cols.append(column)
+            ids.append(resume_id)
+            user_ids.append(user_id)
+        if not ids:
+            return
+
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        packed = []
+        for start in range(0, len(ids), _PACK_ROWS):
+            stop = min(start + _PACK_ROWS, len(ids))
+            dense = np.zeros((stop - start, len(self.vocabulary)), dtype=bool)
+            mask = (rows >= start) & (rows < stop)
+            dense[rows[mask] - start, cols[mask]] = True
+            packed.append(np.packbits(dense, axis=1))
+
+        self.ids = np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)])
+        self.user_ids = np.concatenate([self.user_ids, np.asarray(user_ids, dtype=np.int64)])
+        self.bits = np.concatenate([self.bits] + packed)
+        self.doc_freq += np.bincount(cols, minlength=len(self.vocabulary))
+        self._reweight()
+
+    def _reweight(self) -> None:
+        # Smoothed IDF; every candidate's norm depends on it, so recompute both together
+        self.idf = (np.log((1 + len(self)) / (1 + self.doc_freq)) + 1).astype(np.float32)
+        squared = np.zeros(len(self), dtype=np.float32)
+        for start in range(0, len(self), _PACK_ROWS):
+            block = np.unpackbits(self.bits[start:start + _PACK_ROWS], axis=1, count=len(self.vocabulary))
+            squared[start:start + _PACK_ROWS] = block @ (self.idf ** 2)
+        self.norms = np.sqrt(squared)
+
+    def hits(self, columns: np.ndarray) -> np.ndarray:
+        """(resumes x len(columns)) 0/1 matrix: which of the given skills each resume has."""
+        # np.packbits is big-endian within a byte: column c lives in bit 7 - c % 8 of byte c // 8
+        return (self.bits[:, columns >> 3] >> (7 - (columns & 7)).astype(np.uint8)) & 1
+
+
+_matrix: Optional[SkillMatrix] = None
+_matrix_source = None
+_matrix_lock = threading.Lock()
+
+
+def _vocabulary():
+    return sorted(get_skills())
+
+
+def _load(matrix: SkillMatrix, after_id: int) -> None:
+    # One statement, so the rows and their skills come from the same snapshot
+    cursor = get_connection().execute('''
+        SELECT p.id, p.user_id, k.name
+        FROM parsed_data p
+        LEFT JOIN resume_skills s ON s.resume_id = p.id
+        LEFT JOIN skills k ON k.id = s.skill_id
+        WHERE p.id > ?
+        ORDER BY p.id
+    ''', (after_id,))
+    resumes, current = [], None
+    for resume_id, user_id, skill in cursor:
+        if current is None or current[0] != resume_id:
+            current = (resume_id, user_id, [])
+            resumes.append(current)
+        if skill is not None:
+            current[2].append(skill)
+    matrix.append(resumes)
+
+
+@metrics.instrument("ranking.get_skill_matrix")
+def get_skill_matrix() -> SkillMatrix:
+    """
+    The cached skill matrix, brought up to date with parsed_data. New resumes
+    are appended; if any covered row was deleted or had its skills
+    re-extracted (see reprocess.py) the matrix is rebuilt.
+    """
+    global _matrix, _matrix_source
+    vocabulary = _vocabulary()
+    revision = get_index_revision("skills")
+    with _matrix_lock:
+        matrix = _matrix
+        if matrix is not None and matrix.revision != revision:
+            matrix = None
+        if matrix is not None and (_matrix_source != db.DB_NAME or list(matrix.vocabulary) != vocabulary):
+            matrix = None
+        if matrix is not None:
+            covered = get_connection().execute(
+                "SELECT COUNT(*) FROM parsed_data WHERE id <= ?", (matrix.max_id,)
+            ).fetchone()[0]
+            if covered != matrix.count:
+                matrix = None
+        if matrix is None:
+            matrix = SkillMatrix(vocabulary)
+            matrix.revision = revision
+        _load(matrix, matrix.max_id)
+        _matrix, _matrix_source = matrix, db.DB_NAME
+        return matrix
+
+
+def invalidate() -> None:
+    """Drop the cached matrix; the next ranking rebuilds it from the database."""
+    global _matrix
+    with _matrix_lock:
+        _matrix = None
+
+
+def job_skills(job_description: str) -> List[str]:
+    """Taxonomy skills mentioned in a job description."""
+    return get_skill_matcher().find_skills(job_description or "")
+
+
+@metrics.instrument("ranking.rank_candidates")
+def rank_candidates(job_description: str = None, skills: Iterable[str] = (), user_id: int = None,
+                    top_k: int = DEFAULT_TOP_K, method: str = "cosine",
+                    weights: Dict[str, float] = None) -> dict:
+    """
+    Best-matching stored resumes for a job.
+
+    job_description  free text; the skills it mentions are used
+    skills           extra skills to require, on top of those in the text
+    weights          optional per-skill multipliers (default 1.0)
+    user_id          only rank this user's uploads (None ranks everything)
+
+    Returns {"job_skills": [...], "unknown_skills": [...], "results": [...]},
+    where each result is a history record plus score, matched_skills and
+    missing_skills. Candidates sharing no skill with the job are left out.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}")
+    weights = {skill.lower(): weight for skill, weight in (weights or {}).items()}
+    wanted = set(job_skills(job_description)) | {skill.strip().lower() for skill in skills if skill.strip()}
+
+    matrix = get_skill_matrix()
+    known = sorted(skill for skill in wanted if skill in matrix.index)
+    report = {"job_skills": known, "unknown_skills": sorted(wanted - set(known)), "results": []}
+    if not known or not len(matrix) or top_k <= 0:
+        return report
+
+    columns = np.array([matrix.index[skill] for skill in known], dtype=np.int64)
+    job_weights = np.array([weights.get(skill, 1.0) for skill in known], dtype=np.float32)
+    hits = matrix.hits(columns)
+    if method == "cosine":
+        idf = matrix.idf[columns]
+        query = job_weights * idf
+        scores = (hits @ (query * idf)) / (matrix.norms * float(np.linalg.norm(query)) + 1e-12)
+    else:
+        query = job_weights * matrix.idf[columns]
+        scores = (hits @ query) / float(query.sum())
+
+    if user_id is not None:
+        scores = np.where(matrix.user_ids == user_id, scores, 0)
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > top_k:
+        # Keep everything tied with the k-th score so the cut below is deterministic
+        kth = -np.partition(-scores[candidates], top_k - 1)[top_k - 1]
+        candidates = candidates[scores[candidates] >= kth]
+    # Best score first, older resume first on ties
+    candidates = candidates[np.lexsort((matrix.ids[candidates], -scores[candidates]))][:top_k]
+
+    records = {record["id"]: record for record in get_parsed_records(int(i) for i in matrix.ids[candidates])}
+    for row in candidates:
+        record = records.get(int(matrix.ids[row]))
+        if record is None:
+            # Deleted since the matrix was refreshed
+            continue
+        matched = hits[row].astype(bool)
+        record["score"] = round(float(scores[row]), 4)
+        record["matched_skills"] = [skill for skill, hit in zip(known, matched) if hit]
+        record["missing_skills"] = [skill for skill, hit in zip(known, matched) if not hit]
+        report["results"].append(record)
+    return report
@@ -0,0 +1,179 @@
+"""
+Re-run field extraction over stored resume text after parser rules change.
+
+    python reprocess.py                         # every record with stale fields
+    python reprocess.py --user-id 1 --workers 8
+    python reprocess.py --extractors skills --force
+    python reprocess.py --dry-run
+    python reprocess.py --ner                   # names from spaCy NER (see ner.py)
+
+Each record keeps the text it was parsed from and the extractor versions
+that produced its fields (parser.extractor_versions()). Only extractors
+whose version has changed since are re-run, only over that stored text, so
+no PDF or DOCX is decoded again. Records saved before the text was stored
+can't be refreshed this way; they are counted and left alone.
+
+Names taken from NER (--ner) stay as they are on a plain run; only another
+--ner run, or --force, replaces them.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional
+
+from db import (DEFAULT_BATCH_SIZE, count_stored_text, get_stored_text_page, initialize_database,
+                update_parsed_fields)
+from ner import is_ner_version
+from parser import EXTRACTORS, extract_fields, extractor_versions
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 2.0
+
+
+def stale_extractors(stored: Dict[str, str], current: Dict[str, str], only: Iterable[str] = None,
+                     force: bool = False) -> List[str]:
+    candidates = list(only) if only else list(current)
+    if force:
+        return candidates
+    return [
+        name for name in candidates
+        if stored.get(name) != current[name]
+        and not (name == "name" and is_ner_version(stored.get(name), current[name]))
+    ]
+
+
+def reextract_chunk(rows, ner: bool = False):
+    # Runs in a worker process: rows are (id, text, extractors)
+    results = [
+        (resume_id, extract_fields(text, [name for name in extractors if not (ner and name == "name")]))
+        for resume_id, text, extractors in rows
+    ]
+    if ner:
+        # The whole chunk's names in one batched NER pass
+        from ner import extract_names
+        wanted = [index for index, row in enumerate(rows) if "name" in row[2]]
+        for index, name in zip(wanted, extract_names(rows[index][1] for index in wanted)):
+            results[index][1]["name"] = name
+    return results
+
+
+def reprocess(user_id: int = None, workers: Optional[int] = None, chunk_size: int = DEFAULT_BATCH_SIZE,
+              extractors: Iterable[str] = None, force: bool = False, dry_run: bool = False,
+              ner: bool = False, progress=sys.stderr) -> Dict:
+    """
+    Refresh stale fields of stored records and return counts: checked,
+    updated, up_to_date, no_text and, per extractor, how many records it re-ran on.
+    With ner, names come from ner.extract_names and carry its version.
+    """
+    if ner:
+        from ner import ner_versions
+        current = ner_versions()
+    else:
+        current = extractor_versions()
+    extractors = list(extractors) if extractors else None
+    unknown = set(extractors or ()) - set(EXTRACTORS)
+    if unknown:
+        raise ValueError(f"Unknown extractor: {', '.join(sorted(unknown))}")
+
+    total, no_text = count_stored_text(user_id)
+    stats = {"checked": 0, "updated": 0, "up_to_date": 0, "no_text": no_text,
+             "extractors": {name: 0 for name in current}}
+    started = last_report = time.perf_counter()
+
+    def report(final=False):
+        nonlocal last_report
+        now = time.perf_counter()
+        if progress is None or (not final and now - last_report < PROGRESS_INTERVAL):
+            return
+        last_report = now
+        rate = stats["checked"] / (now - started) if now > started else 0.0
+        eta = (total - stats["checked"]) / rate if rate else 0.0
+        print(f"{stats['checked']}/{total} checked, {stats['updated']} updated "
+              f"({rate:.0f} records/sec, ~{eta:.0f}s left)", file=progress)
+
+    def apply(results, planned):
+        updates = [
+            (resume_id, fields, {**planned[resume_id][0], **{name: current[name] for name in planned[resume_id][1]}})
+            for resume_id, fields in results
+        ]
+        if not dry_run:
+            update_parsed_fields(updates)
+        stats["updated"] += len(updates)
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    in_flight = {}
+    max_in_flight = 2 * (workers or os.cpu_count() or 1)
+    try:
+        after_id = 0
+        while True:
+            page = get_stored_text_page(after_id, chunk_size, user_id)
+            if not page:
+                break
+            after_id = page[-1][0]
+            stats["checked"] += len(page)
+
+            planned, rows = {}, []
+            for resume_id, text, stored in page:
+                names = stale_extractors(stored, current, extractors, force)
+                if not names:
+                    stats["up_to_date"] += 1
+                    continue
+                for name in names:
+                    stats["extractors"][name] += 1
+                planned[resume_id] = (stored, names)
+                rows.append((resume_id, text, names))
+            if not rows:
+                report()
+                continue
+
+            if pool is None:
+                apply(reextract_chunk(rows, ner), planned)
+            else:
+                in_flight[pool.submit(reextract_chunk, rows, ner)] = planned
+                # Bounded read-ahead: wait for a chunk before reading more than the pool can use
+                while len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        apply(future.result(), in_flight.pop(future))
+            report()
+
+        for future in list(in_flight):
+            apply(future.result(), in_flight.pop(future))
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    report(final=True)
+    stats["elapsed"] = time.perf_counter() - started
+    return stats
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Re-extract stale fields from stored resume text.")
+    arg_parser.add_argument("--user-id", type=int, default=None, help="only this user's records")
+    arg_parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    arg_parser.add_argument("--chunk-size", type=int, default=DEFAULT_BATCH_SIZE, help="records per worker task")
+    arg_parser.add_argument("--extractors", help=f"comma-separated subset of: {', '.join(EXTRACTORS)}")
+    arg_parser.add_argument("--force", action="store_true", help="re-run the extractors even if versions match")
+    arg_parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    arg_parser.add_argument("--ner", action="store_true", help="extract names with spaCy NER instead of the regex heuristic")
+    args = arg_parser.parse_args(argv)
+
+    initialize_database()
+    extractors = [name.strip() for name in args.extractors.split(",")] if args.extractors else None
+    try:
+        stats = reprocess(args.user_id, args.workers, args.chunk_size, extractors, args.force, args.dry_run, args.ner)
+    except ValueError as e:
+        arg_parser.error(str(e))
+    verb = "would update" if args.dry_run else "updated"
+    print(f"Checked {stats['checked']} records in {stats['elapsed']:.2f}s: {stats['updated']} {verb}, "
+          f"{stats['up_to_date']} up to date, {stats['no_text']} without stored text")
+    for name, count in stats["extractors"].items():
+        if count:
+            print(f"  {name:<12} re-run on {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Process pools for extracting untrusted uploads.
+
+Each worker caps its own address space (RLIMIT_AS) when it starts, so a
+decompression bomb or a pathological PDF fails with MemoryError inside that
+worker, which extract_text reports as an ExtractionLimitError, instead of
+pushing the whole host into swap or the OOM killer. The other limits
+(bytes, pages, characters, time) are enforced by extract_text itself when it
+is given an ExtractionLimits.
+
+Linux RLIMIT_RSS is not enforced by the kernel, so the cap is on virtual
+memory; set ExtractionLimits.max_memory_bytes with some headroom over the
+interpreter's own footprint. On platforms without the resource module
+(Windows) the pool runs uncapped.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from parser import GUARDED_LIMITS, ExtractionLimits
+
+
+def limit_memory(max_bytes: Optional[int]) -> None:
+    """Cap this process's address space at max_bytes (never raising an existing hard limit)."""
+    if not max_bytes:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        max_bytes = min(max_bytes, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (max_bytes, hard))
+
+
+def sandboxed_pool(max_workers: Optional[int] = None, limits: ExtractionLimits = GUARDED_LIMITS) -> ProcessPoolExecutor:
+    # spawn: workers start from a clean interpreter rather than a copy of a threaded server
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=limit_memory,
+        initargs=(limits.max_memory_bytes,),
+    )
@@ -0,0 +1,223 @@
+import mmap
+import os
+import re
+import struct
+import sys
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# Tokens are runs of letters/digits, optionally followed by '+' or '#' so that
+# skills like "c++" or "c#" survive tokenization. Everything else is a boundary.
+TOKEN_RE = re.compile(r"[a-z0-9]+[+#]*", re.IGNORECASE)
+
+# Marks a trie node that completes a skill
+_END = ""
+
+
+class SkillMatch(NamedTuple):
+    skill: str
+    start: int
+    end: int
+
+
+def tokenize(text: str) -> List[str]:
+    return [token.lower() for token in TOKEN_RE.findall(text)]
+
+
+class SkillMatcher:
+    """Token trie over a skill taxonomy.
+
+    Every skill is split into tokens and inserted into a nested-dict trie, so a
+    lookup only walks as deep as the longest skill starting at each token. A scan
+    is therefore a single pass over the text whose cost does not depend on the
+    number of skills, and matches can only start and end on token boundaries
+    ("java" no longer matches inside "javascript").
+    """
+
+    def __init__(self, skills: Iterable[str]):
+        self._root: Dict[str, dict] = {}
+        self.skills: List[str] = []
+        self._known = set()
+        for skill in skills:
+            self.add(skill)
+
+    def add(self, skill: str, canonical: Optional[str] = None) -> None:
+        # Aliases pass the skill they stand for as `canonical`; matches report that name
+        canonical = canonical or skill
+        tokens = tokenize(skill)
+        if not tokens:
+            return
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if _END not in node:
+            node[_END] = canonical
+            if canonical not in self._known:
+                self._known.add(canonical)
+                self.skills.append(canonical)
+
+    def find_all(self, text: str) -> List[SkillMatch]:
+        # Returns every skill occurrence with character offsets into `text`.
+        # Overlapping matches are all reported, e.g. both "machine learning"
+        # and "quantum machine learning".
+        # Tokens are matched on the original text so offsets stay valid for it
+        spans = [(m.group().lower(), m.start(), m.end()) for m in TOKEN_RE.finditer(text)]
+        matches = []
+        root = self._root
+        for i, (token, start, _) in enumerate(spans):
+            node = root.get(token)
+            j = i
+            while node is not None:
+                skill = node.get(_END)
+                if skill is not None:
+                    matches.append(SkillMatch(skill, start, spans[j][2]))
+                j += 1
+                if j == len(spans):
+                    break
+                node = node.get(spans[j][0])
+        return matches
+
+    def find_skills(self, text: str) -> List[str]:
+        # Distinct skills found in `text`, sorted alphabetically
+        return sorted({match.skill for match in self.find_all(text)})
+
+    def compile(self, path: str, digest: bytes = b"") -> None:
+        """Write the trie to `path` in the binary form read by CompiledSkillMatcher."""
+        tokens = sorted({token for node in _walk(self._root) for token in node if token != _END})
+        token_ids = {token: i for i, token in enumerate(tokens)}
+        skill_ids = {skill: i for i, skill in enumerate(self.skills)}
+
+        # Breadth-first numbering; each node's edges are stored contiguously
+        nodes, edges, order = [], [], [self._root]
+        for node in order:
+            children = sorted((token_ids[token], child) for token, child in node.items() if token != _END)
+            nodes.extend((len(edges) // 2, len(children), skill_ids[node[_END]] if _END in node else -1))
+            for token_id, child in children:
+                edges.extend((token_id, len(order)))
+                order.append(child)
+
+        token_blob, token_offsets = _pack_strings(tokens)
+        skill_blob, skill_offsets = _pack_strings(self.skills)
+        header = _HEADER.pack(
+            _MAGIC, _FORMAT_BYTEORDER, len(tokens), len(order), len(edges) // 2, len(self.skills),
+            len(token_blob), len(skill_blob), digest.ljust(32, b"\0")[:32],
+        )
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(header)
+            f.write(struct.pack(f"={len(token_offsets)}I", *token_offsets))
+            f.write(struct.pack(f"={len(nodes)}i", *nodes))
+            f.write(struct.pack(f"={len(edges)}I", *edges))
+            f.write(struct.pack(f"={len(skill_offsets)}I", *skill_offsets))
+            f.write(token_blob)
+            f.write(skill_blob)
+        # Readers either see the old file or the complete new one
+        os.replace(temp, path)
+
+
+def _walk(node: dict):
+    yield node
+    for token, child in node.items():
+        if token != _END:
+            yield from _walk(child)
+
+
+def _pack_strings(strings: List[str]):
+    blob, offsets = bytearray(), [0]
+    for string in strings:
+        blob += string.encode()
+        offsets.append(len(blob))
+    return bytes(blob), offsets
+
+
+# ------------ Compiled form ------------
+
+# magic, byte order, #tokens, #nodes, #edges, #skills, token blob size, skill blob size, source digest.
+# Arrays are written in native byte order; a file from a different platform is treated as stale.
+_HEADER = struct.Struct("=4s8sIIIIII32s")
+_MAGIC = b"SKM1"
+_FORMAT_BYTEORDER = sys.byteorder.encode().ljust(8, b"\0")
+
+
+class CompiledSkillMatcher:
+    """Read-only SkillMatcher backed by a file written with SkillMatcher.compile.
+
+    The file is memory-mapped rather than parsed, so opening it costs about
+    the same however large the taxonomy is. Trie nodes are decoded into dicts
+    the first time a scan reaches them, after which lookups run at the same
+    speed as the in-memory matcher.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError(f"{path} is not a compiled skill matcher")
+        (magic, byteorder, n_tokens, n_nodes, n_edges, n_skills,
+         token_blob_size, skill_blob_size, self.digest) = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or byteorder != _FORMAT_BYTEORDER:
+            raise ValueError(f"{path} is not a compiled skill matcher for this platform")
+
+        view = memoryview(self._mmap)
+        offset = _HEADER.size
+
+        def section(count: int, fmt: str):
+            nonlocal offset
+            size = count * 4
+            array = view[offset:offset + size].cast(fmt)
+            offset += size
+            return array
+
+        self._token_offsets = section(n_tokens + 1, "I")
+        self._nodes = section(n_nodes * 3, "i")
+        self._edges = section(n_edges * 2, "I")
+        self._skill_offsets = section(n_skills + 1, "I")
+        self._token_blob = view[offset:offset + token_blob_size]
+        self._skill_blob = view[offset + token_blob_size:offset + token_blob_size + skill_blob_size]
+        if len(self._skill_blob) != skill_blob_size:
+            raise ValueError(f"{path} is truncated")
+        self._children: List[Optional[Dict[str, int]]] = [None] * n_nodes
+        self._skill_names: List[Optional[str]] = [None] * n_skills
+
+    @property
+    def skills(self) -> List[str]:
+        return [self._skill(i) for i in range(len(self._skill_names))]
+
+    def _skill(self, skill_id: int) -> str:
+        name = self._skill_names[skill_id]
+        if name is None:
+            start, end = self._skill_offsets[skill_id], self._skill_offsets[skill_id + 1]
+            name = self._skill_names[skill_id] = bytes(self._skill_blob[start:end]).decode()
+        return name
+
+    def _child(self, node: int, token: str) -> Optional[int]:
+        children = self._children[node]
+        if children is None:
+            start, count = self._nodes[3 * node], self._nodes[3 * node + 1]
+            children = {}
+            for edge in range(start, start + count):
+                token_id = self._edges[2 * edge]
+                begin, end = self._token_offsets[token_id], self._token_offsets[token_id + 1]
+                children[bytes(self._token_blob[begin:end]).decode()] = self._edges[2 * edge + 1]
+            self._children[node] = children
+        return children.get(token)
+
+    def find_all(self, text: str) -> List[SkillMatch]:
+        # Same scan as SkillMatcher.find_all, over node ids instead of dicts
+        spans = [(m.group().lower(), m.start(), m.end()) for m in TOKEN_RE.finditer(text)]
+        matches = []
+        nodes = self._nodes
+        for i, (token, start, _) in enumerate(spans):
+            node = self._child(0, token)
+            j = i
+            while node is not None:
+                skill_id = nodes[3 * node + 2]
+                if skill_id >= 0:
+                    matches.append(SkillMatch(self._skill(skill_id), start, spans[j][2]))
+                j += 1
+                if j == len(spans):
+                    break
+                node = self._child(node, spans[j][0])
+        return matches
+
+    def find_skills(self, text: str) -> List[str]:
+        return sorted({match.skill for match in self.find_all(text)})
@@ -0,0 +1,167 @@
+"""
+The skill taxonomy: loaded from skills.txt, compiled, and hot-reloaded.
+
+skills.txt lists one canonical skill per line with optional '|'-separated
+aliases. The first time a given version of the file is used it is compiled
+into skills.bin next to it (see SkillMatcher.compile), keyed by the SHA-256
+of the source, and every later process just memory-maps that artifact.
+
+get_taxonomy() checks the source file's mtime at most every
+RELOAD_CHECK_INTERVAL seconds. When it changes, the new version is compiled
+and swapped in for subsequent parses, so web and worker processes pick up
+taxonomy edits without a restart. A file that fails to load leaves the
+previous taxonomy in place and is reported in `last_error`.
+
+Point RESUME_PARSER_SKILLS at another file to use a different taxonomy.
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import metrics
+from skill_matcher import CompiledSkillMatcher, SkillMatcher, tokenize
+
+TAXONOMY_PATH = os.environ.get(
+    "RESUME_PARSER_SKILLS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills.txt")
+)
+RELOAD_CHECK_INTERVAL = 2.0
+
+
+class TaxonomyError(ValueError):
+    """The taxonomy file is malformed: a bad name or an alias claimed by two skills."""
+
+
+def parse_taxonomy(text: str) -> List[Tuple[str, List[str]]]:
+    """(canonical, aliases) pairs from the skills.txt format, in file order; repeated skills are merged."""
+    entries: Dict[str, List[str]] = {}
+    owners = {}
+    for number, line in enumerate(text.splitlines(), 1):
+        # Only whole-line comments: '#' is part of names like "c#"
+        if line.lstrip().startswith("#"):
+            continue
+        names = [name.strip().lower() for name in line.split("|")]
+        if not names[0]:
+            continue
+        canonical = names[0]
+        aliases = entries.setdefault(canonical, [])
+        for name in names:
+            if "," in name:
+                raise TaxonomyError(f"line {number}: skill names cannot contain commas")
+            key = tuple(tokenize(name))
+            if not key:
+                raise TaxonomyError(f"line {number}: {name!r} has no matchable words")
+            owner = owners.setdefault(key, canonical)
+            if owner != canonical:
+                raise TaxonomyError(f"line {number}: {name!r} already belongs to {owner!r}")
+            if name != canonical and name not in aliases:
+                aliases.append(name)
+    return list(entries.items())
+
+
+def build_matcher(entries: List[Tuple[str, List[str]]]) -> SkillMatcher:
+    matcher = SkillMatcher([])
+    for canonical, aliases in entries:
+        matcher.add(canonical)
+        for alias in aliases:
+            matcher.add(alias, canonical)
+    return matcher
+
+
+def artifact_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".bin"
+
+
+def load_matcher(path: str):
+    """
+    Matcher for the taxonomy at `path` and the source digest it was built
+    from. Uses the compiled artifact when it matches the source, otherwise
+    compiles it; if the artifact can't be written the in-memory matcher is used.
+    """
+    # hashlib pulls in OpenSSL; only pay for it when a taxonomy is actually loaded
+    import hashlib
+
+    with open(path, "rb") as f:
+        source = f.read()
+    digest = hashlib.sha256(source).digest()
+    compiled = artifact_path(path)
+    try:
+        matcher = CompiledSkillMatcher(compiled)
+        if matcher.digest == digest:
+            return matcher, digest
+    except (OSError, ValueError):
+        pass
+
+    matcher = build_matcher(parse_taxonomy(source.decode("utf-8")))
+    try:
+        matcher.compile(compiled, digest)
+        return CompiledSkillMatcher(compiled), digest
+    except OSError:
+        # Read-only install: fall back to the in-memory trie
+        return matcher, digest
+
+
+class Taxonomy:
+    def __init__(self, path: str = TAXONOMY_PATH):
+        self.path = path
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._stat = self._source_stat()
+        self.matcher, self.digest = load_matcher(path)
+
+    def _source_stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @property
+    def skills(self) -> List[str]:
+        return self.matcher.skills
+
+    @property
+    def version(self) -> str:
+        """Short id of the taxonomy contents, for cache keys."""
+        return self.digest.hex()[:12]
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload if the source file changed since the last check. Returns True if it was reloaded."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return False
+        with self._lock:
+            self._checked_at = now
+            stat = self._source_stat()
+            if not force and (stat is None or stat == self._stat):
+                return False
+            self._stat = stat
+            try:
+                matcher, digest = load_matcher(self.path)
+            except (OSError, UnicodeDecodeError, ValueError) as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                metrics.inc("taxonomy_reload_errors_total", help="Skill taxonomy reloads that failed.")
+                return False
+            self.last_error = None
+            if digest == self.digest:
+                return False
+            self.matcher, self.digest = matcher, digest
+            metrics.inc("taxonomy_reloads_total", help="Skill taxonomy reloads picked up at runtime.")
+            return True
+
+
+_taxonomy = None
+_taxonomy_lock = threading.Lock()
+
+
+def get_taxonomy() -> Taxonomy:
+    """The process-wide taxonomy, reloaded first if skills.txt has changed."""
+    global _taxonomy
+    if _taxonomy is None:
+        with _taxonomy_lock:
+            if _taxonomy is None:
+                _taxonomy = Taxonomy()
+        return _taxonomy
+    _taxonomy.refresh()
+    return _taxonomy
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """A fresh DB_NAME in a scratch directory, with this thread's connections closed afterwards."""
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "test.db"))
+    yield db.DB_NAME
+    db.close_connections()
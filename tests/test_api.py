@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+
+import api
+import db
+
+KEY = "test-key"
+
+
+def _serve(coroutine_fn, app):
+    async def run():
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            async with ClientSession(str(server.make_url(""))) as client:
+                return await coroutine_fn(client)
+        finally:
+            await server.close()
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def app(database, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    db.initialize_database()
+    db.add_user("A", "a@example.com", "x")
+    db.save_parsed_batch([(1, {"name": f"Person {i}", "skills": "python"}) for i in range(3)])
+    db.close_connections()
+    return api.create_app(workers=1, api_key=KEY)
+
+
+def test_key_is_required(monkeypatch):
+    monkeypatch.delenv("RESUME_PARSER_API_KEY", raising=False)
+    with pytest.raises(ValueError):
+        api.create_app()
+
+
+def test_requests_need_the_key(app):
+    async def calls(client):
+        missing = await client.get("/history", params={"user_id": 1})
+        wrong = await client.get("/history", params={"user_id": 1}, headers={"X-API-Key": "nope"})
+        ok = await client.get("/history", params={"user_id": 1}, headers={"X-API-Key": KEY})
+        return missing.status, wrong.status, ok.status, len((await ok.json())["items"])
+
+    assert _serve(calls, app) == (401, 401, 200, 3)
+
+
+
+def test_history_limit_must_be_positive(app):
+    async def calls(client):
+        statuses = []
+        for limit in (0, -5, 2, 1000):
+            response = await client.get("/history", params={"user_id": 1, "limit": limit}, headers={"X-API-Key": KEY})
+            statuses.append((response.status, len((await response.json())["items"]) if response.status == 200 else None))
+        return statuses
+
+    assert _serve(calls, app) == [(400, None), (400, None), (200, 2), (200, 3)]
+
+def test_export_disconnect_waits_for_the_running_block(app, monkeypatch):
+    events = []
+    started = threading.Event()
+
+    def slow_export(fmt, user_id, since, until):
+        try:
+            yield b"id\n"
+            started.set()
+            time.sleep(0.5)
+            yield b"1\n"
+            events.append("second block")
+            yield b"2\n"
+        finally:
+            events.append("closed")
+
+    monkeypatch.setattr(api, "iter_export", slow_export)
+
+    async def disconnect(client):
+        response = await client.get("/export", params={"user_id": 1}, headers={"X-API-Key": KEY})
+        await response.content.readany()
+        await asyncio.to_thread(started.wait, 5)
+        response.close()
+        await asyncio.sleep(1)
+
+    _serve(disconnect, app)
+    assert events == ["closed"]
@@ -0,0 +1,76 @@
+import hashlib
+
+import pytest
+
+import auth
+import db
+
+
+@pytest.fixture
+def users(database, monkeypatch):
+    monkeypatch.setattr(auth, "PBKDF2_ITERATIONS", 1000)
+    db.initialize_database()
+    scheduled = []
+    schedule_rehash = auth.schedule_rehash
+    monkeypatch.setattr(auth, "schedule_rehash", lambda *args: scheduled.append(schedule_rehash(*args)))
+    return scheduled
+
+
+def test_hash_round_trip():
+    stored = auth.hash_password("Secret123", iterations=1000)
+    assert stored.startswith("pbkdf2_sha256$1000$")
+    assert stored != auth.hash_password("Secret123", iterations=1000)
+    assert auth.verify_password("Secret123", stored)
+    assert not auth.verify_password("secret123", stored)
+    assert not auth.verify_password("Secret123", "pbkdf2_sha256$x$y$z")
+
+
+def test_needs_rehash(monkeypatch):
+    monkeypatch.setattr(auth, "PBKDF2_ITERATIONS", 2000)
+    assert auth.needs_rehash(hashlib.sha256(b"Secret123").hexdigest())
+    assert auth.needs_rehash(auth.hash_password("Secret123", iterations=1000))
+    assert not auth.needs_rehash(auth.hash_password("Secret123"))
+
+
+def test_signup_and_signin(users):
+    assert auth.handle_signup("Ann", "ann@example.com", "Secret123") == (True, "User registered successfully!")
+    assert auth.handle_signup("Ann", "ann@example.com", "Secret123") == (False, "Email already exists.")
+    ok, user = auth.handle_signin("ann@example.com", "Secret123")
+    assert ok and user == (1, "Ann", "ann@example.com")
+    assert auth.handle_signin("ann@example.com", "Wrong1234") == (False, "Incorrect password.")
+    assert not users
+
+
+def test_legacy_hash_is_upgraded_in_the_background(users):
+    legacy = hashlib.sha256(b"Secret123").hexdigest()
+    db.add_user("Old", "old@example.com", legacy)
+    ok, user = auth.handle_signin("old@example.com", "Secret123")
+    assert ok and user == (1, "Old", "old@example.com")
+    assert len(users) == 1
+    users[0].result(timeout=10)
+    upgraded = db.get_user_by_email("old@example.com")[3]
+    assert upgraded.startswith("pbkdf2_sha256$1000$")
+    assert auth.handle_signin("old@example.com", "Secret123")[0]
+    assert len(users) == 1
+
+
+def test_session_cache():
+    sessions = auth.SessionCache(ttl=60, max_sessions=2)
+    first = sessions.start((1, "A", "a@example.com"))
+    assert sessions.get(first) == (1, "A", "a@example.com")
+    sessions.start((2, "B", "b@example.com"))
+    sessions.start((3, "C", "c@example.com"))
+    # Oldest dropped past max_sessions
+    assert sessions.get(first) is None
+    sessions.end(None)
+    assert sessions.get(None) is None
+
+    expired = auth.SessionCache(ttl=-1)
+    assert expired.get(expired.start((1, "A", "a@example.com"))) is None
+
+
+def test_is_admin(monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", {"ops@example.com"})
+    assert auth.is_admin((1, "Ops", "Ops@Example.com"))
+    assert not auth.is_admin((2, "Ann", "ann@example.com"))
+    assert not auth.is_admin(None)
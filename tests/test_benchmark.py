@@ -0,0 +1,22 @@
+import io
+import time
+
+import benchmark
+import parser
+
+
+def test_corpus_is_reproducible(monkeypatch):
+    corpus = benchmark.generate_corpus(4, seed=3)
+    # A later run, e.g. in another zip timestamp window, must produce the same bytes
+    later = time.time() + 86400
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert benchmark.generate_corpus(4, seed=3) == corpus
+    assert benchmark.generate_corpus(4, seed=3) != benchmark.generate_corpus(4, seed=4)
+
+
+def test_generated_files_parse_back():
+    for filename, data in benchmark.generate_corpus(4, seed=1):
+        fields = parser.extract_fields(parser.extract_text(io.BytesIO(data), filename))
+        assert fields["email"].endswith("@example.com"), filename
+        assert fields["skills"] != "N/A"
+        assert fields["linkedin_url"].startswith("https://www.linkedin.com/in/")
@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+
+import cache
+from cache import ParseCache
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache.db")
+
+
+def _totals(parse_cache):
+    conn = parse_cache._connection()
+    stored = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM parse_cache").fetchone()
+    assert conn.execute("SELECT entries, bytes FROM parse_cache_totals").fetchone() == stored
+    return stored
+
+
+def test_round_trip_and_stats(cache_path):
+    parse_cache = ParseCache(cache_path)
+    assert parse_cache.get("a") is None
+    assert parse_cache.put("a", "text", {"name": "A"})
+    assert parse_cache.get("a") == ("text", {"name": "A"})
+    assert parse_cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_evicts_least_recently_used_by_entries(cache_path):
+    parse_cache = ParseCache(cache_path, max_entries=3)
+    for key in "abc":
+        parse_cache.put(key, key * 10, {})
+    parse_cache.get("a")
+    parse_cache.put("d", "d" * 10, {})
+    assert parse_cache.get("b") is None
+    assert all(parse_cache.get(key) for key in "acd")
+    assert _totals(parse_cache)[0] == 3
+
+
+def test_evicts_by_bytes_and_keeps_totals_in_step(cache_path):
+    parse_cache = ParseCache(cache_path, max_bytes=1000)
+    for i in range(10):
+        parse_cache.put(f"k{i}", "x" * 200, {})
+    # Replacing an entry changes its size rather than adding one
+    parse_cache.put("k9", "x" * 300, {})
+    count, total = _totals(parse_cache)
+    assert total <= 1000
+    assert count == 4
+    assert parse_cache.get("k9")[0] == "x" * 300
+
+
+def test_totals_survive_reopening(cache_path):
+    parse_cache = ParseCache(cache_path)
+    parse_cache.put("a", "text", {})
+    parse_cache.close()
+    assert _totals(ParseCache(cache_path)) == (1, len("text") + len("{}"))
+
+
+def test_replaces_old_layout(cache_path):
+    conn = sqlite3.connect(cache_path)
+    conn.execute("CREATE TABLE parse_cache (key TEXT PRIMARY KEY, text TEXT NOT NULL, fields TEXT NOT NULL, "
+                 "size INTEGER NOT NULL, last_used REAL NOT NULL)")
+    conn.execute("INSERT INTO parse_cache VALUES ('a', 'text', '{}', 6, 0)")
+    conn.commit()
+    conn.close()
+    parse_cache = ParseCache(cache_path)
+    assert parse_cache.get("a") is None
+    assert parse_cache.put("a", "text", {})
+    assert _totals(parse_cache) == (1, 6)
+
+
+def test_failed_put_is_not_fatal(cache_path, monkeypatch):
+    monkeypatch.setattr(cache, "BUSY_TIMEOUT_MS", 50)
+    parse_cache = ParseCache(cache_path)
+    parse_cache.put("a", "text", {})
+    other = sqlite3.connect(cache_path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        assert parse_cache.put("b", "text", {}) is False
+        assert parse_cache.get("a") == ("text", {})
+    finally:
+        other.rollback()
+        other.close()
+    assert parse_cache.get("b") is None
+    assert _totals(parse_cache) == (1, 6)
@@ -0,0 +1,126 @@
+import sqlite3
+import time
+
+import pytest
+
+import db
+
+
+def test_initialize_current_database_takes_no_write_lock(database):
+    db.initialize_database()
+    other = sqlite3.connect(database, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        db.close_connections()
+        db.initialize_database()
+    finally:
+        other.rollback()
+        other.close()
+
+
+def _record(i):
+    return {"name": f"Person {i}", "email": "N/A", "skills": "python"}
+
+
+def test_batch_writer_commits_a_trickle_within_the_interval(database):
+    db.initialize_database()
+    with db.BatchWriter(chunk_size=100, flush_interval=0.5) as writer:
+        started = time.monotonic()
+        first = writer.add(1, _record(0))
+        # Keep adding more often than the interval; the first row must not wait for them to stop
+        while not first.done() and time.monotonic() - started < 3:
+            writer.add(1, _record(1))
+            time.sleep(0.2)
+        assert first.done()
+        assert time.monotonic() - started < 1.5
+    assert db.count_user_history(1) == writer.written
+
+
+def test_batch_writer_surfaces_failed_batches(database, monkeypatch):
+    db.initialize_database()
+
+    def fail(records, chunk_size):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(db, "save_parsed_batch", fail)
+    writer = db.BatchWriter(flush_interval=0.05)
+    future = writer.add(1, _record(0))
+    with pytest.raises(sqlite3.OperationalError):
+        future.result(timeout=5)
+    with pytest.raises(sqlite3.OperationalError):
+        writer.close()
+    # Reported once
+    writer.close()
+
+
+def test_history_pages_cover_every_row_once_despite_timestamp_ties(database):
+    db.initialize_database()
+    db.save_parsed_batch((1, _record(i)) for i in range(23))
+    db.save_parsed_batch([(2, _record(99))])
+    # Several rows per second, so pages must break parsed_on ties by id
+    conn = db.get_connection()
+    conn.execute("UPDATE parsed_data SET parsed_on = '2024-01-0' || (1 + id % 3) || ' 00:00:00'")
+
+    pages, cursor = [], None
+    while True:
+        page, cursor = db.get_user_history_page(1, limit=5, cursor=cursor)
+        pages.append(page)
+        if cursor is None:
+            break
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert [record["id"] for page in pages for record in page] == [r["id"] for r in db.get_user_history(1)]
+    assert db.get_user_history_page(1, limit=23) == (db.get_user_history(1), None)
+
+
+def test_batch_insert_indexes_each_chunk_under_the_right_ids(database):
+    db.initialize_database()
+    records = ((1, {"name": f"Person {i}", "skills": "python" if i % 2 else "sql"}) for i in range(7))
+    assert db.save_parsed_batch(records, chunk_size=3) == 7
+    assert db.count_user_history(1) == 7
+    found = db.search_resumes(user_id=1, skills=["python"])
+    assert sorted(record["name"] for record in found) == ["Person 1", "Person 3", "Person 5"]
+
+
+def test_search_by_skills_and_text(database):
+    db.initialize_database()
+    python_sql = db.save_parsed_data(1, {"name": "Ada", "skills": "python, sql", "experience": "Data platform at Acme"})
+    python_only = db.save_parsed_data(1, {"name": "Bob", "skills": "python", "experience": "Web shop"})
+    other_user = db.save_parsed_data(2, {"name": "Cy", "skills": "python, sql", "experience": "Acme"})
+
+    def ids(**kwargs):
+        return sorted(record["id"] for record in db.search_resumes(**kwargs))
+
+    assert ids(user_id=1, skills=["Python", "SQL"]) == [python_sql]
+    assert ids(user_id=1, skills=["python", "sql"], match_all=False) == [python_sql, python_only]
+    assert ids(skills=["sql"]) == [python_sql, other_user]
+    assert ids(user_id=1, text="acme") == [python_sql]
+    # FTS syntax in user input is matched literally rather than raising
+    assert ids(text='acme" OR "web') == []
+    assert ids(user_id=1, skills=["python"], since_days=1) == [python_sql, python_only]
+
+
+def test_compact_storage_round_trip(database):
+    db.initialize_database()
+    fields = {
+        "name": "Ada", "email": "ada@example.com", "phone": "N/A", "skills": "python, sql",
+        "education": "B.Sc.\nM.Sc.", "experience": "Acme " * 200, "linkedin_url": "N/A", "github_url": "N/A",
+    }
+    resume_id = db.save_parsed_data(1, fields, raw_text="raw resume text")
+    sparse_id = db.save_parsed_data(1, {"name": "Bob"})
+
+    by_id = {record["id"]: record for record in db.get_user_history(1)}
+    assert {column: by_id[resume_id][column] for column in fields} == fields
+    assert by_id[sparse_id]["skills"] == db.MISSING
+    assert db.get_stored_text_page(user_id=1) == [(resume_id, "raw resume text", {})]
+
+    exported = {row[0]: dict(zip(db.EXPORT_COLUMNS, row)) for chunk in db.iter_parsed_data(1) for row in chunk}
+    assert exported[resume_id]["experience"] == fields["experience"]
+    assert exported[sparse_id]["skills"] is None
+
+
+@pytest.mark.parametrize("limit", [0, -1, -5])
+def test_history_page_rejects_limits_below_one(database, limit):
+    db.initialize_database()
+    db.save_parsed_batch((1, _record(i)) for i in range(3))
+    with pytest.raises(ValueError, match="limit"):
+        db.get_user_history_page(1, limit=limit)
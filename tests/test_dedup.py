@@ -0,0 +1,39 @@
+import random
+
+import db
+import dedup
+from benchmark import synthetic_resume
+
+
+def _resume(seed):
+    return "\n".join(synthetic_resume(random.Random(seed), paragraphs=6))
+
+
+def test_similarity_tracks_shared_text():
+    text = _resume(1)
+    same = dedup.minhash_signature(text)
+    assert dedup.similarity(same, dedup.minhash_signature(text)) == 1.0
+    edited = dedup.minhash_signature(text.replace("\n", " ", 1) + "\nOne more line at the end")
+    assert dedup.similarity(same, edited) >= dedup.DEFAULT_THRESHOLD
+    assert dedup.similarity(same, dedup.minhash_signature(_resume(2))) < 0.5
+    assert dedup.minhash_signature("") is None
+
+
+def test_near_duplicates_are_flagged_per_user(database):
+    db.initialize_database()
+    text = _resume(1)
+    fields = {"name": "Ada"}
+    first = dedup.save_with_dedup(1, fields, text)
+    assert first["duplicate_of"] is None
+
+    again = dedup.save_with_dedup(1, fields, text + "\nUpdated phone number")
+    assert again["duplicate_of"] == first["id"] and again["similarity"] >= dedup.DEFAULT_THRESHOLD
+    assert db.get_user_history_page(1, limit=1)[0][0]["duplicate_of"] == first["id"]
+
+    skipped = dedup.save_with_dedup(1, fields, text, skip_duplicates=True)
+    assert skipped == {"id": None, "duplicate_of": first["id"], "similarity": 1.0, "skipped": True}
+    assert db.count_user_history(1) == 2
+
+    # Another user's identical upload is not their duplicate
+    assert dedup.save_with_dedup(2, fields, text)["duplicate_of"] is None
+    assert dedup.save_with_dedup(1, fields, _resume(2))["duplicate_of"] is None
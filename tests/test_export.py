@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+from datetime import date
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import db
+import export
+
+
+@pytest.fixture
+def rows(database):
+    db.initialize_database()
+    db.save_parsed_batch([(1, {"name": f"Person {i}", "skills": "python, sql"}) for i in range(5)])
+    db.save_parsed_data(2, {"name": "Someone else"})
+    db.get_connection().execute("UPDATE parsed_data SET parsed_on = '2024-0' || (1 + id % 2) || '-15 12:00:00'")
+    return 5
+
+
+def _read(fmt, data):
+    if fmt == "csv":
+        return list(csv.DictReader(io.StringIO(data.decode())))
+    if fmt == "jsonl":
+        return [json.loads(line) for line in data.decode().splitlines()]
+    if fmt == "parquet":
+        return pq.read_table(io.BytesIO(data)).to_pylist()
+    return pa.ipc.open_stream(data).read_all().to_pylist()
+
+
+@pytest.mark.parametrize("fmt", export.FORMATS)
+def test_file_and_streamed_exports_agree(rows, fmt):
+    out = io.BytesIO()
+    assert export.export(out, fmt, user_id=1, chunk_size=2) == rows
+    streamed = list(export.iter_export(fmt, user_id=1, chunk_size=2))
+    assert len(streamed) > 1
+    assert b"".join(streamed) == out.getvalue()
+
+    records = _read(fmt, out.getvalue())
+    assert [record["name"] for record in records] == [f"Person {i}" for i in (1, 3, 0, 2, 4)]
+    assert str(records[0]["skills"]) == "python, sql"
+    assert records[0]["email"] in ("", None)
+
+
+def test_date_range_and_empty_export(rows):
+    out = io.BytesIO()
+    assert export.export(out, "jsonl", since=date(2024, 2, 1)) == 3
+    assert export.export(io.BytesIO(), "csv", until="2024-01-01") == 0
+    assert b"".join(export.iter_export("csv", user_id=3)).decode().strip() == ",".join(db.EXPORT_COLUMNS)
+    with pytest.raises(ValueError):
+        export.export(io.BytesIO(), "xml")
+
+
+def test_format_for():
+    assert export.format_for("a/history.NDJSON") == "jsonl"
+    with pytest.raises(ValueError):
+        export.format_for("history.txt")
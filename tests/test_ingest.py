@@ -0,0 +1,42 @@
+import json
+import random
+
+import db
+import ingest
+from benchmark import synthetic_resume, write_docx, write_pdf
+
+
+def _corpus(directory, count):
+    rng = random.Random(7)
+    for i in range(count):
+        lines = synthetic_resume(rng, 1)
+        if i % 2:
+            (directory / f"resume{i}.pdf").write_bytes(write_pdf(lines))
+        else:
+            (directory / f"resume{i}.docx").write_bytes(write_docx(lines))
+
+
+def test_ingest_with_checkpoint_and_limits(database, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ingest, "IN_FLIGHT_PER_WORKER", 1)
+    db.initialize_database()
+    resumes = tmp_path / "resumes"
+    resumes.mkdir()
+    _corpus(resumes, 7)
+    (resumes / "broken.pdf").write_bytes(b"not a pdf")
+    # More pages than GUARDED_LIMITS allows
+    (resumes / "huge.pdf").write_bytes(write_pdf(["line"] * 201, lines_per_page=1))
+    checkpoint = str(tmp_path / "run.ckpt")
+
+    sources = ingest.collect_sources(str(resumes))
+    stats = ingest.ingest(sources, 1, workers=2, batch_size=3, checkpoint_path=checkpoint)
+    assert (stats["ok"], stats["failed"], stats["skipped"]) == (7, 2, 0)
+    assert db.count_user_history(1) == 7
+    with open(checkpoint, encoding="utf-8") as f:
+        errors = {entry["source"]: entry["error"] for entry in map(json.loads, f) if entry["status"] == "error"}
+    assert "pages" in errors[str(resumes / "huge.pdf")]
+
+    # A rerun skips everything recorded in the checkpoint
+    stats = ingest.ingest(sources, 1, workers=2, batch_size=3, checkpoint_path=checkpoint)
+    assert (stats["ok"], stats["failed"], stats["skipped"]) == (0, 0, 9)
+    assert db.count_user_history(1) == 7
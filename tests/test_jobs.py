@@ -0,0 +1,48 @@
+import random
+import time
+
+import pytest
+
+import cache
+import db
+import metrics
+from benchmark import synthetic_resume, write_pdf
+from jobs import DONE, FAILED, JobQueue
+
+
+def _wait(queue, job_id):
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        job = queue.status(job_id)
+        if job["status"] in (DONE, FAILED):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+@pytest.fixture
+def job_queue(database, tmp_path, monkeypatch):
+    # Workers are spawned with this environment and working directory
+    monkeypatch.setenv("RESUME_PARSER_METRICS", "1")
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cache, "_parse_cache", None)
+    metrics.reset()
+    db.initialize_database()
+    queue = JobQueue(max_workers=1)
+    yield queue
+    queue.shutdown()
+    metrics.reset()
+
+
+def test_worker_metrics_and_cache_counters_reach_the_parent(job_queue):
+    data = write_pdf(synthetic_resume(random.Random(0), 1))
+    for payload in (data, data, b"not a pdf"):
+        _wait(job_queue, job_queue.submit(1, payload, "resume.pdf"))
+
+    assert cache.get_parse_cache().stats()["hits"] == 1
+    assert cache.get_parse_cache().stats()["misses"] == 2
+    # The third upload failed in extraction, before the fields
+    assert metrics.snapshot()["parser.extract_fields"]["calls"] == 1
+    assert metrics.counter_total("pdf_pages_total") >= 1
+    assert metrics.counter_total("parse_cache_lookups_total") == 3
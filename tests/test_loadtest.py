@@ -0,0 +1,37 @@
+import argparse
+
+import pytest
+
+import loadtest
+
+
+def test_parse_mix():
+    assert loadtest.parse_mix("parse=2, history ,signin=0.5") == {"parse": 2.0, "history": 1.0, "signin": 0.5}
+    with pytest.raises(argparse.ArgumentTypeError, match="unknown action"):
+        loadtest.parse_mix("upload=1")
+    with pytest.raises(argparse.ArgumentTypeError, match="bad weight"):
+        loadtest.parse_mix("parse=lots")
+
+
+def test_recorder_counts_errors():
+    recorder = loadtest.Recorder()
+    assert recorder.timed("signin", lambda: 1 / 0) is None
+    assert recorder.timed("signin", loadtest._Outcome, None, "rejected").error == "rejected"
+    assert recorder.timed("signin", loadtest._Outcome, "ok").value == "ok"
+    assert len(recorder.latencies["signin"]) == 3
+    assert recorder.errors == {"signin": {"ZeroDivisionError": 1, "rejected": 1}}
+
+
+def test_capacity_ignores_parse_latency():
+    def level(users, error_rate, **p95):
+        return {"users": users, "error_rate": error_rate,
+                "actions": {action: {"p95_ms": ms} for action, ms in p95.items()}}
+
+    levels = [
+        level(1, 0.0, history=10, parse=5000),
+        level(4, 0.0, history=90, parse=9000),
+        level(8, 0.0, history=400),
+        level(16, 0.5, history=50),
+    ]
+    assert loadtest.capacity(levels, slo_ms=100, max_error_rate=0.01) == 4
+    assert loadtest.capacity(levels[2:], slo_ms=100, max_error_rate=0.01) is None
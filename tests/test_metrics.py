@@ -0,0 +1,28 @@
+import metrics
+
+
+def test_drain_and_merge(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    metrics.reset()
+    metrics.observe("parser.extract_text", 0.002)
+    metrics.inc("pdf_pages_total", 3, help="PDF pages extracted.")
+    delta = metrics.drain()
+    assert metrics.snapshot() == {}
+
+    metrics.observe("parser.extract_text", 0.004)
+    metrics.merge(delta)
+    metrics.merge(delta)
+    assert metrics.snapshot()["parser.extract_text"]["calls"] == 3
+    assert metrics.counter_total("pdf_pages_total") == 6
+    assert "# HELP resume_parser_pdf_pages_total PDF pages extracted." in metrics.render_prometheus()
+    metrics.reset()
+
+
+def test_percentile_is_nearest_rank():
+    samples = [float(i) for i in range(100, 0, -1)]
+    assert metrics.percentile(samples, 50) == 50.0
+    assert metrics.percentile(samples, 95) == 95.0
+    assert metrics.percentile(samples, 100) == 100.0
+    assert metrics.percentile(samples, 0) == 1.0
+    assert metrics.percentile([0.2], 99) == 0.2
+    assert metrics.percentile([], 95) == 0.0
@@ -0,0 +1,75 @@
+import sqlite3
+
+import db
+import migrate
+
+# parsed_data as the first release created it, before any added columns or indexes
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    password TEXT NOT NULL
+);
+CREATE TABLE parsed_data (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    name TEXT,
+    email TEXT,
+    phone TEXT,
+    skills TEXT,
+    education TEXT,
+    experience TEXT,
+    linkedin_url TEXT,
+    github_url TEXT,
+    parsed_on TEXT NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users(id)
+);
+"""
+
+
+def _baseline_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute("INSERT INTO users (name, email, password) VALUES ('A', 'a@example.com', 'x')")
+    rows = [
+        (1, f"Person {i}", "N/A", "555-0100", "Python, SQL, python" if i % 2 else "N/A",
+         "BSc Computer Science " * 40, "N/A", "N/A", "N/A", f"2024-01-{i + 1:02d} 12:00:00")
+        for i in range(12)
+    ]
+    conn.executemany(
+        "INSERT INTO parsed_data (user_id, name, email, phone, skills, education, experience, linkedin_url, "
+        "github_url, parsed_on) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_migrates_baseline_database(database, tmp_path):
+    _baseline_database(database)
+
+    assert migrate.main([database, "--backup", str(tmp_path / "backup.db")]) == 0
+
+    conn = db.get_connection()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == db.STORAGE_VERSION
+    history = db.get_user_history(1)
+    assert len(history) == 12
+    newest = history[0]
+    assert newest["name"] == "Person 11"
+    assert newest["skills"] == "python, sql"
+    assert newest["email"] == "N/A"
+    assert newest["education"] == "BSc Computer Science " * 40
+    assert isinstance(conn.execute("SELECT education FROM parsed_data LIMIT 1").fetchone()[0], bytes)
+    assert {row["name"] for row in db.search_resumes(1, skills=["sql"])} == {f"Person {i}" for i in range(1, 12, 2)}
+
+    # The backup is the untouched original
+    backup = sqlite3.connect(tmp_path / "backup.db")
+    assert "duplicate_of" not in [row[1] for row in backup.execute("PRAGMA table_info(parsed_data)")]
+    backup.close()
+
+
+def test_already_converted(database, capsys):
+    db.initialize_database()
+    assert migrate.main([database]) == 0
+    assert "already uses the compact format" in capsys.readouterr().out
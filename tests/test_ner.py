@@ -0,0 +1,33 @@
+import pytest
+
+import ner
+import parser
+
+RESUME = "CURRICULUM VITAE\nAda Lovelace\nada@example.com\nExperience\nAnalyst at Acme, 2019-2021\n\nEducation\nB.Sc., 2018\n"
+
+
+def test_extract_name_skips_titles_and_contact_lines():
+    assert parser.extract_name(RESUME) == "Ada Lovelace"
+    assert parser.extract_name("Name: Ada Lovelace\n") == "Ada Lovelace"
+    assert parser.extract_name("ada@example.com\n+1 555 123 4567\n") == "ada@example.com"
+
+
+def test_ner_reads_only_the_header():
+    assert ner.header_span(parser.ResumeDocument(RESUME)) == "CURRICULUM VITAE\nAda Lovelace\nada@example.com"
+    assert ner.header_span(parser.ResumeDocument("\nExperience\nAcme\n")) is None
+    long_header = "\n".join(f"line {i}" for i in range(50))
+    assert ner.header_span(parser.ResumeDocument(long_header)).count("\n") == ner.HEADER_LINES - 1
+
+
+def test_ner_versions_mark_the_name():
+    assert ner.ner_versions()["name"] != parser.extractor_versions()["name"]
+    assert ner.ner_versions()["skills"] == parser.extractor_versions()["skills"]
+
+
+def test_extract_names_falls_back_to_the_regex_name():
+    pytest.importorskip("spacy")
+    try:
+        ner.get_ner()
+    except OSError:
+        pytest.skip(f"spaCy model {parser.SPACY_MODEL} is not installed")
+    assert ner.extract_names([RESUME, "\n"]) == ["Ada Lovelace", "N/A"]
@@ -0,0 +1,117 @@
+import io
+import zipfile
+
+import pytest
+
+import parser
+from benchmark import write_pdf
+from parser import ExtractionLimitError, ExtractionLimits
+
+
+def _pdf(pages):
+    return io.BytesIO(write_pdf([f"Page {i + 1}" for i in range(pages)], lines_per_page=1))
+
+
+def test_pdf_pages_in_order_up_to_the_cap():
+    assert parser.extract_text_from_pdf(_pdf(3)) == "Page 1\nPage 2\nPage 3\n"
+    assert parser.extract_text_from_pdf(_pdf(5), max_pages=2) == "Page 1\nPage 2\n"
+
+
+def test_pdf_byte_limit():
+    with pytest.raises(ExtractionLimitError) as error:
+        parser.extract_text_from_pdf(_pdf(3), max_bytes=100)
+    assert error.value.limit == "bytes"
+
+
+def test_guarded_pdf_over_the_page_limit_is_rejected():
+    with pytest.raises(ExtractionLimitError) as error:
+        parser.extract_text(_pdf(6), "resume.pdf", ExtractionLimits(max_pages=5))
+    assert error.value.limit == "pages"
+    assert parser.extract_text(_pdf(5), "resume.pdf", ExtractionLimits(max_pages=5)).startswith("Page 1\n")
+
+
+def _baseline_extract_section(text, section_name):
+    # extract_section as it was before ResumeDocument, kept as the reference behaviour
+    lines = text.split('\n')
+    content = ""
+    capture = False
+    for line in lines:
+        if section_name.lower() in line.lower():
+            capture = True
+            continue
+        elif capture and (line.strip() == "" or any(x in line.lower() for x in parser.SECTION_KEYWORDS)):
+            break
+        elif capture:
+            content += line + "\n"
+    return content.strip() if content else "N/A"
+
+
+SEGMENTER_LINES = [
+    "", "   ", "EDUCATION", "Experience", "Work experience (education sector)", "Skills: Python, SQL",
+    "B.Sc. Computer Science", "Acme Corp, 2019-2021", "Projects", "Summary", "Led a team of 4",
+    "education continued", "Hobbies", "  indented detail",
+]
+
+
+def test_segmenter_matches_the_baseline_extract_section():
+    import random
+
+    rng = random.Random(5)
+    for _ in range(500):
+        text = "\n".join(rng.choice(SEGMENTER_LINES) for _ in range(rng.randint(0, 12)))
+        doc = parser.ResumeDocument(text)
+        for name in ("education", "Experience", "skills", "summary", "missing"):
+            assert doc.section(name) == _baseline_extract_section(text, name), (text, name)
+            assert parser.extract_section(text, name) == doc.section(name)
+
+
+def test_extract_fields_shares_one_document():
+    text = "Jane Doe\njane@example.com\n+1 555 123 4567\nEducation\nB.Sc.\n\nExperience\nAcme\n"
+    fields = parser.extract_fields(text, ["name", "email", "education", "experience"])
+    assert fields == {"name": "Jane Doe", "email": "jane@example.com", "education": "B.Sc.", "experience": "Acme"}
+
+
+def _docx(body, extra=()):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("word/document.xml", f'<w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>')
+        for name, xml in extra:
+            docx.writestr(name, f'<w:hdr xmlns:w="{W_NS}">{xml}</w:hdr>')
+    buffer.seek(0)
+    return buffer
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+DOCX_BODY = "<w:p><w:r><w:t>Ada</w:t><w:tab/><w:t>Lovelace</w:t></w:r></w:p><w:p><w:r><w:t>Skills</w:t><w:br/><w:t>Python</w:t></w:r></w:p>"
+
+
+def test_docx_text_with_headers_and_footers():
+    docx = _docx(DOCX_BODY, [("word/footer1.xml", "<w:p><w:r><w:t>Page 1</w:t></w:r></w:p>"),
+                             ("word/header1.xml", "<w:p><w:r><w:t>CV</w:t></w:r></w:p>")])
+    assert parser.extract_text(docx, "resume.docx") == "CV\n\nAda\tLovelace\n\nSkills\nPython\n\nPage 1"
+
+
+def test_guarded_docx_limits():
+    with pytest.raises(ExtractionLimitError) as error:
+        parser.extract_text(_docx(DOCX_BODY), "resume.docx", ExtractionLimits(max_chars=10))
+    assert error.value.limit == "chars"
+
+    # Compresses to a few KB but inflates past the limit
+    bomb = _docx("<w:p><w:r><w:t>" + " " * 2_000_000 + "</w:t></w:r></w:p>")
+    assert len(bomb.getvalue()) < 20_000
+    with pytest.raises(ExtractionLimitError) as error:
+        parser.extract_text(bomb, "resume.docx", ExtractionLimits(max_decompressed_bytes=1_000_000))
+    assert error.value.limit == "decompressed_bytes"
+
+    with pytest.raises(ExtractionLimitError) as error:
+        parser.extract_text(_docx(DOCX_BODY), "resume.docx", ExtractionLimits(max_bytes=100))
+    assert error.value.limit == "bytes"
+    assert parser.extract_text(_docx(DOCX_BODY), "resume.docx", parser.GUARDED_LIMITS).startswith("Ada")
+
+
+def test_limit_error_survives_pickling():
+    import pickle
+
+    error = pickle.loads(pickle.dumps(ExtractionLimitError("too big", "bytes", 100)))
+    assert (str(error), error.limit, error.maximum) == ("too big", "bytes", 100)
+    assert error.to_dict() == {"error": "too big", "limit": "bytes", "maximum": 100}
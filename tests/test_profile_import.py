@@ -0,0 +1,5 @@
+import profile_import
+
+
+def test_parser_import_leaves_heavy_libraries_unloaded():
+    assert profile_import.profile_import("parser")["loaded"] == []
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+import db
+import ranking
+
+
+@pytest.fixture
+def resumes(database):
+    db.initialize_database()
+    ranking.invalidate()
+    yield {
+        name: db.save_parsed_data(user_id, {"name": name, "skills": skills})
+        for name, user_id, skills in [
+            ("all", 1, "python, sql, docker"),
+            ("python", 1, "python"),
+            ("sprawling", 1, "python, sql, docker, java, aws, kubernetes"),
+            ("unrelated", 1, "java"),
+            ("other user", 2, "python, sql, docker"),
+            ("no skills", 1, "N/A"),
+        ]
+    }
+    ranking.invalidate()
+
+
+def _names(report):
+    return [record["name"] for record in report["results"]]
+
+
+def test_ranks_by_weighted_skill_overlap(resumes):
+    report = ranking.rank_candidates("Python developer with SQL and Docker (k8s a plus)", skills=["cobol"])
+    assert report["job_skills"] == ["docker", "kubernetes", "python", "sql"]
+    assert report["unknown_skills"] == ["cobol"]
+    assert "unrelated" not in _names(report) and "no skills" not in _names(report)
+
+    overlap = ranking.rank_candidates(skills=["python", "sql", "docker"], method="overlap")
+    assert _names(overlap)[:3] == ["all", "sprawling", "other user"]
+    assert overlap["results"][0]["score"] == 1.0
+    assert overlap["results"][-1]["missing_skills"] == ["docker", "sql"]
+    # Cosine prefers the focused profile over the one listing everything
+    cosine = ranking.rank_candidates(skills=["python", "sql", "docker"], user_id=1)
+    assert _names(cosine) == ["all", "sprawling", "python"]
+
+
+def test_cosine_scores_match_a_dense_reference(resumes):
+    matrix = ranking.get_skill_matrix()
+    dense = np.unpackbits(matrix.bits, axis=1, count=len(matrix.vocabulary)).astype(float) * matrix.idf
+    query = np.zeros(len(matrix.vocabulary))
+    for skill in ("python", "docker"):
+        query[matrix.index[skill]] = matrix.idf[matrix.index[skill]]
+    expected = dense @ query / (np.linalg.norm(dense, axis=1) * np.linalg.norm(query))
+    by_id = dict(zip(matrix.ids.tolist(), expected))
+    for record in ranking.rank_candidates(skills=["python", "docker"])["results"]:
+        assert record["score"] == pytest.approx(by_id[record["id"]], abs=1e-4)
+
+
+def test_matrix_follows_inserts_and_rewrites(resumes):
+    assert _names(ranking.rank_candidates(skills=["aws"])) == ["sprawling"]
+    new = db.save_parsed_data(1, {"name": "new", "skills": "aws"})
+    assert _names(ranking.rank_candidates(skills=["aws"])) == ["new", "sprawling"]
+
+    db.update_parsed_fields([(new, {"skills": "java"}, {})])
+    assert _names(ranking.rank_candidates(skills=["aws"])) == ["sprawling"]
+    db.clear_user_history(1)
+    assert _names(ranking.rank_candidates(skills=["python"])) == ["other user"]
@@ -0,0 +1,61 @@
+import pytest
+
+import db
+import parser
+import reprocess
+
+TEXT = "Ada Lovelace\nada@example.com\nSkills\nPython, SQL and Docker\n"
+
+
+def _history():
+    return {record["id"]: record for record in db.get_user_history(1)}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_reruns_only_stale_extractors(database, workers):
+    db.initialize_database()
+    current = parser.extractor_versions()
+    stale = {**current, "skills": "0"}
+    # Wrong stored values show which fields were re-extracted
+    fields = {"name": "Old name", "email": "old@example.com", "skills": "java"}
+    stale_id = db.save_parsed_data(1, fields, raw_text=TEXT, versions=stale)
+    fresh_id = db.save_parsed_data(1, fields, raw_text=TEXT, versions=current)
+    db.save_parsed_data(1, fields)
+
+    planned = reprocess.reprocess(user_id=1, workers=workers, dry_run=True, progress=None)
+    assert (planned["checked"], planned["updated"], planned["no_text"]) == (2, 1, 1)
+    assert _history()[stale_id]["skills"] == "java"
+
+    stats = reprocess.reprocess(user_id=1, workers=workers, chunk_size=1, progress=None)
+    assert (stats["updated"], stats["up_to_date"], stats["extractors"]["skills"]) == (1, 1, 1)
+    history = _history()
+    assert history[stale_id]["skills"] == "docker, python, sql"
+    assert history[stale_id]["name"] == "Old name"
+    assert history[fresh_id]["skills"] == "java"
+    assert db.get_stored_text_page(user_id=1)[0] == (stale_id, TEXT, current)
+    assert reprocess.reprocess(user_id=1, workers=workers, progress=None)["updated"] == 0
+
+
+def test_force_and_unknown_extractors(database):
+    db.initialize_database()
+    resume_id = db.save_parsed_data(1, {"email": "old@example.com"}, raw_text=TEXT,
+                                    versions=parser.extractor_versions())
+    stats = reprocess.reprocess(workers=1, extractors=["email"], force=True, progress=None)
+    assert stats["extractors"]["email"] == 1 and stats["extractors"]["skills"] == 0
+    assert _history()[resume_id]["email"] == "ada@example.com"
+    with pytest.raises(ValueError, match="Unknown extractor"):
+        reprocess.reprocess(workers=1, extractors=["nope"], progress=None)
+
+
+def test_plain_run_keeps_names_from_ner(database):
+    import ner
+
+    db.initialize_database()
+    resume_id = db.save_parsed_data(1, {"name": "Augusta Ada King"}, raw_text=TEXT, versions=ner.ner_versions())
+    stats = reprocess.reprocess(workers=1, progress=None)
+    assert (stats["updated"], stats["extractors"]["name"]) == (0, 0)
+    assert _history()[resume_id]["name"] == "Augusta Ada King"
+
+    # An NER name from an older NER version is still refreshed by an NER run
+    assert reprocess.stale_extractors({"name": "2+ner0"}, {"name": "2+ner1"}) == ["name"]
+    assert reprocess.stale_extractors({"name": "2+ner1"}, {"name": "3"}) == ["name"]
@@ -0,0 +1,41 @@
+from skill_matcher import CompiledSkillMatcher, SkillMatcher, tokenize
+
+SKILLS = ["python", "java", "javascript", "c++", "c#", "machine learning", "quantum machine learning", "sql"]
+TEXT = "Built JavaScript and C++ tools; quantum machine learning with Python/SQL. Some C# too."
+
+
+def test_tokens_keep_plus_and_hash():
+    assert tokenize("C++, C# and Node.js") == ["c++", "c#", "and", "node", "js"]
+
+
+def test_matches_only_on_token_boundaries():
+    matcher = SkillMatcher(SKILLS)
+    assert matcher.find_skills(TEXT) == [
+        "c#", "c++", "javascript", "machine learning", "python", "quantum machine learning", "sql",
+    ]
+    assert matcher.find_skills("javascripting, pythonic") == []
+
+
+def test_match_offsets_point_into_the_text():
+    matcher = SkillMatcher(SKILLS)
+    for match in matcher.find_all(TEXT):
+        assert tokenize(TEXT[match.start:match.end]) == tokenize(match.skill)
+
+
+def test_alias_reports_canonical_skill():
+    matcher = SkillMatcher(["javascript"])
+    matcher.add("js", "javascript")
+    assert matcher.find_skills("Wrote JS daily") == ["javascript"]
+    assert matcher.skills == ["javascript"]
+
+
+def test_compiled_matcher_agrees_with_trie(tmp_path):
+    matcher = SkillMatcher(SKILLS)
+    matcher.add("ml", "machine learning")
+    path = str(tmp_path / "skills.bin")
+    matcher.compile(path, b"digest")
+    compiled = CompiledSkillMatcher(path)
+    assert compiled.digest.rstrip(b"\0") == b"digest"
+    assert compiled.skills == matcher.skills
+    text = TEXT + " ML and java"
+    assert compiled.find_all(text) == matcher.find_all(text)
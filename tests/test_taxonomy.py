@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+import taxonomy
+from skill_matcher import CompiledSkillMatcher
+from taxonomy import Taxonomy, TaxonomyError, parse_taxonomy
+
+
+def test_parse_aliases_comments_and_repeats():
+    text = "# languages\nPython | py\nc#\n\nkubernetes | K8s\npython | cpython | py\n"
+    assert parse_taxonomy(text) == [("python", ["py", "cpython"]), ("c#", []), ("kubernetes", ["k8s"])]
+
+
+@pytest.mark.parametrize("text, message", [
+    ("python\nsnake | python\n", "already belongs to 'python'"),
+    ("c, c++\n", "commas"),
+    ("python | ...\n", "no matchable words"),
+])
+def test_parse_rejects_malformed_lines(text, message):
+    with pytest.raises(TaxonomyError, match=message):
+        parse_taxonomy(text)
+
+
+def _write(path, text):
+    path.write_text(text)
+    # Make the edit visible to the mtime check even within the same clock tick
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_compiles_once_and_reloads_on_change(tmp_path, monkeypatch):
+    source = tmp_path / "skills.txt"
+    source.write_text("python | py\nsql\n")
+    loaded = Taxonomy(str(source))
+    assert isinstance(loaded.matcher, CompiledSkillMatcher)
+    assert loaded.matcher.find_skills("py and SQL") == ["python", "sql"]
+    assert Taxonomy(str(source)).digest == loaded.digest
+
+    _write(source, "python | py\nsql\ndocker\n")
+    assert loaded.refresh() is False  # within RELOAD_CHECK_INTERVAL
+    monkeypatch.setattr(taxonomy, "RELOAD_CHECK_INTERVAL", 0)
+    assert loaded.refresh() is True
+    assert loaded.refresh() is False
+    assert loaded.skills == ["python", "sql", "docker"]
+
+    _write(source, "python\nsnake | python\n")
+    assert loaded.refresh() is False
+    assert "already belongs" in loaded.last_error
+    assert loaded.skills == ["python", "sql", "docker"]
+
+
+def test_stale_artifact_is_rebuilt(tmp_path):
+    source = tmp_path / "skills.txt"
+    source.write_text("python\n")
+    Taxonomy(str(source))
+    source.write_text("java\n")
+    matcher, _ = taxonomy.load_matcher(str(source))
+    assert matcher.skills == ["java"]